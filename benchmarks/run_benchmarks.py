@@ -0,0 +1,275 @@
+# benchmarks/run_benchmarks.py
+"""Pipeline benchmarks on synthetic loan data.
+
+Generates financial_loan.csv-shaped files of the requested sizes and times
+every pipeline stage (wall time, CPU time, rows/second, peak RSS). Results
+are saved as JSON; pass --compare to flag regressions against an earlier run.
+
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000
+    python benchmarks/run_benchmarks.py --sizes 100000 --compare benchmarks/results/baseline.json
+    python benchmarks/run_benchmarks.py --sizes 500000 --workers 2 4
+    python benchmarks/run_benchmarks.py --sizes 20000000 --state-weights CA=90,NY=10 --grade-weights A=1,G=1
+
+With --workers the row-local steps (handle_missing_values ->
+convert_data_types -> create_derived_features) are also timed serially and
+with ParallelLoanDataPreprocessor at each worker count, to check whether the
+process pool pays for its pickling on this machine before using --workers.
+
+Sizes above --max-in-memory run the streaming pipeline: the raw file is
+validated in chunks, and every pass and per-chunk step is recorded as its
+own ``chunked.<stage>`` result (step times summed over chunks).
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_preprocessing import LoanDataPreprocessor
+from src.data_validator import DataValidator, validate_csv
+from src.kpi_calculator import LoanKPICalculator
+from src.chunked_preprocessing import ChunkedLoanDataPreprocessor
+from src.parallel_preprocessing import ParallelLoanDataPreprocessor
+from src.synthetic_data import write_loan_csv
+from src.instrumentation import current_rss
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# Above this many rows only the chunked (streaming) pipeline is benchmarked
+MAX_IN_MEMORY_ROWS = 5_000_000
+
+
+class PeakRSSMonitor:
+    """Samples RSS in a background thread while a stage runs"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def measure(results: list, rows: int, stage: str, func):
+    """Run ``func`` once and record its timings; returns func's result"""
+    with PeakRSSMonitor() as monitor, contextlib.redirect_stdout(io.StringIO()):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        value = func()
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    results.append({
+        'rows': rows,
+        'stage': stage,
+        'wall_seconds': round(wall, 6),
+        'cpu_seconds': round(cpu, 6),
+        'rows_per_second': round(rows / wall, 1) if wall > 0 else None,
+        'peak_rss_mb': round(monitor.peak / 2**20, 1) if monitor.peak is not None else None
+    })
+    print(f"   {stage:<36} {wall:9.3f}s  {results[-1]['rows_per_second'] or 0:>14,.0f} rows/s  "
+          f"{results[-1]['peak_rss_mb']} MB")
+    return value
+
+
+def benchmark_row_local(results: list, raw: pd.DataFrame, rows: int, workers: list):
+    """Row-local steps serially, then in a process pool per worker count"""
+    def serial():
+        preprocessor = LoanDataPreprocessor(raw, random_state=0).clean_column_names()
+        return (preprocessor
+                .handle_missing_values()
+                .convert_data_types()
+                .create_derived_features())
+
+    def parallel(n_workers):
+        preprocessor = ParallelLoanDataPreprocessor(raw, n_workers=n_workers, random_state=0)
+        return preprocessor.clean_column_names().run_row_local_steps()
+
+    expected = measure(results, rows, 'row_local_serial', serial).df
+    for n_workers in workers:
+        output = measure(results, rows, f'row_local_{n_workers}_workers', lambda: parallel(n_workers)).df
+        if not output.equals(expected):
+            print(f"   ❌ {n_workers} workers: output differs from the serial run")
+
+
+def stage_results(rows: int, records: list, prefix: str) -> list:
+    """One result per StageMetrics stage (no RSS sampling: ``rss_delta_mb`` instead)"""
+    results = []
+    for record in records:
+        stage_rows = record['rows_in'] or rows
+        wall = record['wall_seconds']
+        results.append({
+            'rows': rows,
+            'stage': f"{prefix}{record['stage']}",
+            'wall_seconds': wall,
+            'cpu_seconds': record['cpu_seconds'],
+            'rows_per_second': round(stage_rows / wall, 1) if wall > 0 else None,
+            'peak_rss_mb': None,
+            'rss_delta_mb': record['rss_delta_mb'],
+            'calls': record['calls']
+        })
+        print(f"   {results[-1]['stage']:<36} {wall:9.3f}s  {results[-1]['rows_per_second'] or 0:>14,.0f} rows/s  "
+              f"Δ{record['rss_delta_mb']} MB ({record['calls']} calls)")
+    return results
+
+
+def benchmark_chunked(path: str, rows: int, chunksize: int) -> list:
+    """Streaming path: chunked validation, every pass and chunk step, the KPI exports"""
+    results = []
+    measure(results, rows, 'validate_csv', lambda: validate_csv(path, mode='full', chunksize=chunksize,
+                                                                raise_on_error=False))
+    output = os.path.join(os.path.dirname(path), f'clean_{rows}.csv')
+    preprocessor = measure(results, rows, 'chunked_pipeline',
+                           lambda: ChunkedLoanDataPreprocessor(path, chunksize=chunksize, random_state=0).run([output]))
+    results += stage_results(rows, preprocessor.stage_metrics.aggregate(), 'chunked.')
+    measure(results, rows, 'kpi_cube_exports', preprocessor.cube.export_tables)
+    return results
+
+
+def benchmark_size(path: str, rows: int, chunksize: int, max_in_memory: int = MAX_IN_MEMORY_ROWS,
+                   workers: list = ()) -> list:
+    """Time every stage on one generated file"""
+    if rows > max_in_memory:
+        return benchmark_chunked(path, rows, chunksize)
+
+    results = []
+
+    raw = measure(results, rows, 'read_csv', lambda: pd.read_csv(path))
+    measure(results, rows, 'validator_report', lambda: DataValidator(raw).generate_report())
+    if workers:
+        benchmark_row_local(results, raw, rows, workers)
+
+    preprocessor = measure(results, rows, 'init_preprocessor', lambda: LoanDataPreprocessor(raw, random_state=0))
+    for step in ['clean_column_names', 'handle_missing_values', 'convert_data_types',
+                 'create_derived_features', 'add_payment_metrics', 'remove_outliers', 'optimize_dtypes']:
+        measure(results, rows, step, getattr(preprocessor, step))
+    clean = preprocessor.get_clean_data()
+
+    calculator = LoanKPICalculator(clean)
+    measure(results, len(clean), 'kpi_primary', calculator.calculate_primary_kpis)
+    measure(results, len(clean), 'kpi_good_bad', calculator.calculate_good_bad_loans)
+    measure(results, len(clean), 'kpi_cube_exports', lambda: calculator.build_cube().export_tables())
+    return results
+
+
+def compare(results: list, baseline_file: str, threshold: float):
+    """Print stages that got slower than the baseline by more than ``threshold``"""
+    with open(baseline_file) as f:
+        baseline = {(r['rows'], r['stage']): r for r in json.load(f)['results']}
+    print(f"\n🔍 Comparison with {baseline_file} (threshold {threshold:.0%}):")
+    regressions = 0
+    for result in results:
+        previous = baseline.get((result['rows'], result['stage']))
+        if not previous or not previous['wall_seconds']:
+            continue
+        change = result['wall_seconds'] / previous['wall_seconds'] - 1
+        flag = '❌ REGRESSION' if change > threshold else ('✅ faster' if change < -threshold else '')
+        regressions += change > threshold
+        print(f"   {result['rows']:>10} {result['stage']:<36} {previous['wall_seconds']:9.3f}s → "
+              f"{result['wall_seconds']:9.3f}s ({change:+.1%}) {flag}")
+    return regressions
+
+
+def parse_weights(text: str) -> dict:
+    """``CA=90,NY=10`` -> ``{'CA': 90.0, 'NY': 10.0}`` (labels may contain spaces)"""
+    weights = {}
+    for item in text.split(','):
+        label, separator, weight = item.rpartition('=')
+        if not separator or not label.strip():
+            raise argparse.ArgumentTypeError(f"expected LABEL=WEIGHT pairs, got {item!r}")
+        weights[label.strip()] = float(weight)
+    return weights
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the loan data pipeline on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Row counts to benchmark (10k to 50M)")
+    parser.add_argument('--data-dir', default=os.path.join(BENCHMARK_DIR, 'data'),
+                        help="Where generated CSV files are kept (reused between runs)")
+    parser.add_argument('--output', default=None, help="Results JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', default=None, help="Earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Relative slowdown reported as regression")
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help="Chunk size for the streaming runs")
+    parser.add_argument('--max-in-memory', type=int, default=MAX_IN_MEMORY_ROWS,
+                        help="Larger sizes only run the chunked pipeline")
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help="Also time the row-local steps serially and with these worker counts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--missing-rate', type=float, default=0.01)
+    parser.add_argument('--outlier-rate', type=float, default=0.005)
+    # Skewed distributions, e.g. one dominant state (default: the 2021 portfolio mix)
+    parser.add_argument('--state-weights', type=parse_weights, default=None, help="e.g. CA=90,NY=10")
+    parser.add_argument('--grade-weights', type=parse_weights, default=None, help="e.g. A=1,G=1")
+    parser.add_argument('--purpose-weights', type=parse_weights, default=None,
+                        help="e.g. 'Debt consolidation=95,car=5'")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    weights = {'state_weights': args.state_weights, 'grade_weights': args.grade_weights,
+               'purpose_weights': args.purpose_weights}
+    # Generated files are reused only for the same weights
+    weights_tag = (hashlib.sha256(json.dumps(weights, sort_keys=True).encode()).hexdigest()[:8]
+                   if any(weights.values()) else 'default')
+    all_results = []
+    for rows in args.sizes:
+        path = os.path.join(args.data_dir, f'financial_loan_{rows}_{args.seed}_{args.missing_rate}_'
+                                           f'{args.outlier_rate}_{weights_tag}.csv')
+        if not os.path.exists(path):
+            print(f"🏗️ Generating {rows:,} rows → {path}")
+            write_loan_csv(path, rows, seed=args.seed, missing_rate=args.missing_rate,
+                           outlier_rate=args.outlier_rate, **weights)
+        print(f"\n📊 Benchmarking {rows:,} rows")
+        all_results.extend(benchmark_size(path, rows, args.chunksize, args.max_in_memory, args.workers))
+
+    output = args.output or os.path.join(BENCHMARK_DIR, 'results',
+                                         f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'metadata': {
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'seed': args.seed,
+                'missing_rate': args.missing_rate,
+                'outlier_rate': args.outlier_rate,
+                **weights
+            },
+            'results': all_results
+        }, f, indent=2)
+    print(f"\n✅ Results saved to {output}")
+
+    if args.compare:
+        regressions = compare(all_results, args.compare, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
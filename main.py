@@ -1,10 +1,69 @@
 # main.py - SIMPLIFIED VERSION
-import pandas as pd
-from src.data_validator import DataValidator
+from src.data_validator import VALIDATION_MODES, validate_csv
 from src.data_preprocessing import LoanDataPreprocessor
+from src.chunked_preprocessing import ChunkedLoanDataPreprocessor
+from src.parallel_preprocessing import ParallelLoanDataPreprocessor
+from src.date_parser import DateParser
+from src.data_export import OUTPUT_FORMATS, output_path, publish_frame
+from src.kpi_calculator import KPIStateStore, LoanKPICalculator
+from src.powerbi_export import StarSchemaExporter
+from src.instrumentation import configure_logging, write_stage_metrics
+from src.checkpoint import CheckpointCache, DEFAULT_CACHE_BYTES
+from src.imputation import GROUP_FILLS, load_fill_values, save_fill_values
+import argparse
+import json
+import logging
 import os
 
-def main():
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Bank Loan Data Preprocessing Pipeline")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Stream the raw file in chunks of this many rows instead of loading it whole (same clean "
+                             "file and KPI summaries; the star schema tables need the in-memory run). Memory grows "
+                             "with the chunk size, plus 8 bytes per missing date in the file")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed for missing-date imputation (reproducible runs)")
+    parser.add_argument('--output-format', choices=list(OUTPUT_FORMATS), default='csv',
+                        help="Format of the clean/Power BI files (parquet/feather keep column types)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Run the row-local preprocessing steps in this many processes (same output; whether it "
+                             "is faster depends on the cores, see benchmarks/run_benchmarks.py --workers)")
+    parser.add_argument('--kpi-state', default=None,
+                        help="Directory of the persisted KPI cube (one file per issue month); the raw file is "
+                             "treated as a new batch and only its months are rewritten")
+    parser.add_argument('--replace-months', action='store_true',
+                        help="With --kpi-state: the batch restates its issue months instead of adding to them")
+    parser.add_argument('--validate', choices=['off'] + VALIDATION_MODES, default='off',
+                        help="Check the raw file's hard rules first; fail_fast stops at the first bad chunk, "
+                             "sample checks a random sample")
+    parser.add_argument('--group-fills', action='store_true',
+                        help="Impute annual_income by grade/emp_length and emp_length by home_ownership "
+                             "instead of with global medians/modes")
+    parser.add_argument('--reuse-fills', action='store_true',
+                        help="Fill missing values with the ones saved by the previous run (e.g. for a new batch); "
+                             "computed from this file when no run has saved any yet")
+    parser.add_argument('--lazy', action='store_true',
+                        help="Queue the preprocessing steps and run them as one optimized plan (fuses the "
+                             "derived features with optimize_dtypes) instead of each step when called")
+    parser.add_argument('--explain', action='store_true',
+                        help="Print the optimized preprocessing plan before running it (implies --lazy)")
+    parser.add_argument('--cache', action='store_true',
+                        help="Store every step's output and reuse it when the raw file, seed and code are "
+                             "unchanged (pays off for repeated runs; a first run is slower)")
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_CACHE_BYTES // 2**20,
+                        help="With --cache: size limit of the checkpoint cache (least recently used entries are evicted)")
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING'], default='INFO',
+                        help="DEBUG adds sample values and distributions to the step progress")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Only warnings and errors from the preprocessing steps (same as --log-level WARNING)")
+    return parser.parse_args()
+
+def main(chunksize: int = None, seed: int = None, output_format: str = 'csv',
+         kpi_state: str = None, replace_months: bool = False, workers: int = 1,
+         use_cache: bool = False, cache_size_mb: int = DEFAULT_CACHE_BYTES // 2**20,
+         validate: str = 'off', group_fills: bool = False, reuse_fills: bool = False,
+         lazy: bool = False, explain: bool = False):
     """Main data preprocessing pipeline"""
     print("Starting Bank Loan Data Preprocessing Pipeline...")
     
@@ -12,40 +71,132 @@ def main():
     raw_file = r'C:\Users\LENOVO\Documents\LOAN DATA PROJECT\databook\raw\financial_loan.csv'
     clean_file = r'C:\Users\LENOVO\Documents\LOAN DATA PROJECT\data\processed\loan_data_clean.csv'
     powerbi_file = r'C:\Users\LENOVO\Documents\LOAN DATA PROJECT\data\exports\powerbi_data.csv'
+    clean_file = output_path(clean_file, output_format)
+    powerbi_file = output_path(powerbi_file, output_format)
     
     # Create directories if they don't exist
     os.makedirs(os.path.dirname(clean_file), exist_ok=True)
     os.makedirs(os.path.dirname(powerbi_file), exist_ok=True)
     
-    # Step 1: Load raw data
+    # Date formats detected on earlier runs are remembered here
+    date_parser = DateParser(cache_file=os.path.join(os.path.dirname(clean_file), 'date_formats.json'))
+    
+    if validate != 'off':
+        # Reject a malformed file before any expensive preprocessing (raises DataValidationError)
+        print(f"Validating raw data ({validate})...")
+        report = validate_csv(raw_file, mode=validate, chunksize=chunksize or 100_000, random_state=seed)
+        print(f"Validation passed: {report['rows_checked']} of {report['rows_total']} records checked")
+        for rule in report['warnings']:
+            result = report['rules'][rule]
+            print(f"⚠️ {rule}: {result['violations']} of {result['checked']} values outside the expected range "
+                  f"(e.g. {', '.join(result['examples'])})")
+    
+    # Imputation values of each run are kept so the next batch can be filled the same way
+    fills_file = os.path.join(os.path.dirname(clean_file), 'fill_values.pkl')
+    group_by = GROUP_FILLS if group_fills else None
+    
+    if chunksize:
+        if group_fills or reuse_fills:
+            raise ValueError("Group-conditional and reused fill values need the in-memory pipeline (no --chunksize)")
+        # Streaming mode: peak memory bounded by the chunk size
+        print(f"Streaming raw data in chunks of {chunksize} rows...")
+        preprocessor = ChunkedLoanDataPreprocessor(raw_file, chunksize=chunksize, random_state=seed,
+                                                   date_parser=date_parser)
+        preprocessor.run([clean_file, powerbi_file], fmt=output_format)
+        # KPI summaries from the cube merged chunk by chunk
+        cube = preprocessor.cube
+        if kpi_state:
+            cube = KPIStateStore(kpi_state, output_format).update(cube, replace_partitions=replace_months)
+        for path in cube.write_exports(os.path.dirname(powerbi_file), fmt=output_format):
+            print(f"   - {path}")
+        print("⚠️ Star schema (dashboard_main + dim_* tables) not written: it needs the whole clean table, "
+              "run without --chunksize to build it")
+        summary = preprocessor.get_preprocessing_summary()
+        save_summary(summary, os.path.dirname(clean_file))
+        print_summary(summary, clean_file, powerbi_file)
+        return
+    
+    fill_values = None
+    if reuse_fills:
+        if os.path.exists(fills_file):
+            fill_values = load_fill_values(fills_file)
+        else:
+            print(f"⚠️ --reuse-fills: no saved fill values at {fills_file} yet (first run?); "
+                  f"computing them from this file")
+    
+    # Step 1: Load raw data (read only if a step can't be reused from the checkpoint cache)
     print("Step 1: Loading raw data...")
-    df = pd.read_csv(raw_file)
-    print(f"Loaded {len(df)} records with {len(df.columns)} columns")
+    checkpoints = None
+    if use_cache:
+        checkpoints = CheckpointCache(os.path.join(os.path.dirname(clean_file), 'checkpoints'),
+                                      max_bytes=cache_size_mb * 2**20)
     
     # Step 2: Data Preprocessing
     print("\nStep 2: Starting data preprocessing...")
-    preprocessor = LoanDataPreprocessor(df)
-    
-    # Run preprocessing pipeline
-    clean_df = (preprocessor
-                .clean_column_names()
-                .handle_missing_values()
-                .convert_data_types()
-                .create_derived_features()
-                .remove_outliers()
-                .get_clean_data())
-    
-    # Step 3: Save processed data
+    if workers > 1:
+        # Row-local steps in a process pool; same output as the serial run
+        preprocessor = ParallelLoanDataPreprocessor.from_csv(raw_file, checkpoints=checkpoints, n_workers=workers,
+                                                             random_state=seed, date_parser=date_parser, lazy=lazy)
+        preprocessor.clean_column_names().run_row_local_steps(fill_values=fill_values, group_by=group_by)
+    else:
+        preprocessor = LoanDataPreprocessor.from_csv(raw_file, checkpoints=checkpoints, random_state=seed,
+                                                     date_parser=date_parser, lazy=lazy)
+        (preprocessor
+         .clean_column_names()
+         .handle_missing_values(fill_values=fill_values, group_by=group_by)
+         .convert_data_types()
+         .create_derived_features())
+    
+    # Whole-frame steps (payment metrics are measured as of the latest payment in the book)
+    (preprocessor
+     .add_payment_metrics()
+     .remove_outliers()
+     .optimize_dtypes())
+    if explain:
+        print(preprocessor.explain())
+    # In lazy mode the queued steps run here, as one optimized plan
+    clean_df = preprocessor.get_clean_data()
+    save_fill_values(preprocessor.fill_values, fills_file)
+    if checkpoints:
+        print(f"Checkpoints: {checkpoints.hits} reused, {checkpoints.misses} recomputed")
+    
+    # Step 3: Save processed data (serialized once, Power BI file linked to it)
     print("\nStep 3: Saving processed data...")
-    clean_df.to_csv(clean_file, index=False)
-    clean_df.to_csv(powerbi_file, index=False)
+    publish_frame(clean_df, [clean_file, powerbi_file], fmt=output_format)
+    
+    # Step 4: Dashboard exports: star schema (fact + dim_* tables) and the KPI cube roll-ups
+    print("\nStep 4: Writing dashboard exports...")
+    calculator = LoanKPICalculator(clean_df)
+    if kpi_state:
+        # Incremental refresh: merge this batch into the saved aggregates
+        cube = calculator.update_state(kpi_state, replace_partitions=replace_months, fmt=output_format)
+    else:
+        cube = calculator.build_cube()
+    for path in StarSchemaExporter(clean_df, cube).write(os.path.dirname(powerbi_file), fmt=output_format):
+        print(f"   - {path}")
     
-    # Step 4: Generate summary
+    # Step 5: Generate summary
     summary = preprocessor.get_preprocessing_summary()
+    save_summary(summary, os.path.dirname(clean_file))
+    print_summary(summary, clean_file, powerbi_file)
+
+def save_summary(summary, directory):
+    """Write preprocessing_summary.json and stage_metrics.json to the processed data folder"""
+    with open(os.path.join(directory, 'preprocessing_summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2, default=str)
+    write_stage_metrics(summary['stage_metrics'], directory)
+
+def print_summary(summary, clean_file, powerbi_file):
+    """Print the preprocessing summary and output locations"""
     print("\nPreprocessing Summary:")
     print(f"  Final records: {summary['total_records']}")
     print(f"  Total columns: {summary['total_columns']}")
     
+    print("\nStage Timings:")
+    for stage in summary['stage_metrics']:
+        print(f"  - {stage['stage']}: {stage['wall_seconds']:.2f}s, "
+              f"{stage['rows_in']} → {stage['rows_out']} rows")
+    
     print("\nProcessing Steps:")
     for step in summary['processing_steps']:
         print(f"  - {step}")
@@ -56,4 +207,10 @@ def main():
     print(f"   - {powerbi_file}")
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    configure_logging(logging.WARNING if args.quiet else getattr(logging, args.log_level))
+    main(chunksize=args.chunksize, seed=args.seed, output_format=args.output_format,
+         kpi_state=args.kpi_state, replace_months=args.replace_months, workers=args.workers,
+         use_cache=args.cache, cache_size_mb=args.cache_size_mb, validate=args.validate,
+         group_fills=args.group_fills, reuse_fills=args.reuse_fills, lazy=args.lazy or args.explain,
+         explain=args.explain)
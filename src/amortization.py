@@ -0,0 +1,142 @@
+# src/amortization.py
+import pandas as pd
+import numpy as np
+from typing import Iterator
+
+# Columns payment_performance() adds to the loan frame
+PAYMENT_COLUMNS = [
+    'term_months', 'payments_due', 'scheduled_paid', 'expected_balance',
+    'payment_shortfall', 'recovery_rate', 'realized_yield'
+]
+# Schedule rows (loan-months) per chunk yielded by amortization_schedules()
+DEFAULT_SCHEDULE_ROWS = 1_000_000
+OPEN_LOAN_STATUS = ['Current']
+
+
+def term_months(term: pd.Series) -> np.ndarray:
+    """' 36 months' -> 36; the text is parsed once per distinct value"""
+    codes, labels = pd.factorize(term)
+    months = pd.Series(labels).astype(str).str.extract(r'(\d+)', expand=False).astype('float64').to_numpy()
+    # Code -1 (missing term) picks the appended NaN
+    return np.append(months, np.nan)[codes]
+
+
+def months_between(start: pd.Series, end) -> np.ndarray:
+    """Whole months from ``start`` to ``end`` (a date or a Series of dates)"""
+    start = pd.to_datetime(start)
+    end = pd.Series(pd.Timestamp(end), index=start.index) if np.ndim(end) == 0 else pd.to_datetime(end)
+    return ((end.dt.year - start.dt.year) * 12 + (end.dt.month - start.dt.month)
+            - (end.dt.day < start.dt.day)).to_numpy(dtype='float64', na_value=np.nan)
+
+
+def remaining_balance(principal: np.ndarray, monthly_rate: np.ndarray, payment: np.ndarray,
+                      payments_made: np.ndarray) -> np.ndarray:
+    """Balance after ``payments_made`` level payments (closed form, never below zero)
+
+    B_k = P (1 + r)^k - A ((1 + r)^k - 1) / r, or P - A k when r is 0.
+    """
+    growth = np.power(1 + monthly_rate, payments_made)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = np.where(monthly_rate > 0,
+                           principal * growth - payment * (growth - 1) / monthly_rate,
+                           principal - payment * payments_made)
+    return np.clip(balance, 0, None)
+
+
+def payment_performance(df: pd.DataFrame, as_of=None) -> pd.DataFrame:
+    """Scheduled vs. actual payments of every loan, in one array pass
+
+    Payments fall due monthly from one month after ``issue_date``; ``as_of``
+    defaults to the latest ``last_payment_date`` (the snapshot date of the
+    book). 36 and 60 month loans are handled together by clipping the months
+    elapsed to each loan's own term.
+
+    - payments_due: installments due by ``as_of``
+    - scheduled_paid: installment * payments_due
+    - expected_balance: principal still owed on schedule after those payments
+    - payment_shortfall: scheduled_paid - total_payment (negative = ahead of schedule)
+    - recovery_rate: total_payment / loan_amount
+    - realized_yield: annualized simple return on loan_amount over the months
+      the loan was active; open (Current) loans count their expected balance
+      as still recoverable, closed loans do not
+    """
+    if as_of is None:
+        as_of = df['last_payment_date'].max()
+    principal = df['loan_amount'].to_numpy(dtype='float64')
+    payment = df['installment'].to_numpy(dtype='float64')
+    monthly_rate = df['int_rate'].to_numpy(dtype='float64') / 12
+    received = df['total_payment'].to_numpy(dtype='float64')
+    term = term_months(df['term'])
+
+    payments_due = np.clip(months_between(df['issue_date'], as_of), 0, term)
+    scheduled_paid = payment * payments_due
+    # The last installment clears what the rounded installment left over, as in the schedule
+    expected_balance = np.where(payments_due == term, 0.0,
+                                remaining_balance(principal, monthly_rate, payment, payments_due))
+
+    # Months the loan earned interest: until its last payment, at most until as_of
+    last_payment = df['last_payment_date'].where(df['last_payment_date'] < pd.Timestamp(as_of), pd.Timestamp(as_of))
+    months_active = np.clip(months_between(df['issue_date'], last_payment), 1, term)
+    still_owed = np.where(df['loan_status'].isin(OPEN_LOAN_STATUS).to_numpy(), expected_balance, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recovery_rate = received / principal
+        realized_yield = (received + still_owed - principal) / principal * 12 / months_active
+
+    return pd.DataFrame({
+        'term_months': term,
+        'payments_due': payments_due,
+        'scheduled_paid': scheduled_paid.round(2),
+        'expected_balance': expected_balance.round(2),
+        'payment_shortfall': (scheduled_paid - received).round(2),
+        'recovery_rate': recovery_rate,
+        'realized_yield': realized_yield
+    }, index=df.index)
+
+
+def amortization_schedules(df: pd.DataFrame, max_rows: int = DEFAULT_SCHEDULE_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield the month-by-month schedules of all loans, ``max_rows`` rows at a time
+
+    Loans are grouped so each chunk holds at most ``max_rows`` loan-months
+    (a single loan longer than that gets a chunk of its own), so memory is
+    bounded whatever the size of the book. Within a chunk every row is
+    computed at once from the closed-form balance: interest is the rate on
+    the previous balance and principal the drop in balance, with the last
+    payment clearing whatever the rounded installment left over.
+    """
+    term = np.nan_to_num(term_months(df['term'])).astype(np.int64)
+    ends = np.cumsum(term)
+    start = 0
+    while start < len(df):
+        # Last loan whose schedule still fits in this chunk
+        stop = max(int(np.searchsorted(ends, (ends[start - 1] if start else 0) + max_rows, side='right')), start + 1)
+        yield _schedule_chunk(df.iloc[start:stop], term[start:stop])
+        start = stop
+
+
+def _schedule_chunk(loans: pd.DataFrame, term: np.ndarray) -> pd.DataFrame:
+    """Schedule rows of a block of loans"""
+    principal = np.repeat(loans['loan_amount'].to_numpy(dtype='float64'), term)
+    payment = np.repeat(loans['installment'].to_numpy(dtype='float64'), term)
+    monthly_rate = np.repeat(loans['int_rate'].to_numpy(dtype='float64') / 12, term)
+    # Payment number 1..term of every row
+    first_row = np.repeat(np.cumsum(term) - term, term)
+    number = np.arange(term.sum()) - first_row + 1
+    last = number == np.repeat(term, term)
+
+    opening = remaining_balance(principal, monthly_rate, payment, number - 1)
+    closing = np.where(last, 0.0, remaining_balance(principal, monthly_rate, payment, number))
+    interest = opening * monthly_rate
+    principal_paid = opening - closing
+
+    issue_month = loans['issue_date'].to_numpy().astype('datetime64[M]')
+    schedule = {
+        'payment_number': number.astype(np.int16),
+        'payment_month': np.repeat(issue_month, term) + number.astype('timedelta64[M]'),
+        'payment': (interest + principal_paid).round(2),
+        'interest': interest.round(2),
+        'principal': principal_paid.round(2),
+        'balance': closing.round(2)
+    }
+    if 'id' in loans.columns:
+        schedule = {'id': np.repeat(loans['id'].to_numpy(), term), **schedule}
+    return pd.DataFrame(schedule)
@@ -0,0 +1,169 @@
+# src/checkpoint.py
+import functools
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import time
+import pandas as pd
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_BYTES = 2 * 1024**3
+FRAME_SUFFIX = '.feather'
+STATE_SUFFIX = '.state'
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def code_version() -> str:
+    """Hash of the pipeline source files; any code change invalidates the cache"""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(_SRC_DIR, '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CheckpointCache:
+    """Content-addressed cache of preprocessing step outputs.
+
+    The first key hashes the raw input bytes, the run parameters and the
+    source code; every step key chains the previous key with the step name
+    and its arguments. So a step's checkpoint is reused exactly when
+    everything it depends on is unchanged, and the first changed step (and
+    all after it) is recomputed. Frames are stored as Arrow IPC (Feather) for
+    fast, type-preserving reloads, next to a small pickle of the
+    preprocessor state. Least recently used entries are evicted once the
+    cache exceeds ``max_bytes``.
+
+    Writing a checkpoint after every step costs about as much as the steps
+    themselves, so the cache only pays off when runs repeat (it is opt-in in
+    main.py). It needs pyarrow for the Feather files.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _hash(*parts) -> str:
+        return hashlib.sha256(pickle.dumps(parts)).hexdigest()
+
+    def input_key(self, path: str, **params) -> str:
+        """Root key for a raw file plus the run parameters"""
+        return self._hash(file_digest(path), sorted(params.items()), code_version())
+
+    def step_key(self, previous_key: str, step: str, args: tuple, kwargs: Dict) -> str:
+        """Key of a step's output given the key of its input"""
+        return self._hash(previous_key, step, args, sorted(kwargs.items()))
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return base + FRAME_SUFFIX, base + STATE_SUFFIX
+
+    def load_state(self, key: str) -> Optional[Dict]:
+        """Stored state of a step, or None on a miss (marks the entry as used)"""
+        frame_path, state_path = self._paths(key)
+        if not (os.path.exists(frame_path) and os.path.exists(state_path)):
+            self.misses += 1
+            return None
+        try:
+            with open(state_path, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            self.misses += 1
+            return None
+        now = time.time()
+        for path in (frame_path, state_path):
+            os.utime(path, (now, now))
+        self.hits += 1
+        return state
+
+    def load_frame(self, key: str) -> pd.DataFrame:
+        """Stored output frame of a step"""
+        # Imported here: data_export depends on data_preprocessing, which uses this module
+        from .data_export import _require_pyarrow
+        _require_pyarrow()
+        from pyarrow import feather
+        frame_path, _ = self._paths(key)
+        logger.info(f"♻️ Loading checkpoint {key[:12]}")
+        return feather.read_table(frame_path).to_pandas()
+
+    def store(self, key: str, df: pd.DataFrame, state: Dict):
+        """Save a step's output frame and state, then evict down to the size limit"""
+        from .data_export import _require_pyarrow
+        pa = _require_pyarrow()
+        from pyarrow import feather
+        frame_path, state_path = self._paths(key)
+        # Write to temporary names first so an interrupted run leaves no half entry
+        feather.write_feather(pa.Table.from_pandas(df), frame_path + '.tmp', compression='lz4')
+        with open(state_path + '.tmp', 'wb') as f:
+            pickle.dump(state, f)
+        os.replace(frame_path + '.tmp', frame_path)
+        os.replace(state_path + '.tmp', state_path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in ``max_bytes``"""
+        entries = []
+        for state_path in glob.glob(os.path.join(self.directory, '*' + STATE_SUFFIX)):
+            frame_path = state_path[:-len(STATE_SUFFIX)] + FRAME_SUFFIX
+            size = sum(os.path.getsize(p) for p in (frame_path, state_path) if os.path.exists(p))
+            entries.append((os.path.getmtime(state_path), size, frame_path, state_path))
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, frame_path, state_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (frame_path, state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= size
+            logger.info(f"🗑️ Evicted checkpoint {os.path.basename(state_path)[:12]}")
+
+
+def checkpointed_stage(method):
+    """Reuse a LoanDataPreprocessor step's output from ``self.checkpoints``
+
+    On a hit the step is skipped: the preprocessor state is restored and the
+    stored frame is loaded only when ``self.df`` is next needed, so a run of
+    consecutive hits reads just the last checkpoint. On a miss the step runs
+    and its output is stored.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.checkpoints is None or self._checkpoint_key is None:
+            return method(self, *args, **kwargs)
+        key = self.checkpoints.step_key(self._checkpoint_key, method.__name__, args, kwargs)
+        state = self.checkpoints.load_state(key)
+        if state is not None:
+            with self.stage_metrics.stage(method.__name__, rows_in=state['rows_in']) as record:
+                self._restore_checkpoint_state(state)
+                self._pending_frame = functools.partial(self.checkpoints.load_frame, key)
+                record.update(rows_out=state['rows_out'], columns=state['columns'], checkpoint='hit')
+            self._checkpoint_key = key
+            logger.info(f"♻️ {method.__name__}: inputs unchanged, reusing checkpoint")
+            return self
+
+        result = method(self, *args, **kwargs)
+        record = self.stage_metrics.records[-1]
+        record['checkpoint'] = 'miss'
+        state = self._checkpoint_state()
+        state.update(rows_in=record['rows_in'], rows_out=record['rows_out'], columns=record['columns'])
+        self.checkpoints.store(key, self.df, state)
+        self._checkpoint_key = key
+        return result
+    return wrapper
@@ -0,0 +1,358 @@
+# src/chunked_preprocessing.py
+import logging
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Iterator
+from .data_preprocessing import (LoanDataPreprocessor, CATEGORICAL_COLUMNS, DATE_COLUMNS, DERIVED_FEATURES,
+                                 MISSING_DATE_VALUES, OUTLIER_COLUMNS, random_dates)
+from .date_parser import DateParser
+from .data_export import FrameWriter, link_or_copy
+from .outliers import IQR_MULTIPLIER
+from .imputation import mode_from_counts
+from .instrumentation import StageMetrics
+from .kpi_calculator import LoanKPICube
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def merge_value_counts(total: pd.Series, counts: pd.Series) -> pd.Series:
+    """Merge two value-count series (a mergeable, exact sketch of a column)"""
+    if total is None:
+        return counts
+    return total.add(counts, fill_value=0)
+
+
+def _value_at(sorted_counts: pd.Series, cumulative: np.ndarray, position: int):
+    """Return the value at a 0-based position of the expanded sorted column"""
+    return sorted_counts.index[np.searchsorted(cumulative, position, side='right')]
+
+
+def quantile_from_counts(counts: pd.Series, q: float) -> float:
+    """Exact linear-interpolated quantile, matching ``Series.quantile``"""
+    counts = counts.sort_index()
+    counts.index = counts.index.astype('float64')
+    cumulative = counts.cumsum().to_numpy()
+    n = int(cumulative[-1])
+    position = n * q - q
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n - 1)
+    a = _value_at(counts, cumulative, lower)
+    b = _value_at(counts, cumulative, upper)
+    # Same interpolation as numpy's linear method
+    t = position - lower
+    if t >= 0.5:
+        return b - (b - a) * (1 - t)
+    return a + (b - a) * t
+
+
+def median_from_counts(counts: pd.Series) -> float:
+    """Exact median, matching ``Series.median``"""
+    counts = counts.sort_index()
+    counts.index = counts.index.astype('float64')
+    cumulative = counts.cumsum().to_numpy()
+    n = int(cumulative[-1])
+    if n % 2:
+        return _value_at(counts, cumulative, n // 2)
+    return (_value_at(counts, cumulative, n // 2 - 1) + _value_at(counts, cumulative, n // 2)) / 2
+
+
+class ChunkedLoanDataPreprocessor:
+    """Streaming version of the LoanDataPreprocessor pipeline.
+
+    The raw CSV is read in chunks of ``chunksize`` rows and every chunk goes
+    through clean_column_names -> handle_missing_values -> convert_data_types
+    -> create_derived_features -> add_payment_metrics -> remove_outliers ->
+    optimize_dtypes before being appended to the output files and merged into
+    a KPI cube. Whole-dataset statistics are gathered in earlier passes as
+    merged value counts, so imputation medians/modes and IQR bounds are
+    exactly those of the in-memory path while peak memory stays bounded by
+    the chunk size plus the distinct values of the imputed/outlier columns
+    and the imputed dates below (8 bytes per missing date of the file).
+    So are the payment metrics' as-of date and the categories of every
+    categorical column, so all chunks share one schema.
+    Missing dates are drawn once after the schema pass, in the row order of
+    the whole file, and handed to each chunk, so seeded runs impute the same
+    dates as the in-memory path whatever the chunk size. They are held for
+    the whole run: the generator consumes a variable number of bits per
+    date, so one chunk's draws cannot be reached by skipping ahead.
+    """
+
+    def __init__(self, raw_file: str, chunksize: int = DEFAULT_CHUNK_SIZE,
+                 outlier_columns: List[str] = None, random_state=None,
+                 date_parser: DateParser = None, sequential_outliers: bool = True):
+        self.raw_file = raw_file
+        self.chunksize = chunksize
+        self.outlier_columns = OUTLIER_COLUMNS if outlier_columns is None else outlier_columns
+        self.sequential_outliers = sequential_outliers
+        # Seeded like the in-memory preprocessor; used once for all missing dates
+        self.rng = np.random.default_rng(random_state)
+        # Formats detected on the first chunk are reused by every later chunk
+        self.date_parser = date_parser or DateParser()
+        self.raw_names = {}
+        self.read_dtypes = {}
+        self.fill_values = {}
+        # Date column -> imputed dates of each chunk, in row order
+        self.date_draws = {}
+        self.outlier_bounds = {}
+        # Latest payment date and column -> categories of the whole output (see profile_output)
+        self.as_of = None
+        self.categories = {}
+        self.cube = None
+        self.preprocessing_log = []
+        self.summary = {}
+        self.stage_metrics = StageMetrics()
+        logger.info(f"🏗️ Initialized chunked preprocessor for {raw_file} ({chunksize} rows per chunk)")
+
+    def _read_chunks(self, columns: List[str] = None) -> Iterator[pd.DataFrame]:
+        """Yield raw chunks with standardized column names"""
+        usecols = [self.raw_names[col] for col in columns] if columns is not None else None
+        reader = pd.read_csv(self.raw_file, chunksize=self.chunksize, usecols=usecols,
+                             dtype=self.read_dtypes or None)
+        for chunk in reader:
+            chunk.columns = chunk.columns.str.strip().str.lower()
+            yield chunk
+
+    def scan_schema(self):
+        """Pass 1: merge per-chunk dtypes and find the columns that need filling"""
+        logger.info("🔍 Pass 1: Scanning schema...")
+        kinds = {}
+        needs_fill = set()
+        missing_dates = {}
+        total_rows = 0
+        reader = pd.read_csv(self.raw_file, chunksize=self.chunksize)
+        for chunk in reader:
+            raw_columns = list(chunk.columns)
+            chunk.columns = chunk.columns.str.strip().str.lower()
+            self.raw_names = dict(zip(chunk.columns, raw_columns))
+            total_rows += len(chunk)
+            for col in DATE_COLUMNS:
+                if col in chunk.columns:
+                    missing = (chunk[col].isnull() | chunk[col].isin(MISSING_DATE_VALUES)).to_numpy()
+                    missing_dates.setdefault(col, []).append(int(missing.sum()))
+            for col in chunk.columns:
+                dtype = chunk[col].dtype
+                if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                    kind = 'float' if pd.api.types.is_float_dtype(dtype) else 'int'
+                else:
+                    kind = 'str'
+                previous = kinds.get(col, kind)
+                # Same widening read_csv applies when it sees the whole column
+                kinds[col] = 'str' if 'str' in (previous, kind) else ('float' if 'float' in (previous, kind) else 'int')
+                if chunk[col].isnull().any() or (kind == 'str' and (chunk[col] == '').any()):
+                    needs_fill.add(col)
+
+        self.read_dtypes = {self.raw_names[col]: {'str': str, 'float': 'float64', 'int': 'int64'}[kind]
+                            for col, kind in kinds.items()}
+        self.column_kinds = kinds
+        self.columns_to_fill = [col for col in kinds if col in needs_fill and col not in DATE_COLUMNS]
+        self.total_rows = total_rows
+        self._draw_missing_dates(missing_dates)
+        logger.info(f"   ✅ {total_rows} records, {len(kinds)} columns, {len(self.columns_to_fill)} columns to fill")
+        self.preprocessing_log.append(f"Scanned schema: {total_rows} records in chunks of {self.chunksize}")
+        return self
+
+    def _draw_missing_dates(self, missing_dates: Dict[str, List[int]]):
+        """Draw every missing date as the in-memory path does, then split the draws by chunk
+
+        One draw per date column over the whole file, columns in DATE_COLUMNS
+        order: the same sequence handle_missing_values takes from a generator
+        with the same seed.
+        """
+        for col in DATE_COLUMNS:
+            counts = missing_dates.get(col, [])
+            if not sum(counts):
+                continue
+            dates = random_dates(self.rng, sum(counts))
+            offsets = np.cumsum([0] + counts)
+            self.date_draws[col] = [dates[offsets[i]:offsets[i + 1]] for i in range(len(counts))]
+            self.preprocessing_log.append(f"Generated {len(dates)} dates for {col}")
+
+    def compute_fill_values(self):
+        """Pass 2: exact global medians (numeric) and modes (categorical)"""
+        logger.info("📊 Pass 2: Computing imputation statistics...")
+        counts = {}
+        if self.columns_to_fill:
+            for chunk in self._read_chunks(self.columns_to_fill):
+                for col in self.columns_to_fill:
+                    counts[col] = merge_value_counts(counts.get(col), chunk[col].value_counts())
+
+        for col in self.columns_to_fill:
+            col_counts = counts.get(col)
+            if self.column_kinds[col] == 'str':
+                fill = mode_from_counts(col_counts) if col_counts is not None and len(col_counts) else 'Unknown'
+            else:
+                fill = median_from_counts(col_counts) if col_counts is not None and len(col_counts) else np.nan
+            self.fill_values[col] = fill
+            logger.info(f"   ✅ {col}: fill value {fill}")
+        self.preprocessing_log.append(f"Computed global fill values for {len(self.fill_values)} columns")
+        return self
+
+    def _transform_chunk(self, chunk: pd.DataFrame, position: int, outlier_columns: List[str]) -> LoanDataPreprocessor:
+        """Run the row-local steps on the chunk at ``position`` using the global statistics"""
+        preprocessor = LoanDataPreprocessor(chunk, copy=False, random_state=self.rng,
+                                           date_parser=self.date_parser)
+        fill_values = {**self.fill_values, **{col: draws[position] for col, draws in self.date_draws.items()}}
+        (preprocessor
+         .clean_column_names()
+         .handle_missing_values(fill_values=fill_values)
+         .convert_data_types()
+         .create_derived_features())
+        if outlier_columns:
+            preprocessor.remove_outliers(outlier_columns, bounds=self.outlier_bounds)
+        return preprocessor
+
+    def _bounds_from_counts(self, col: str, counts: pd.Series):
+        """Store the IQR bounds of one column from its merged value counts"""
+        if counts is None or not len(counts):
+            return
+        Q1 = quantile_from_counts(counts, 0.25)
+        Q3 = quantile_from_counts(counts, 0.75)
+        IQR = Q3 - Q1
+        self.outlier_bounds[col] = (Q1 - IQR_MULTIPLIER * IQR, Q3 + IQR_MULTIPLIER * IQR)
+        logger.info(f"   ✅ {col}: bounds {self.outlier_bounds[col]}")
+
+    def compute_outlier_bounds(self):
+        """Passes 3+: IQR bounds for the outlier columns
+
+        With sequential outliers (the in-memory default) the bounds of a
+        column are computed on data already filtered by the previous columns,
+        so one pass per outlier column keeps the result identical. Otherwise
+        all bounds come from the unfiltered data in a single pass.
+        """
+        raw_columns = set(self.raw_names)
+        if not self.sequential_outliers:
+            logger.info("📐 Pass 3: Computing IQR bounds...")
+            columns = self.outlier_columns if all(c in raw_columns for c in self.outlier_columns) else None
+            counts = {}
+            for position, chunk in enumerate(self._read_chunks(columns)):
+                data = self._transform_chunk(chunk, position, []).df
+                for col in self.outlier_columns:
+                    if col in data.columns:
+                        counts[col] = merge_value_counts(counts.get(col), data[col].value_counts())
+            for col in self.outlier_columns:
+                self._bounds_from_counts(col, counts.get(col))
+        else:
+            for position, col in enumerate(self.outlier_columns):
+                logger.info(f"📐 Pass {position + 3}: Computing IQR bounds for {col}...")
+                needed = self.outlier_columns[:position + 1]
+                columns = needed if all(c in raw_columns for c in needed) else None
+                counts = None
+                for chunk_position, chunk in enumerate(self._read_chunks(columns)):
+                    data = self._transform_chunk(chunk, chunk_position, self.outlier_columns[:position]).df
+                    if col in data.columns:
+                        counts = merge_value_counts(counts, data[col].value_counts())
+                self._bounds_from_counts(col, counts)
+        self.preprocessing_log.append(f"Computed global IQR bounds for {list(self.outlier_bounds)}")
+        return self
+
+    def _profile_columns(self) -> List[str]:
+        """Raw columns profile_output reads: the outlier, latest-payment and category sources"""
+        needed = set(self.outlier_columns) | {'last_payment_date'}
+        for col in CATEGORICAL_COLUMNS:
+            sources = [reads for reads, creates in DERIVED_FEATURES.values() if col in creates]
+            needed.update(sources[0] if sources else [col])
+        return [col for col in self.raw_names if col in needed]
+
+    def profile_output(self):
+        """Pass: latest payment date and categories of the output
+
+        add_payment_metrics measures every loan as of the latest
+        last_payment_date in the file (imputed dates included, before outlier
+        removal), and optimize_dtypes gives a categorical column the sorted
+        values left after outlier removal. Both are taken over the whole file
+        here and applied to every chunk of the final pass.
+        """
+        logger.info("🔎 Profiling output: latest payment date and categories...")
+        latest = None
+        values = {}
+        for position, chunk in enumerate(self._read_chunks(self._profile_columns())):
+            preprocessor = self._transform_chunk(chunk, position, [])
+            if 'last_payment_date' in preprocessor.df.columns:
+                chunk_latest = preprocessor.df['last_payment_date'].max()
+                if pd.notna(chunk_latest) and (latest is None or chunk_latest > latest):
+                    latest = chunk_latest
+            if self.outlier_columns:
+                preprocessor.remove_outliers(self.outlier_columns, bounds=self.outlier_bounds)
+            for col in CATEGORICAL_COLUMNS:
+                if col in preprocessor.df.columns:
+                    values.setdefault(col, set()).update(preprocessor.df[col].dropna().unique())
+        self.as_of = latest
+        self.categories = {col: sorted(col_values) for col, col_values in values.items()}
+        logger.info(f"   ✅ Payments as of {latest}, categories of {len(self.categories)} columns")
+        self.preprocessing_log.append(f"Payment metrics as of {latest}")
+        return self
+
+    def run(self, output_files: List[str], fmt: str = None):
+        """Run all passes and stream the processed chunks to ``output_files``
+
+        Chunks are written once, to the first file (format from ``fmt`` or its
+        extension); the other files are linked to it afterwards. The KPI cube
+        of the written rows is left in ``cube``.
+        """
+        with self.stage_metrics.stage('scan_schema') as record:
+            self.scan_schema()
+            record['rows_in'] = record['rows_out'] = self.total_rows
+        with self.stage_metrics.stage('compute_fill_values', rows_in=self.total_rows) as record:
+            self.compute_fill_values()
+            record['columns'] = list(self.fill_values)
+        with self.stage_metrics.stage('compute_outlier_bounds', rows_in=self.total_rows) as record:
+            self.compute_outlier_bounds()
+            record['columns'] = list(self.outlier_bounds)
+        with self.stage_metrics.stage('profile_output', rows_in=self.total_rows) as record:
+            self.profile_output()
+            record['columns'] = ['last_payment_date'] + list(self.categories)
+
+        logger.info("💾 Final pass: Processing and writing chunks...")
+        written = 0
+        chunk_count = 0
+        missing_values = None
+        data_types = {}
+        with self.stage_metrics.stage('write_chunks', rows_in=self.total_rows) as record:
+            with FrameWriter(output_files[0], fmt) as writer:
+                for position, chunk in enumerate(self._read_chunks()):
+                    preprocessor = self._transform_chunk(chunk, position, self.outlier_columns)
+                    (preprocessor
+                     .add_payment_metrics(as_of=self.as_of)
+                     .optimize_dtypes(categories=self.categories))
+                    data = preprocessor.df
+                    writer.write(data)
+                    with self.stage_metrics.stage('kpi_cube', rows_in=len(data)):
+                        chunk_cube = LoanKPICube.from_frame(data)
+                        self.cube = chunk_cube if self.cube is None else self.cube.merge(chunk_cube)
+                    # Per-chunk step timings, summed per step in the summary
+                    self.stage_metrics.extend(preprocessor.stage_metrics.records)
+                    chunk_missing = data.isnull().sum()
+                    missing_values = chunk_missing if missing_values is None else missing_values + chunk_missing
+                    data_types = {col: str(dtype) for col, dtype in data.dtypes.items()}
+                    written += len(data)
+                    chunk_count += 1
+            for path in output_files[1:]:
+                link_or_copy(output_files[0], path)
+            record['rows_out'] = written
+
+        logger.info(f"   📊 Total records: {self.total_rows} → {written}")
+        self.preprocessing_log.append(f"Removed {self.total_rows - written} outlier records")
+        self.preprocessing_log.append(f"Streamed {written} records in {chunk_count} chunks")
+        self.preprocessing_log.append(f"Date formats: {self.date_parser.column_formats}")
+        self.summary = {
+            'total_records': written,
+            'total_columns': len(data_types),
+            'data_types': data_types,
+            'missing_values': {col: int(count) for col, count in (missing_values if missing_values is not None else {}).items()}
+        }
+        return self
+
+    def get_preprocessing_summary(self) -> Dict:
+        """Get summary of preprocessing steps"""
+        return {
+            'total_records': self.summary.get('total_records', 0),
+            'total_columns': self.summary.get('total_columns', 0),
+            'processing_steps': self.preprocessing_log,
+            'data_types': self.summary.get('data_types', {}),
+            'missing_values': self.summary.get('missing_values', {}),
+            'fill_values': self.fill_values,
+            'outlier_bounds': self.outlier_bounds,
+            'stage_metrics': self.stage_metrics.aggregate()
+        }
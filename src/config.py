@@ -26,6 +26,16 @@ REQUIRED_COLUMNS = [
 GOOD_LOAN_STATUS = ['Fully Paid', 'Current']   
 BAD_LOAN_STATUS = ['Charged Off', 'Default']
 
+# Allowed ranges of rate columns (stored as fractions, e.g. 0.12 = 12%)
+VALUE_RANGES = {
+    'int_rate': (0.0, 0.5)
+}
+# Expected ranges that real books do exceed (a DTI above 100% is rare, not invalid):
+# values outside them are reported as warnings and do not fail validation
+WARNING_VALUE_RANGES = {
+    'dti': (0.0, 1.0)
+}
+
 # Date formats
 DATE_COLUMNS = ['issue_date', 'last_credit_pull_date', 'last_payment_date']
 DATE_FORMAT = '%d-%m-%Y'
@@ -0,0 +1,167 @@
+# src/data_export.py
+import os
+import shutil
+import pandas as pd
+from pathlib import Path
+from typing import List
+from .data_preprocessing import DATE_COLUMNS
+
+# Output formats and their file extensions
+OUTPUT_FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather'
+}
+DEFAULT_COMPRESSION = 'zstd'
+
+
+def _require_pyarrow():
+    """Import pyarrow lazily; only the columnar formats need it"""
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Parquet/Feather output requires pyarrow: pip install pyarrow") from e
+    return pa
+
+
+def infer_format(path: str) -> str:
+    """Output format from the file extension"""
+    suffix = Path(path).suffix.lower()
+    for fmt, extension in OUTPUT_FORMATS.items():
+        if suffix == extension:
+            return fmt
+    raise ValueError(f"Unknown output format for {path}; expected one of {list(OUTPUT_FORMATS.values())}")
+
+
+def output_path(path: str, fmt: str) -> str:
+    """Same path with the extension of ``fmt``"""
+    return str(Path(path).with_suffix(OUTPUT_FORMATS[fmt]))
+
+
+def temporary_path(path: str) -> str:
+    """Hidden name next to ``path`` to write to before it is moved into place"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f'.{name}.{os.getpid()}.tmp')
+
+
+class FrameWriter:
+    """Writes a DataFrame to CSV, Parquet or Arrow IPC (Feather), in one or more chunks
+
+    Parquet keeps categoricals dictionary-encoded and compresses every column;
+    Feather is the Arrow IPC file format, the fastest to reload locally. Both
+    keep datetimes, categoricals and downcast integers on reload.
+
+    Chunks go to a temporary file in the target's directory, and ``close()``
+    moves it onto ``path`` with one ``os.replace``. Readers therefore see the
+    old file or the complete new one, never a partial write. When the
+    ``with`` block fails, the temporary file is deleted and ``path`` is left
+    as it was.
+    """
+
+    def __init__(self, path: str, fmt: str = None, compression: str = DEFAULT_COMPRESSION):
+        self.path = str(path)
+        self.fmt = fmt or infer_format(self.path)
+        self.compression = compression
+        self.rows_written = 0
+        self._temp_path = temporary_path(self.path)
+        self._writer = None
+        self._schema = None
+
+    def write(self, df: pd.DataFrame):
+        """Append one frame (the first call fixes the header/schema)"""
+        if self.fmt == 'csv':
+            df.to_csv(self._temp_path, mode='w' if self._schema is None else 'a',
+                      header=self._schema is None, index=False)
+            self._schema = list(df.columns)
+        else:
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                if self.fmt == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self._temp_path, self._schema, compression=self.compression,
+                                                    use_dictionary=True)
+                else:
+                    options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                    self._writer = pa.ipc.new_file(self._temp_path, self._schema, options=options)
+            self._writer.write_table(table)
+        self.rows_written += len(df)
+        return self
+
+    def close(self):
+        """Finish the file and move it onto ``path``"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._temp_path):
+            os.replace(self._temp_path, self.path)
+
+    def discard(self):
+        """Drop what was written so far; ``path`` keeps its previous content"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def link_or_copy(source: str, target: str):
+    """Point ``target`` at the already written ``source`` (hard link, copy as fallback)
+
+    The link or copy is made under a temporary name and then moved onto
+    ``target``, so ``target`` is replaced in one step.
+    """
+    if os.path.abspath(source) == os.path.abspath(target):
+        return
+    temp_path = temporary_path(target)
+    if os.path.lexists(temp_path):
+        os.remove(temp_path)
+    try:
+        os.link(source, temp_path)
+    except OSError:
+        # Different drive/filesystem or links not supported
+        shutil.copyfile(source, temp_path)
+    os.replace(temp_path, target)
+
+
+def publish_frame(df: pd.DataFrame, paths: List[str], fmt: str = None,
+                  compression: str = DEFAULT_COMPRESSION) -> List[str]:
+    """Serialize ``df`` once to ``paths[0]`` and link the remaining targets to it
+
+    Every target is replaced in one step (see FrameWriter), and the other
+    paths are linked only once ``paths[0]`` is complete.
+    """
+    with FrameWriter(paths[0], fmt, compression) as writer:
+        writer.write(df)
+    for path in paths[1:]:
+        link_or_copy(paths[0], path)
+    return paths
+
+
+def read_frame(path: str, columns: List[str] = None) -> pd.DataFrame:
+    """Reload an exported frame with its column types
+
+    Parquet/Feather restore the stored types; for CSV the date columns are
+    parsed again since the text format does not carry them.
+    """
+    fmt = infer_format(path)
+    if fmt == 'parquet':
+        _require_pyarrow()
+        return pd.read_parquet(path, columns=columns)
+    if fmt == 'feather':
+        _require_pyarrow()
+        return pd.read_feather(path, columns=columns)
+
+    header = pd.read_csv(path, nrows=0).columns
+    date_columns = [col for col in DATE_COLUMNS if col in header and (columns is None or col in columns)]
+    return pd.read_csv(path, usecols=columns, parse_dates=date_columns)
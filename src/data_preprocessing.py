@@ -1,9 +1,18 @@
 # src/data_preprocessing.py - COMPLETELY FIXED VERSION
+import logging
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List
-import random
+from typing import Dict, List, Tuple
+from .date_parser import DateParser
+from .outliers import OutlierDetector
+from .amortization import PAYMENT_COLUMNS, payment_performance
+from .imputation import Imputer
+from .instrumentation import StageMetrics, instrumented_stage
+from .checkpoint import CheckpointCache, checkpointed_stage
+from .execution_plan import (ExecutionPlan, StepSpec, planned_stage, ROW_LOCAL, COLUMNWISE,
+                             ROW_FILTER, WHOLE_FRAME, PROJECTION)
+
+logger = logging.getLogger(__name__)
 
 # Define constants directly
 DATE_COLUMNS = ['issue_date', 'last_credit_pull_date', 'last_payment_date', 'next_payment_date']
@@ -11,22 +20,217 @@ DATE_FORMAT = '%d-%m-%Y'
 GOOD_LOAN_STATUS = ['Fully Paid', 'Current']
 BAD_LOAN_STATUS = ['Charged Off', 'Default']
 
+# Missing dates are imputed with random days in 2021
+MISSING_DATE_VALUES = ['', ' ', 'nan', 'NaT', 'None']
+IMPUTED_DATE_START = np.datetime64('2021-01-01', 'D')
+IMPUTED_DATE_DAYS = 365
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    'address_state', 'application_type', 'grade', 'sub_grade', 'home_ownership',
+    'purpose', 'term', 'emp_length', 'loan_status', 'verification_status',
+    'loan_category', 'issue_month_name'
+]
+# Integer columns and the type optimize_dtypes stores them in, fixed per
+# column so every batch gets the same schema whatever its values
+INTEGER_DTYPES = {
+    'issue_year': 'int16',
+    'issue_month': 'int8',
+    'total_acc': 'int16'
+}
+
+# pandas >= 3 always uses copy-on-write; 2.x only when the option is enabled
+COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+# Derived feature -> (columns it reads, columns it creates)
+DERIVED_FEATURES = {
+    'loan_category': (['loan_status'], ['loan_category']),
+    'issue_date_parts': (['issue_date'], ['issue_year', 'issue_month', 'issue_month_name']),
+    'income_bracket': (['annual_income'], ['income_bracket']),
+    'dti_category': (['dti'], ['dti_category'])
+}
+# Columns add_payment_metrics reads / remove_outliers filters on by default
+PAYMENT_INPUT_COLUMNS = ['loan_amount', 'installment', 'int_rate', 'term', 'total_payment',
+                         'issue_date', 'last_payment_date', 'loan_status']
+OUTLIER_COLUMNS = ['annual_income', 'loan_amount', 'dti']
+LOAN_CATEGORY_LABELS = np.array(['Bad Loan', 'Good Loan'], dtype=object)
+MONTH_NAMES = np.array(['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                        'August', 'September', 'October', 'November', 'December'], dtype=object)
+
+
+def random_dates(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Draw ``size`` random dates in 2021 with one call to ``rng``"""
+    offsets = rng.integers(0, IMPUTED_DATE_DAYS, size=size)
+    return (IMPUTED_DATE_START + offsets).astype('datetime64[ns]')
+
+
+def _labels(codes: np.ndarray, labels: np.ndarray, categorical: bool = False):
+    """``labels[codes]`` as text, or as the categorical ``astype('category')`` would give
+
+    The categorical keeps only the labels present, in sorted order, and is
+    built from the codes without creating a string per row.
+    """
+    if not categorical:
+        return labels[codes]
+    present = np.unique(codes)
+    order = np.argsort(labels[present])
+    remap = np.full(len(labels), -1, dtype=np.int64)
+    remap[present[order]] = np.arange(len(present))
+    return pd.Categorical.from_codes(remap[codes], categories=labels[present][order])
+
+
+def _plain_memory(values: pd.Series) -> int:
+    """``memory_usage(deep=True)`` of a fused column in its plain form (text per label x count, else int64)"""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return len(values) * np.dtype('int64').itemsize
+    labels = np.asarray(values.cat.categories, dtype=object)
+    codes = values.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    per_row = [pd.Series(labels[i:i + 1]).memory_usage(deep=True, index=False) for i in range(len(labels))]
+    return int(np.dot(counts, per_row)) if len(labels) else 0
+
+
+def _missing_value_reads(kwargs: Dict, needed: set) -> List[str]:
+    """Columns handle_missing_values needs besides the ones it fills
+
+    Group columns of the needed group fills, and every date column imputed
+    before a needed one: each draws from the shared generator in turn, so
+    skipping one would shift the dates drawn for the next.
+    """
+    group_by = kwargs.get('group_by') or {}
+    reads = [key for col in needed for key in group_by.get(col, [])]
+    dates = [position for position, col in enumerate(DATE_COLUMNS) if col in needed]
+    return reads + (DATE_COLUMNS[:max(dates) + 1] if dates else [])
+
+
+# What the lazy plan optimizer may assume about each step (see execution_plan)
+STEP_SPECS = {
+    'clean_column_names': StepSpec(COLUMNWISE),
+    'handle_missing_values': StepSpec(WHOLE_FRAME, reads=_missing_value_reads),
+    'convert_data_types': StepSpec(COLUMNWISE),
+    'create_derived_features': StepSpec(
+        ROW_LOCAL, features=DERIVED_FEATURES, prune_kwarg='features',
+        # Default categorical_columns include the text features
+        fuse_with={'optimize_dtypes': lambda kwargs: {'final_dtypes': True}
+                   if kwargs.get('categorical_columns') is None else None}),
+    'add_payment_metrics': StepSpec(
+        # With the default as_of (latest payment in the data) every row matters
+        lambda kwargs: ROW_LOCAL if kwargs.get('as_of') is not None else WHOLE_FRAME,
+        features={'payment_metrics': (PAYMENT_INPUT_COLUMNS, PAYMENT_COLUMNS)}),
+    'remove_outliers': StepSpec(ROW_FILTER, reads=lambda kwargs, needed: kwargs.get('columns') or OUTLIER_COLUMNS),
+    'optimize_dtypes': StepSpec(COLUMNWISE),
+    'select': StepSpec(PROJECTION)
+}
+
+
 class LoanDataPreprocessor:
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+    def __init__(self, df: pd.DataFrame, copy: bool = True, random_state=None,
+                 date_parser: DateParser = None, checkpoints: CheckpointCache = None,
+                 checkpoint_key: str = None, lazy: bool = False):
+        self._pending_frame = None
+        self._source_path = None
+        # Under copy-on-write a shallow copy already isolates the caller's
+        # frame: columns are only copied if a step writes to them in place
+        self.df = df.copy(deep=not COPY_ON_WRITE) if copy and df is not None else df
+        # Shared parser keeps detected date formats across runs/chunks
+        self.date_parser = date_parser or DateParser()
+        # Seed (or Generator) for date imputation; fixed seed -> reproducible runs
+        self.rng = np.random.default_rng(random_state)
         self.preprocessing_log = []
-        print(f"🏗️ Initialized preprocessor with {len(self.df)} records")
+        self.memory_report = {}
+        self.outlier_report = {}
+        # Columns create_derived_features created in their optimize_dtypes form (lazy fusion)
+        self._fused_columns = []
+        # Imputation values used, reusable for a later batch
+        self.fill_values = {}
+        self.stage_metrics = StageMetrics()
+        self._touched = []
+        # Step outputs are reused from ``checkpoints`` while the key chain matches
+        self.checkpoints = checkpoints
+        self._checkpoint_key = checkpoint_key
+        # Lazy mode: steps are queued here and run, optimized, by collect()
+        self._plan = [] if lazy else None
+        self._executing = False
+        if df is not None:
+            logger.info(f"🏗️ Initialized preprocessor with {len(self.df)} records")
     
+    @classmethod
+    def from_csv(cls, path: str, checkpoints: CheckpointCache = None, random_state=None, **kwargs):
+        """Preprocessor over a raw CSV that is read only if a step has to run
+
+        With ``checkpoints`` the cache key starts from the file's bytes and the
+        seed, so an unchanged file skips straight to the stored step outputs.
+        """
+        key = checkpoints.input_key(path, random_state=random_state, cls=cls.__name__) if checkpoints else None
+        preprocessor = cls(None, copy=False, random_state=random_state, checkpoints=checkpoints,
+                           checkpoint_key=key, **kwargs)
+        preprocessor._source_path = path
+        preprocessor._pending_frame = lambda: pd.read_csv(path)
+        logger.info(f"🏗️ Initialized preprocessor for {path}")
+        return preprocessor
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        """Working frame; a pending raw file or checkpoint is loaded on first access"""
+        if self._pending_frame is not None:
+            loader, self._pending_frame = self._pending_frame, None
+            self._df = loader()
+        return self._df
+    
+    @df.setter
+    def df(self, value: pd.DataFrame):
+        self._pending_frame = None
+        self._df = value
+    
+    def _checkpoint_state(self) -> Dict:
+        """Everything besides the frame that later steps and the summary depend on"""
+        return {
+            'preprocessing_log': list(self.preprocessing_log),
+            'memory_report': self.memory_report,
+            'outlier_report': self.outlier_report,
+            'fused_columns': list(self._fused_columns),
+            'fill_values': self.fill_values,
+            'rng_state': self.rng.bit_generator.state,
+            'format_hits': dict(self.date_parser.format_hits)
+        }
+    
+    def _restore_checkpoint_state(self, state: Dict):
+        """Inverse of _checkpoint_state"""
+        self.preprocessing_log = list(state['preprocessing_log'])
+        self.memory_report = state['memory_report']
+        self.outlier_report = state['outlier_report']
+        self._fused_columns = list(state['fused_columns'])
+        self.fill_values = state['fill_values']
+        self.rng.bit_generator.state = state['rng_state']
+        self.date_parser.format_hits = dict(state['format_hits'])
+    
+    def _touch(self, *columns: str):
+        """Mark columns as modified by the running stage (see stage_metrics)"""
+        self._touched.extend(columns)
+    
+    @planned_stage
+    @checkpointed_stage
+    @instrumented_stage
     def clean_column_names(self):
         """Standardize column names"""
-        print("🧹 Cleaning column names...")
+        logger.info("🧹 Cleaning column names...")
+        original = self.df.columns
         self.df.columns = self.df.columns.str.strip().str.lower()
+        self._touch(*[new for old, new in zip(original, self.df.columns) if old != new])
         self.preprocessing_log.append("Column names standardized")
         return self
     
-    def handle_missing_values(self):
-        """Handle missing values - FIXED VERSION"""
-        print("🔧 Handling missing values...")
+    @planned_stage
+    @checkpointed_stage
+    @instrumented_stage
+    def handle_missing_values(self, fill_values: Dict[str, object] = None,
+                              group_by: Dict[str, List[str]] = None):
+        """Handle missing values - FIXED VERSION
+
+        ``fill_values``: precomputed column -> fill (dates: one per missing row); ``group_by``: column -> group columns.
+        """
+        fill_values = fill_values or {}
+        logger.info("🔧 Handling missing values...")
         
         # Handle DATE columns by generating realistic dates
         date_columns = ['issue_date', 'last_credit_pull_date', 'last_payment_date', 'next_payment_date']
@@ -34,132 +238,77 @@ class LoanDataPreprocessor:
         for col in date_columns:
             if col in self.df.columns:
                 # Check what the actual values look like
-                print(f"   🔍 Checking {col} - sample values: {self.df[col].head().tolist()}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"   🔍 Checking {col} - sample values: {self.df[col].head().tolist()}")
                 
                 # Count missing/empty values more comprehensively
-                missing_mask = (
-                    self.df[col].isnull() | 
-                    (self.df[col] == '') | 
-                    (self.df[col] == ' ') |
-                    (self.df[col].astype(str) == 'nan') |
-                    (self.df[col].astype(str) == 'NaT') |
-                    (self.df[col].astype(str) == 'None')
-                )
+                missing_mask = (self.df[col].isnull() | self.df[col].isin(MISSING_DATE_VALUES)).to_numpy()
                 missing_count = missing_mask.sum()
                 
                 if missing_count > 0:
-                    print(f"   📅 {col}: Generating {missing_count} missing dates")
+                    logger.info(f"   📅 {col}: Generating {missing_count} missing dates")
                     
-                    # Generate random dates in 2021
-                    for idx in self.df[missing_mask].index:
-                        base_date = datetime(2021, 1, 1)
-                        random_days = random.randint(0, 364)
-                        random_date = base_date + timedelta(days=random_days)
-                        self.df.at[idx, col] = random_date.strftime('%d-%m-%Y')
+                    # Parse once, then write one vectorized draw of 2021 dates
+                    # straight into the datetime64 column
+                    if not pd.api.types.is_datetime64_any_dtype(self.df[col]):
+                        self._convert_date_column(col)
+                    values = self.df[col].to_numpy(dtype='datetime64[ns]', copy=True)
+                    values[missing_mask] = (fill_values[col] if col in fill_values
+                                            else self._random_dates(missing_count))
+                    self.df[col] = values
+                    self._touch(col)
                     
                     self.preprocessing_log.append(f"Generated {missing_count} dates for {col}")
                 else:
-                    print(f"   ✅ {col}: No missing values found")
+                    logger.info(f"   ✅ {col}: No missing values found")
         
-        # Handle NUMERICAL columns (excluding dates)
-        numerical_cols = self.df.select_dtypes(include=[np.number]).columns
-        for col in numerical_cols:
-            if self.df[col].isnull().any():
-                median_val = self.df[col].median()
-                missing_count = self.df[col].isnull().sum()
-                self.df[col].fillna(median_val, inplace=True)
-                print(f"   ✅ {col}: Filled {missing_count} missing values with median ({median_val})")
-                self.preprocessing_log.append(f"Filled missing {col} with median: {median_val}")
+        # Numeric and text columns: one missing mask per column, statistics
+        # computed together, every filled column assigned at once
+        imputer = Imputer(group_by, exclude=date_columns)
+        masks = imputer.missing_masks(self.df)
+        fills = {col: value for col, value in fill_values.items() if col in masks}
+        fills.update(imputer.fit(self.df, masks, [col for col in masks if col not in fills]))
+        self.df, counts = imputer.transform(self.df, fills, masks)
+        self._touch(*counts)
+        self.fill_values.update(fills)
         
-        # Handle CATEGORICAL columns (excluding dates)
-        categorical_cols = self.df.select_dtypes(include=['object']).columns
-        categorical_cols = [col for col in categorical_cols if col not in date_columns]
-        
-        for col in categorical_cols:
-            missing_count = self.df[col].isnull().sum() + (self.df[col] == '').sum()
-            if missing_count > 0:
-                mode_val = self.df[col].mode().iloc[0] if not self.df[col].mode().empty else 'Unknown'
-                self.df[col] = self.df[col].replace('', mode_val)
-                self.df[col].fillna(mode_val, inplace=True)
-                print(f"   ✅ {col}: Filled {missing_count} missing values with mode ({mode_val})")
-                self.preprocessing_log.append(f"Filled missing {col} with mode: {mode_val}")
+        for col, missing_count in counts.items():
+            statistic = 'median' if pd.api.types.is_numeric_dtype(self.df[col]) else 'mode'
+            logger.info(f"   ✅ {col}: Filled {missing_count} missing values with {statistic} ({fills[col]})")
+            self.preprocessing_log.append(f"Filled missing {col} with {statistic}: {fills[col]}")
         
         return self
     
+    def compute_fill_values(self, group_by: Dict[str, List[str]] = None) -> Dict[str, object]:
+        """Median (numeric) / mode (text) handle_missing_values would use per column"""
+        return Imputer(group_by, exclude=DATE_COLUMNS).fit(self.df)
+    
+    @planned_stage
+    @checkpointed_stage
+    @instrumented_stage
     def convert_data_types(self):
         """Convert columns to appropriate data types - FIXED VERSION"""
-        print("🔄 Converting data types...")
+        logger.info("🔄 Converting data types...")
         
-        # Convert dates with multiple format attempts
+        # Convert dates (format detected per column)
         date_columns = ['issue_date', 'last_credit_pull_date', 'last_payment_date', 'next_payment_date']
         
         for col in date_columns:
             if col in self.df.columns:
-                print(f"   📅 Converting {col}...")
-                
-                # Debug: Show sample values before conversion
-                sample_values = self.df[col].dropna().head(5).tolist()
-                print(f"      Sample values: {sample_values}")
+                logger.info(f"   📅 Converting {col}...")
                 
-                # Try multiple date formats
-                conversion_successful = False
-                
-                # Format 1: DD-MM-YYYY
-                try:
-                    self.df[col] = pd.to_datetime(self.df[col], format='%d-%m-%Y', errors='coerce')
+                if pd.api.types.is_datetime64_any_dtype(self.df[col]):
+                    # Already parsed while imputing missing dates
                     valid_dates = self.df[col].notna().sum()
-                    if valid_dates > 0:
-                        conversion_successful = True
-                        print(f"      ✅ DD-MM-YYYY format: {valid_dates}/{len(self.df)} dates converted")
-                except:
-                    pass
-                
-                # Format 2: MM/DD/YYYY  
-                if not conversion_successful:
-                    try:
-                        self.df[col] = pd.to_datetime(self.df[col], format='%m/%d/%Y', errors='coerce')
-                        valid_dates = self.df[col].notna().sum()
-                        if valid_dates > 0:
-                            conversion_successful = True
-                            print(f"      ✅ MM/DD/YYYY format: {valid_dates}/{len(self.df)} dates converted")
-                    except:
-                        pass
-                
-                # Format 3: YYYY-MM-DD
-                if not conversion_successful:
-                    try:
-                        self.df[col] = pd.to_datetime(self.df[col], format='%Y-%m-%d', errors='coerce')
-                        valid_dates = self.df[col].notna().sum()
-                        if valid_dates > 0:
-                            conversion_successful = True
-                            print(f"      ✅ YYYY-MM-DD format: {valid_dates}/{len(self.df)} dates converted")
-                    except:
-                        pass
-                
-                # Format 4: Auto-detect
-                if not conversion_successful:
-                    try:
-                        self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
-                        valid_dates = self.df[col].notna().sum()
-                        if valid_dates > 0:
-                            conversion_successful = True
-                            print(f"      ✅ Auto-detect format: {valid_dates}/{len(self.df)} dates converted")
-                    except:
-                        pass
-                
-                # If all formats failed, generate default dates
-                if not conversion_successful:
-                    print(f"      ⚠️ All date formats failed for {col}, generating default dates...")
-                    for idx in self.df.index:
-                        base_date = datetime(2021, 1, 1)
-                        random_days = random.randint(0, 364)
-                        random_date = base_date + timedelta(days=random_days)
-                        self.df.at[idx, col] = random_date
-                    valid_dates = len(self.df)
-                    print(f"      ✅ Generated {valid_dates} default dates")
+                    logger.info(f"      ✅ Already datetime: {valid_dates}/{len(self.df)} dates")
+                else:
+                    valid_dates = self._convert_date_column(col)
                 
                 self.preprocessing_log.append(f"Converted {col}: {valid_dates}/{len(self.df)} successful")
         
+        if self.date_parser.format_hits:
+            self.preprocessing_log.append(f"Date format hits: {self.date_parser.format_hits}")
+        
         # Convert numerical columns
         numerical_conversions = {
             'annual_income': 'float64',
@@ -179,118 +328,291 @@ class LoanDataPreprocessor:
                         self.df[col] = self.df[col].fillna(0).astype(dtype)
                     else:
                         self.df[col] = self.df[col].astype(dtype)
-                    print(f"   ✅ {col}: Converted to {dtype}")
+                    self._touch(col)
+                    logger.info(f"   ✅ {col}: Converted to {dtype}")
                     self.preprocessing_log.append(f"Converted {col} to {dtype}")
                 except Exception as e:
-                    print(f"   ❌ Error converting {col}: {e}")
+                    logger.error(f"   ❌ Error converting {col}: {e}")
         
         return self
     
-    def create_derived_features(self):
-        """Create new features - FIXED VERSION WITH ERROR HANDLING"""
-        print("🎯 Creating derived features...")
+    def _random_dates(self, size: int) -> np.ndarray:
+        """Draw ``size`` random dates in 2021 with one call to the seeded generator"""
+        return random_dates(self.rng, size)
+    
+    def _convert_date_column(self, col: str) -> int:
+        """Parse one date column in place, returning the number of valid dates"""
+        # Debug: Show sample values before conversion
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"      Sample values: {self.df[col].dropna().head(5).tolist()}")
+
+        # Detect the format from a sample, then parse each unique value once
+        parsed, fmt = self.date_parser.parse(self.df[col], col)
+        valid_dates = parsed.notna().sum()
+        conversion_successful = valid_dates > 0
+        if conversion_successful:
+            self.df[col] = parsed
+            logger.info(f"      ✅ {fmt} format: {valid_dates}/{len(self.df)} dates converted")
+
+        # If all formats failed, generate default dates
+        if not conversion_successful:
+            logger.warning(f"      ⚠️ All date formats failed for {col}, generating default dates...")
+            self.df[col] = self._random_dates(len(self.df))
+            valid_dates = len(self.df)
+            logger.info(f"      ✅ Generated {valid_dates} default dates")
+        self._touch(col)
+        
+        return valid_dates
+    
+    @planned_stage
+    @checkpointed_stage
+    @instrumented_stage
+    def create_derived_features(self, features: List[str] = None, final_dtypes: bool = False):
+        """Create new features - FIXED VERSION WITH ERROR HANDLING
+
+        ``features``: subset of DERIVED_FEATURES; ``final_dtypes``: create them in their optimized dtypes.
+        """
+        logger.info("🎯 Creating derived features...")
+        features = list(DERIVED_FEATURES) if features is None else features
         
         # Create loan classification
-        if 'loan_status' in self.df.columns:
-            self.df['loan_category'] = self.df['loan_status'].apply(
-                lambda x: 'Good Loan' if x in GOOD_LOAN_STATUS else 'Bad Loan'
-            )
-            print(f"   ✅ Loan categories: {self.df['loan_category'].value_counts().to_dict()}")
+        if 'loan_category' in features and 'loan_status' in self.df.columns:
+            is_good = self.df['loan_status'].isin(GOOD_LOAN_STATUS).to_numpy()
+            self.df['loan_category'] = _labels(is_good.astype(np.int8), LOAN_CATEGORY_LABELS, final_dtypes)
+            if final_dtypes:
+                self._fused_columns.append('loan_category')
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"   ✅ Loan categories: {self.df['loan_category'].value_counts().to_dict()}")
         
         # Extract date features with PROPER ERROR HANDLING
-        if 'issue_date' in self.df.columns:
+        if 'issue_date_parts' in features and 'issue_date' in self.df.columns:
             # Check if issue_date is actually datetime
-            if self.df['issue_date'].dtype == 'datetime64[ns]':
-                # Extract date components with NaN handling
-                self.df['issue_year'] = self.df['issue_date'].dt.year
-                self.df['issue_month'] = self.df['issue_date'].dt.month
-                self.df['issue_month_name'] = self.df['issue_date'].dt.month_name()
-                
-                # Handle any remaining NaN values by filling with defaults
-                self.df['issue_year'] = self.df['issue_year'].fillna(2021)
-                self.df['issue_month'] = self.df['issue_month'].fillna(1)
-                self.df['issue_month_name'] = self.df['issue_month_name'].fillna('January')
-                
-                # SAFE conversion to int64 after handling NaN
-                try:
-                    self.df['issue_year'] = self.df['issue_year'].astype('int64')
-                    self.df['issue_month'] = self.df['issue_month'].astype('int64')
-                    print(f"   ✅ Date features created successfully")
-                    print(f"      Years: {sorted(self.df['issue_year'].unique())}")
-                    print(f"      Months: {sorted(self.df['issue_month_name'].unique())}")
-                except Exception as e:
-                    print(f"   ⚠️ Error converting date features to int: {e}")
-                    # Keep as float if int conversion fails
-                    print(f"   ✅ Date features created as float type")
+            if pd.api.types.is_datetime64_any_dtype(self.df['issue_date']):
+                # Year/month straight to integers; only missing dates need the
+                # float -> fill -> int detour
+                year = self.df['issue_date'].dt.year
+                month = self.df['issue_date'].dt.month
+                if year.hasnans:
+                    year, month = year.fillna(2021), month.fillna(1)
+                year, month = year.astype('int64'), month.astype('int64')
+                if final_dtypes:
+                    year = year.astype(INTEGER_DTYPES['issue_year'])
+                    month = month.astype(INTEGER_DTYPES['issue_month'])
+                self.df['issue_year'] = year
+                self.df['issue_month'] = month
+                # Month names from a 12-entry table instead of one string per row
+                self.df['issue_month_name'] = _labels(month.to_numpy() - 1, MONTH_NAMES, final_dtypes)
+                if final_dtypes:
+                    self._fused_columns += ['issue_year', 'issue_month', 'issue_month_name']
+                logger.info(f"   ✅ Date features created successfully")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"      Years: {sorted(self.df['issue_year'].unique())}")
+                    logger.debug(f"      Months: {sorted(self.df['issue_month_name'].unique())}")
                 
                 self.preprocessing_log.append("Extracted date features from issue_date")
             else:
-                print(f"   ⚠️ issue_date is not datetime type: {self.df['issue_date'].dtype}")
+                logger.warning(f"   ⚠️ issue_date is not datetime type: {self.df['issue_date'].dtype}")
                 # Create default date features
                 self.df['issue_year'] = 2021
                 self.df['issue_month'] = 1
                 self.df['issue_month_name'] = 'January'
-                print(f"   ✅ Created default date features")
+                logger.info(f"   ✅ Created default date features")
         
         # Create income brackets
-        if 'annual_income' in self.df.columns:
+        if 'income_bracket' in features and 'annual_income' in self.df.columns:
             self.df['income_bracket'] = pd.cut(
                 self.df['annual_income'],
                 bins=[0, 30000, 50000, 75000, 100000, float('inf')],
                 labels=['<30K', '30-50K', '50-75K', '75-100K', '>100K'],
                 include_lowest=True
             )
-            print(f"   ✅ Income brackets created")
+            logger.info(f"   ✅ Income brackets created")
         
         # Create DTI risk categories
-        if 'dti' in self.df.columns:
+        if 'dti_category' in features and 'dti' in self.df.columns:
             self.df['dti_category'] = pd.cut(
                 self.df['dti'],
                 bins=[0, 0.1, 0.2, 0.3, float('inf')],
                 labels=['Low Risk', 'Medium Risk', 'High Risk', 'Very High Risk'],
                 include_lowest=True
             )
-            print(f"   ✅ DTI categories created")
+            logger.info(f"   ✅ DTI categories created")
         
-        self.preprocessing_log.append("Created all derived features")
+        if len(features) == len(DERIVED_FEATURES):
+            self.preprocessing_log.append("Created all derived features")
+        else:
+            self.preprocessing_log.append(f"Created derived features: {features}")
         return self
-    
-    def remove_outliers(self, columns: List[str] = None):
-        """Remove outliers using IQR method"""
+
+    @planned_stage
+    @checkpointed_stage
+    @instrumented_stage
+    def add_payment_metrics(self, as_of=None):
+        """Add scheduled payments, expected balance, shortfall, recovery rate and realized yield
+
+        Computed for all loans in one vectorized pass (see
+        amortization.payment_performance); ``as_of`` defaults to the latest
+        last_payment_date in the data.
+        """
+        logger.info("💳 Computing payment performance...")
+        missing = [col for col in PAYMENT_INPUT_COLUMNS if col not in self.df.columns]
+        if missing or not pd.api.types.is_datetime64_any_dtype(self.df['issue_date']):
+            logger.warning(f"   ⚠️ Skipping payment metrics: missing or unconverted columns {missing or ['issue_date']}")
+            return self
+
+        metrics = payment_performance(self.df, as_of)
+        self.df[PAYMENT_COLUMNS] = metrics
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"      Mean recovery rate: {metrics['recovery_rate'].mean():.3f}")
+            logger.debug(f"      Loans behind schedule: {int((metrics['payment_shortfall'] > 0).sum())}")
+        logger.info("   ✅ Payment metrics created")
+        self.preprocessing_log.append(f"Added payment metrics: {', '.join(PAYMENT_COLUMNS)}")
+        return self
+
+    @planned_stage
+    @checkpointed_stage
+    @instrumented_stage
+    def remove_outliers(self, columns: List[str] = None,
+                        bounds: Dict[str, Tuple[float, float]] = None,
+                        sequential: bool = True):
+        """Remove outliers using IQR method
+
+        ``bounds`` maps column -> (lower, upper); columns listed there use the
+        given bounds instead of quantiles of ``self.df`` (e.g. bounds from a
+        DataValidator report). With ``sequential=True`` each column's bounds
+        are computed on the rows kept by the previous columns; with False all
+        bounds come from the unfiltered data, independent of column order.
+        The combined mask is applied to the frame once.
+        """
         if columns is None:
-            columns = ['annual_income', 'loan_amount', 'dti']
+            columns = OUTLIER_COLUMNS
         
-        print(f"🎯 Removing outliers from: {columns}")
+        logger.info(f"🎯 Removing outliers from: {columns}")
         initial_count = len(self.df)
         
-        for col in columns:
-            if col in self.df.columns:
-                Q1 = self.df[col].quantile(0.25)
-                Q3 = self.df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                
-                outlier_count = ((self.df[col] < lower_bound) | (self.df[col] > upper_bound)).sum()
-                self.df = self.df[(self.df[col] >= lower_bound) & (self.df[col] <= upper_bound)]
-                print(f"   ✅ {col}: Removed {outlier_count} outliers")
+        keep, report = OutlierDetector(columns).detect(self.df, bounds=bounds, sequential=sequential)
+        for col, stats in report.items():
+            logger.info(f"   ✅ {col}: Removed {stats['count']} outliers")
+        self._touch(*report)
+        self.df = self.df[keep]
+        self.outlier_report = report
         
         final_count = len(self.df)
-        print(f"   📊 Total records: {initial_count} → {final_count}")
+        logger.info(f"   📊 Total records: {initial_count} → {final_count}")
         self.preprocessing_log.append(f"Removed {initial_count - final_count} outlier records")
         
         return self
     
+    @planned_stage
+    @checkpointed_stage
+    @instrumented_stage
+    def optimize_dtypes(self, categorical_columns: List[str] = None, categories: Dict[str, List] = None):
+        """Apply the per-column dtype plan (categoricals, INTEGER_DTYPES) and record memory before/after
+
+        ``categories`` fixes the categories of some columns (e.g. the whole file's, for one chunk).
+        """
+        if categorical_columns is None:
+            categorical_columns = CATEGORICAL_COLUMNS
+        
+        logger.info("🗜️ Optimizing data types...")
+        before = self.df.memory_usage(deep=True)
+        fused = [col for col in self._fused_columns if col in self.df.columns]
+        for col in fused:
+            before[col] = _plain_memory(self.df[col])
+        
+        dtype_plan = {}
+        for col in categorical_columns:
+            if col in fused:
+                dtype_plan[col] = self.df[col].dtype
+            elif col in self.df.columns and not isinstance(self.df[col].dtype, pd.CategoricalDtype):
+                dtype_plan[col] = (pd.CategoricalDtype(categories[col]) if categories and col in categories
+                                   else 'category')
+        
+        for col, dtype in INTEGER_DTYPES.items():
+            if col in fused:
+                dtype_plan[col] = self.df[col].dtype
+                continue
+            if col not in self.df.columns or self.df[col].dtype == dtype:
+                continue
+            values = self.df[col]
+            info = np.iinfo(dtype)
+            if not pd.api.types.is_integer_dtype(values) or values.min() < info.min or values.max() > info.max:
+                logger.warning(f"   ⚠️ {col}: values don't fit {dtype}, keeping {values.dtype}")
+                continue
+            dtype_plan[col] = np.dtype(dtype)
+        
+        self.df = self.df.astype(dtype_plan)
+        self._fused_columns = []
+        after = self.df.memory_usage(deep=True)
+        
+        self.memory_report = {
+            'before_bytes': int(before.sum()),
+            'after_bytes': int(after.sum()),
+            'reduction_factor': round(before.sum() / after.sum(), 2) if after.sum() else None,
+            'dtype_plan': {col: str(dtype) for col, dtype in dtype_plan.items()}
+        }
+        logger.info(f"   ✅ Memory: {before.sum() / 1e6:.1f} MB → {after.sum() / 1e6:.1f} MB "
+              f"({len(dtype_plan)} columns converted)")
+        self.preprocessing_log.append(f"Optimized dtypes for {len(dtype_plan)} columns: "
+                                      f"{before.sum()} → {after.sum()} bytes")
+        return self
+    
+    @planned_stage
+    @checkpointed_stage
+    @instrumented_stage
+    def select(self, columns: List[str]):
+        """Keep only ``columns``; in lazy mode the plan skips work they don't need"""
+        self.df = self.df[[col for col in columns if col in self.df.columns]]
+        self.preprocessing_log.append(f"Selected {len(self.df.columns)} columns")
+        return self
+    
+    def explain(self) -> str:
+        """Queued (lazy) steps and the optimized plan collect() will run"""
+        return ExecutionPlan(self._plan or [], STEP_SPECS).explain()
+    
+    def collect(self):
+        """Run the queued lazy steps as optimized by ExecutionPlan (no-op when eager)"""
+        if not self._plan:
+            return self
+        plan = ExecutionPlan(self._plan, STEP_SPECS)
+        steps = plan.optimize()
+        if plan.load_columns is not None:
+            self._project_input(plan.load_columns, normalize=self._plan[0].name == 'clean_column_names')
+        self._plan = []
+        self._executing = True
+        try:
+            for step in steps:
+                getattr(self, step.name)(**step.kwargs)
+        finally:
+            self._executing = False
+        self.preprocessing_log += [f"Plan: {note}" for note in plan.notes]
+        return self
+    
+    def _project_input(self, columns: set, normalize: bool):
+        """Keep only the input columns the plan uses (unread CSV columns are not parsed)"""
+        name = (lambda col: str(col).strip().lower()) if normalize else str
+        if self._source_path is not None and self._pending_frame is not None:
+            path = self._source_path
+            self._pending_frame = lambda: pd.read_csv(path, usecols=lambda col: name(col) in columns)
+        else:
+            self.df = self.df[[col for col in self.df.columns if name(col) in columns]]
+        if self.checkpoints is not None and self._checkpoint_key is not None:
+            self._checkpoint_key = self.checkpoints.step_key(self._checkpoint_key, 'load', (sorted(columns),), {})
+    
     def get_preprocessing_summary(self) -> Dict:
         """Get summary of preprocessing steps"""
+        self.collect()
         return {
             'total_records': len(self.df),
             'total_columns': len(self.df.columns),
             'processing_steps': self.preprocessing_log,
             'data_types': {col: str(dtype) for col, dtype in self.df.dtypes.items()},
-            'missing_values': {col: int(count) for col, count in self.df.isnull().sum().items()}
+            'missing_values': {col: int(count) for col, count in self.df.isnull().sum().items()},
+            'memory_usage': self.memory_report,
+            'fill_values': self.fill_values,
+            'stage_metrics': self.stage_metrics.aggregate()
         }
     
     def get_clean_data(self) -> pd.DataFrame:
-        """Return the cleaned dataframe"""
-        return self.df
+        """Return the cleaned dataframe (running the plan first in lazy mode)"""
+        return self.collect().df
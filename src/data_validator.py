@@ -1,8 +1,205 @@
 # src/data_validator.py
+import io
+import os
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
-from .config import REQUIRED_COLUMNS, GOOD_LOAN_STATUS, BAD_LOAN_STATUS
+from statistics import NormalDist
+from typing import Iterable, List, Dict, Tuple
+from .config import REQUIRED_COLUMNS, GOOD_LOAN_STATUS, BAD_LOAN_STATUS, VALUE_RANGES, WARNING_VALUE_RANGES
+from .outliers import OutlierDetector
+from .date_parser import DateParser
+from .data_preprocessing import DATE_COLUMNS, MISSING_DATE_VALUES
+
+ALLOWED_LOAN_STATUS = GOOD_LOAN_STATUS + BAD_LOAN_STATUS
+VALIDATION_MODES = ['full', 'sample', 'fail_fast']
+DEFAULT_VALIDATION_CHUNK = 100_000
+MAX_EXAMPLES = 5
+ERROR = 'error'
+WARNING = 'warning'
+
+
+class DataValidationError(ValueError):
+    """Raised when data breaks a hard validation rule; ``report`` has the details"""
+
+    def __init__(self, message: str, report: Dict):
+        super().__init__(message)
+        self.report = report
+
+
+def sample_size(population: int, confidence: float = 0.95, margin: float = 0.01) -> int:
+    """Rows needed to estimate a violation rate within ``margin`` at ``confidence``
+
+    Cochran's formula for a proportion (worst case p = 0.5) with the finite
+    population correction: about 9,600 rows at 95% / ±1% for any large file.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    n0 = z ** 2 * 0.25 / margin ** 2
+    return int(min(population, np.ceil(n0 / (1 + (n0 - 1) / population)))) if population else 0
+
+
+def _rule_result(checked: int, bad: pd.Series, severity: str = ERROR) -> Dict:
+    return {
+        'checked': int(checked),
+        'violations': int(len(bad)),
+        'examples': [str(value) for value in pd.unique(bad)[:MAX_EXAMPLES]],
+        'severity': severity
+    }
+
+
+def _hard_violations(rules: Dict[str, Dict]) -> bool:
+    return any(result['violations'] and result['severity'] == ERROR for result in rules.values())
+
+
+def check_rules(df: pd.DataFrame, date_parser: DateParser = None) -> Dict[str, Dict]:
+    """Rule violation counts for one frame (or chunk)
+
+    Missing values are not violations here (they are imputed later and
+    counted by check_missing_values). Column names are matched after the
+    same strip/lower-casing the preprocessor applies. Ranges from
+    WARNING_VALUE_RANGES are checked too, with severity ``warning``.
+    """
+    date_parser = date_parser or DateParser()
+    df = df.rename(columns=lambda col: str(col).strip().lower())
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    rules = {'required_columns': {'checked': len(REQUIRED_COLUMNS), 'violations': len(missing_columns),
+                                  'examples': missing_columns[:MAX_EXAMPLES], 'severity': ERROR}}
+
+    if 'loan_status' in df.columns:
+        status = df['loan_status'].dropna()
+        rules['loan_status_allowed'] = _rule_result(len(status), status[~status.isin(ALLOWED_LOAN_STATUS)])
+
+    ranges = [(col, bounds, ERROR) for col, bounds in VALUE_RANGES.items()]
+    ranges += [(col, bounds, WARNING) for col, bounds in WARNING_VALUE_RANGES.items()]
+    for col, (lower, upper), severity in ranges:
+        if col not in df.columns:
+            continue
+        raw = df[col].dropna()
+        values = pd.to_numeric(raw, errors='coerce')
+        # Non-numeric text counts as out of range
+        rules[f'{col}_range'] = _rule_result(len(raw), raw[values.isna() | (values < lower) | (values > upper)],
+                                             severity)
+
+    for col in DATE_COLUMNS:
+        if col not in df.columns or pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        present = df[col][df[col].notna() & ~df[col].isin(MISSING_DATE_VALUES)]
+        parsed, _ = date_parser.parse(present, col)
+        rules[f'{col}_parseable'] = _rule_result(len(present), present[parsed.isna()])
+    return rules
+
+
+def merge_rule_results(total: Dict[str, Dict], part: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Add the rule counts of another chunk"""
+    for rule, result in part.items():
+        if rule not in total:
+            total[rule] = dict(result, examples=list(result['examples']))
+            continue
+        if rule == 'required_columns':
+            continue
+        total[rule]['checked'] += result['checked']
+        total[rule]['violations'] += result['violations']
+        examples = total[rule]['examples']
+        examples += [value for value in result['examples'] if value not in examples][:MAX_EXAMPLES - len(examples)]
+    return total
+
+
+def _rules_report(mode: str, rules: Dict[str, Dict], rows_checked: int, rows_total: int,
+                  stopped_at_row: int = None) -> Dict:
+    for result in rules.values():
+        result['violation_rate'] = result['violations'] / result['checked'] if result['checked'] else 0.0
+    return {
+        'mode': mode,
+        'passed': not _hard_violations(rules),
+        'warnings': [rule for rule, result in rules.items() if result['violations'] and result['severity'] == WARNING],
+        'rows_checked': rows_checked,
+        'rows_total': rows_total,
+        'stopped_at_row': stopped_at_row,
+        'rules': rules
+    }
+
+
+def _check_chunks(chunks: Iterable[pd.DataFrame], fail_fast: bool, mode: str, rows_total: int = None) -> Dict:
+    """Run the rules chunk by chunk, optionally stopping at the first chunk breaking a hard rule"""
+    date_parser = DateParser()
+    rules = {}
+    rows_checked = 0
+    for chunk in chunks:
+        chunk_rules = check_rules(chunk, date_parser)
+        merge_rule_results(rules, chunk_rules)
+        rows_checked += len(chunk)
+        if fail_fast and _hard_violations(chunk_rules):
+            return _rules_report(mode, rules, rows_checked, rows_total, stopped_at_row=rows_checked - len(chunk))
+    return _rules_report(mode, rules, rows_checked, rows_checked if rows_total is None else rows_total)
+
+
+def _count_rows(path: str, block_size: int = 1 << 24) -> int:
+    """Data rows of a CSV file (newlines minus the header), without parsing it"""
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return lines + (last != b'\n') - 1
+
+
+def _sample_csv(path: str, confidence: float, margin: float, rng: np.random.Generator,
+                block_size: int = 1 << 24) -> Tuple[pd.DataFrame, int]:
+    """Uniform random sample of a CSV's rows in one pass, and its row count
+
+    Lines are read as bytes and only the sampled ones are parsed. Every line
+    gets a random key and the lines with the smallest keys are kept (a
+    bottom-k sample): first as many as an unbounded file would need, then,
+    once the row count is known, as many as ``sample_size()`` asks for.
+    """
+    limit = sample_size(np.inf, confidence, margin)
+    lines, keys, rows_total = [], np.empty(0), 0
+    with open(path, 'rb') as f:
+        header = f.readline()
+        for block in iter(lambda: f.readlines(block_size), []):
+            rows_total += len(block)
+            lines += block
+            keys = np.concatenate([keys, rng.random(len(block))])
+            if len(keys) > limit:
+                keep = np.sort(np.argpartition(keys, limit - 1)[:limit])
+                lines, keys = [lines[i] for i in keep], keys[keep]
+    keep = np.sort(np.argsort(keys, kind='stable')[:sample_size(rows_total, confidence, margin)])
+    # The last line may lack its newline; it can land anywhere in the sample
+    rows = b''.join(line if line.endswith(b'\n') else line + b'\n' for line in (lines[i] for i in keep))
+    return pd.read_csv(io.BytesIO(header + rows), dtype=str), rows_total
+
+
+def validate_csv(path: str, mode: str = 'fail_fast', chunksize: int = DEFAULT_VALIDATION_CHUNK,
+                 confidence: float = 0.95, margin: float = 0.01, random_state=None,
+                 raise_on_error: bool = True) -> Dict:
+    """Check the hard rules on a raw CSV before preprocessing it
+
+    ``fail_fast`` streams the file in chunks and stops at the first chunk
+    that breaks a hard rule, ``full`` streams every chunk, and ``sample``
+    checks only a random sample of rows sized by ``sample_size()``, drawn
+    while reading the file once. Raises DataValidationError on a hard-rule
+    violation unless ``raise_on_error`` is False; warning rules are listed
+    in the report's ``warnings``.
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode {mode!r}; expected one of {VALIDATION_MODES}")
+    # Read everything as text so malformed numbers show up as violations
+    if mode == 'sample':
+        sample, rows_total = _sample_csv(path, confidence, margin, np.random.default_rng(random_state))
+        report = _check_chunks([sample], fail_fast=False, mode=mode, rows_total=rows_total)
+        report['confidence'], report['margin'] = confidence, margin
+    else:
+        chunks = pd.read_csv(path, dtype=str, chunksize=chunksize)
+        report = _check_chunks(chunks, fail_fast=mode == 'fail_fast', mode=mode)
+        if report['rows_total'] is None:
+            # Stopped early: count the rest without parsing it
+            report['rows_total'] = _count_rows(path)
+
+    if raise_on_error and not report['passed']:
+        failed = [rule for rule, result in report['rules'].items() if result['violations']]
+        raise DataValidationError(f"{os.path.basename(path)} failed validation rules: {failed}", report)
+    return report
+
 
 class DataValidator:
     def __init__(self, df: pd.DataFrame):
@@ -27,33 +224,68 @@ class DataValidator:
         self.validation_report['data_types'] = data_types
         return data_types
     
-    def check_outliers(self, columns: List[str]) -> Dict[str, Dict]:
-        """Detect outliers using IQR method"""
-        outliers = {}
-        for col in columns:
-            if col in self.df.columns and pd.api.types.is_numeric_dtype(self.df[col]):
-                Q1 = self.df[col].quantile(0.25)
-                Q3 = self.df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                
-                outlier_mask = (self.df[col] < lower_bound) | (self.df[col] > upper_bound)
-                outliers[col] = {
-                    'count': outlier_mask.sum(),
-                    'percentage': (outlier_mask.sum() / len(self.df)) * 100,
-                    'lower_bound': lower_bound,
-                    'upper_bound': upper_bound
-                }
-        
+    def check_outliers(self, columns: List[str],
+                       bounds: Dict[str, Tuple[float, float]] = None) -> Dict[str, Dict]:
+        """Detect outliers using IQR method
+
+        All bounds come from one quantile call on the whole frame; pass
+        ``bounds`` to reuse ones already computed on it
+        (``OutlierDetector(columns).compute_bounds(df)``). The preprocessor's
+        ``outlier_report`` holds sequential bounds, which differ from these.
+        """
+        _, outliers = OutlierDetector(columns).detect(self.df, bounds=bounds)
         self.validation_report['outliers'] = outliers
         return outliers
     
-    def generate_report(self) -> Dict:
-        """Generate comprehensive validation report"""
+    def _sample(self, confidence: float, margin: float, random_state=None) -> pd.DataFrame:
+        """Random rows, as many as ``sample_size()`` asks for"""
+        n = sample_size(len(self.df), confidence, margin)
+        return self.df.sample(n=n, random_state=random_state) if n < len(self.df) else self.df
+    
+    def check_rules(self, mode: str = 'full', chunksize: int = DEFAULT_VALIDATION_CHUNK,
+                    confidence: float = 0.95, margin: float = 0.01, random_state=None) -> Dict:
+        """Check loan_status values, int_rate (dti: warning) ranges and date parseability
+
+        ``full`` checks every row, ``sample`` a random sample sized by
+        ``sample_size()``, ``fail_fast`` walks the frame in chunks and stops
+        at the first chunk that breaks a rule.
+        """
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f"Unknown validation mode {mode!r}; expected one of {VALIDATION_MODES}")
+        if mode == 'sample':
+            report = _check_chunks([self._sample(confidence, margin, random_state)], fail_fast=False,
+                                   mode=mode, rows_total=len(self.df))
+            report['confidence'], report['margin'] = confidence, margin
+        elif mode == 'fail_fast':
+            chunks = (self.df.iloc[start:start + chunksize] for start in range(0, len(self.df), chunksize))
+            report = _check_chunks(chunks, fail_fast=True, mode=mode, rows_total=len(self.df))
+        else:
+            report = _check_chunks([self.df], fail_fast=False, mode=mode)
+        self.validation_report['rules'] = report
+        return report
+    
+    def generate_report(self, outlier_bounds: Dict[str, Tuple[float, float]] = None,
+                        mode: str = 'full', chunksize: int = DEFAULT_VALIDATION_CHUNK,
+                        confidence: float = 0.95, margin: float = 0.01, random_state=None) -> Dict:
+        """Generate comprehensive validation report
+
+        In ``sample`` mode every check runs on one random sample; in
+        ``fail_fast`` mode the remaining checks are skipped once a rule fails.
+        """
+        if mode == 'sample':
+            sample_validator = DataValidator(self._sample(confidence, margin, random_state))
+            self.validation_report = sample_validator.generate_report(outlier_bounds)
+            self.validation_report['rules'].update(mode=mode, rows_total=len(self.df),
+                                                   confidence=confidence, margin=margin)
+            return self.validation_report
+        
+        rules = self.check_rules(mode, chunksize=chunksize)
+        if mode == 'fail_fast' and not rules['passed']:
+            return self.validation_report
+        
         self.check_missing_columns()
         self.check_missing_values()
         self.check_data_types()
-        self.check_outliers(['annual_income', 'loan_amount', 'int_rate', 'dti'])
+        self.check_outliers(['annual_income', 'loan_amount', 'int_rate', 'dti'], bounds=outlier_bounds)
         
         return self.validation_report
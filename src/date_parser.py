@@ -0,0 +1,104 @@
+# src/date_parser.py
+import json
+import os
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Formats tried during detection, in order of preference on ties
+CANDIDATE_DATE_FORMATS = ['%d-%m-%Y', '%m/%d/%Y', '%Y-%m-%d']
+AUTO_FORMAT = 'auto'
+
+
+class DateParser:
+    """Single-pass date parser with per-column format detection.
+
+    The format of a column is detected from a sample of its unique values,
+    then every unique string is parsed exactly once with that explicit format
+    and the result is broadcast back to the rows. Detected formats are kept
+    per column (and in ``cache_file`` when given) so later runs and later
+    chunks skip detection, and parse hits are counted per format.
+    """
+
+    def __init__(self, formats: List[str] = None, cache_file: str = None, sample_size: int = 1000,
+                 column_formats: Dict[str, str] = None, detect: bool = True):
+        self.formats = formats or CANDIDATE_DATE_FORMATS
+        self.cache_file = cache_file
+        self.sample_size = sample_size
+        # detect=False always uses the known column formats (parallel workers)
+        self.detect = detect
+        self.column_formats = self._load_cache()
+        self.column_formats.update(column_formats or {})
+        self.format_hits = {}
+
+    def _load_cache(self) -> Dict[str, str]:
+        """Load remembered column formats from the cache file"""
+        if self.cache_file and os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+
+    def save_cache(self):
+        """Persist the detected column formats"""
+        if self.cache_file:
+            with open(self.cache_file, 'w') as f:
+                json.dump(self.column_formats, f, indent=2)
+
+    @staticmethod
+    def _count_parsed(values: np.ndarray, fmt: str) -> int:
+        """Number of values that parse with ``fmt``"""
+        return int(pd.to_datetime(values, format=fmt, errors='coerce').notna().sum())
+
+    def detect_format(self, uniques: np.ndarray, col: str = None) -> Optional[str]:
+        """Pick the format that parses most of a sample of unique values
+
+        A format remembered for ``col`` is reused as long as it parses the
+        whole sample. Returns None when no candidate parses anything.
+        """
+        cached = self.column_formats.get(col)
+        if cached and (not self.detect or len(uniques) == 0):
+            return None if cached == AUTO_FORMAT else cached
+
+        sample = uniques[:self.sample_size]
+        if len(sample) == 0:
+            return None
+        if cached and cached != AUTO_FORMAT and self._count_parsed(sample, cached) == len(sample):
+            return cached
+
+        best_format, best_hits = None, 0
+        for fmt in self.formats:
+            hits = self._count_parsed(sample, fmt)
+            if hits > best_hits:
+                best_format, best_hits = fmt, hits
+            if hits == len(sample):
+                break
+        return best_format
+
+    def parse(self, values: pd.Series, col: str = None) -> Tuple[pd.Series, str]:
+        """Parse a column once per unique string; returns (datetime64[ns] series, format used)"""
+        codes, uniques = pd.factorize(values.astype(object), use_na_sentinel=True)
+        uniques = np.asarray(uniques, dtype=object)
+
+        fmt = self.detect_format(uniques, col)
+        if fmt is None:
+            # No candidate matched: let pandas infer the format
+            parsed_uniques = pd.to_datetime(uniques, errors='coerce')
+            fmt = AUTO_FORMAT
+        else:
+            parsed_uniques = pd.to_datetime(uniques, format=fmt, errors='coerce')
+
+        parsed_uniques = np.asarray(parsed_uniques, dtype='datetime64[ns]')
+        result = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[ns]')
+        present = codes >= 0
+        result[present] = parsed_uniques[codes[present]]
+        parsed = pd.Series(result, index=values.index, name=values.name)
+
+        hits = int(parsed.notna().sum())
+        if hits > 0 and col is not None and self.column_formats.get(col) != fmt:
+            self.column_formats[col] = fmt
+            self.save_cache()
+        self.format_hits[fmt] = self.format_hits.get(fmt, 0) + hits
+        return parsed, fmt
@@ -0,0 +1,187 @@
+# src/execution_plan.py
+import functools
+import inspect
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Step kinds, from most to least freedom the optimizer has with them
+ROW_LOCAL = 'row_local'      # each row computed from that row alone
+COLUMNWISE = 'columnwise'    # each column on its own, but may use all its rows
+ROW_FILTER = 'row_filter'    # drops rows
+WHOLE_FRAME = 'whole_frame'  # depends on every row and column it reads
+PROJECTION = 'projection'    # keeps only some columns
+BARRIER = 'barrier'          # unknown effects; nothing moves across it
+
+
+class PlanStep(NamedTuple):
+    name: str
+    kwargs: Dict
+    note: str = ''
+
+
+class StepSpec(NamedTuple):
+    """What the optimizer may assume about one preprocessing step
+
+    ``kind``, ``reads`` and ``writes`` may be callables of the step's kwargs
+    (``reads`` also gets the columns needed downstream). ``writes`` None means
+    every column. ``features`` maps output group -> (reads, creates); a step
+    with ``prune_kwarg`` computes only the groups passed in that argument, one
+    without it is dropped when none of its groups is used. ``fuse_with`` maps a
+    later step name to kwargs that let this step do that step's work for the
+    columns it creates; the kwargs may be a callable of the later step's
+    kwargs returning None when they can't be fused.
+    """
+    kind: object = BARRIER
+    reads: object = ()
+    writes: object = None
+    features: Dict[str, Tuple[List[str], List[str]]] = {}
+    prune_kwarg: Optional[str] = None
+    fuse_with: Dict[str, Dict] = {}
+
+
+def _resolve(value, *args):
+    return value(*args) if callable(value) else value
+
+
+class ExecutionPlan:
+    """Logical chain of preprocessing steps and its optimized form.
+
+    The optimizer works on column sets only, never on data:
+
+    - projection pushdown: with a ``select`` step, the columns needed are
+      traced backwards so unused raw columns are never loaded, steps whose
+      outputs are all unused are dropped and feature steps compute only the
+      features still needed;
+    - filter pushdown: a row filter moves ahead of row-local steps that do not
+      write the columns it reads, so they run on fewer rows;
+    - fusion: a step that can produce its columns in the form a later step
+      would convert them to (``fuse_with``) does so, and the later step has
+      nothing left to do for them.
+    """
+
+    def __init__(self, steps: List[PlanStep], specs: Dict[str, StepSpec]):
+        self.steps = list(steps)
+        self.specs = specs
+        self.load_columns = None
+        self.notes = []
+
+    def _spec(self, step: PlanStep) -> StepSpec:
+        return self.specs.get(step.name, StepSpec())
+
+    def _kind(self, step: PlanStep) -> str:
+        return _resolve(self._spec(step).kind, step.kwargs)
+
+    def _writes(self, step: PlanStep) -> Optional[Set[str]]:
+        spec = self._spec(step)
+        if spec.features:
+            return {col for _, creates in spec.features.values() for col in creates}
+        writes = _resolve(spec.writes, step.kwargs)
+        return None if writes is None else set(writes)
+
+    def prune(self) -> List[PlanStep]:
+        """Walk backwards from the output, keeping only steps and features it needs"""
+        needed = None
+        kept = []
+        for step in reversed(self.steps):
+            spec = self._spec(step)
+            kind = self._kind(step)
+            if kind == PROJECTION:
+                needed = set(step.kwargs['columns'])
+            elif kind == BARRIER:
+                needed = None
+            elif spec.features and needed is not None:
+                used = [name for name, (_, creates) in spec.features.items() if needed & set(creates)]
+                if not used:
+                    self.notes.append(f"dropped {step.name}: none of its outputs is used")
+                    continue
+                if spec.prune_kwarg and len(used) < len(spec.features):
+                    step = step._replace(kwargs={**step.kwargs, spec.prune_kwarg: used},
+                                         note=f"only {used}")
+                needed -= {col for name in used for col in spec.features[name][1]}
+                needed |= {col for name in used for col in spec.features[name][0]}
+            if needed is not None:
+                needed |= set(_resolve(spec.reads, step.kwargs, needed))
+            kept.append(step)
+        self.load_columns = needed
+        if needed is not None:
+            self.notes.append(f"load only the {len(needed)} columns used")
+        return list(reversed(kept))
+
+    def push_filters(self, steps: List[PlanStep]) -> List[PlanStep]:
+        """Move row filters ahead of row-local steps they don't depend on"""
+        steps = list(steps)
+        for position in range(len(steps)):
+            step = steps[position]
+            if self._kind(step) != ROW_FILTER:
+                continue
+            reads = set(_resolve(self._spec(step).reads, step.kwargs, set()))
+            target = position
+            while target > 0:
+                previous = steps[target - 1]
+                writes = self._writes(previous)
+                if self._kind(previous) != ROW_LOCAL or writes is None or writes & reads:
+                    break
+                target -= 1
+            if target < position:
+                passed = [s.name for s in steps[target:position]]
+                self.notes.append(f"moved {step.name} ahead of {passed}: they run on the kept rows only")
+                steps[target + 1:position + 1] = steps[target:position]
+                steps[target] = step._replace(note=(step.note + '; ' if step.note else '') + 'filter pushed down')
+        return steps
+
+    def fuse(self, steps: List[PlanStep]) -> List[PlanStep]:
+        """Let steps produce their columns already in a later step's form"""
+        fused = []
+        for position, step in enumerate(steps):
+            for later_name, fuse_kwargs in self._spec(step).fuse_with.items():
+                later = next((s for s in steps[position + 1:] if s.name == later_name), None)
+                # The kwargs may depend on how the later step is called (None: can't fuse)
+                kwargs = _resolve(fuse_kwargs, later.kwargs) if later is not None else None
+                if kwargs:
+                    step = step._replace(kwargs={**step.kwargs, **kwargs},
+                                         note=(step.note + '; ' if step.note else '') + f"fused with {later_name}")
+                    self.notes.append(f"fused {step.name} with {later_name}: its columns are created in their final form")
+            fused.append(step)
+        return fused
+
+    def optimize(self) -> List[PlanStep]:
+        """Optimized steps (``load_columns`` and ``notes`` describe what changed)"""
+        self.notes = []
+        return self.fuse(self.push_filters(self.prune()))
+
+    def explain(self) -> str:
+        """Logical and optimized plan, as text"""
+        optimized = self.optimize()
+        lines = ['Logical plan:']
+        lines += [f"  {_format_step(step)}" for step in self.steps]
+        lines.append('Optimized plan:')
+        if self.load_columns is not None:
+            lines.append(f"  load(columns={sorted(self.load_columns)})")
+        lines += [f"  {_format_step(step)}" + (f"  -- {step.note}" if step.note else '') for step in optimized]
+        if self.notes:
+            lines.append('Optimizations:')
+            lines += [f"  - {note}" for note in self.notes]
+        return '\n'.join(lines)
+
+
+def _format_step(step: PlanStep) -> str:
+    return f"{step.name}({', '.join(f'{key}={value!r}' for key, value in step.kwargs.items())})"
+
+
+def planned_stage(method: Callable):
+    """Queue a LoanDataPreprocessor step in lazy mode instead of running it
+
+    Arguments are bound to parameter names so the optimizer can read and
+    rewrite them; the plan runs on ``collect()`` / ``get_clean_data()``.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._plan is None or self._executing:
+            return method(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        arguments = dict(bound.arguments)
+        arguments.pop(next(iter(signature.parameters)))
+        self._plan.append(PlanStep(method.__name__, arguments))
+        return self
+    return wrapper
@@ -0,0 +1,141 @@
+# src/imputation.py
+import pickle
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Group-conditional fills: column -> columns whose groups each get their own median/mode
+GROUP_FILLS = {
+    'annual_income': ['grade', 'emp_length'],
+    'emp_length': ['home_ownership']
+}
+DEFAULT_TEXT_FILL = 'Unknown'
+
+
+def mode_from_counts(counts: pd.Series):
+    """Most frequent value, smallest on ties (same as ``Series.mode().iloc[0]``)"""
+    return counts[counts == counts.max()].sort_index().index[0]
+
+
+class GroupFill:
+    """Fill value per group of the ``by`` columns, with a global fallback
+
+    Rows whose group was not seen when the statistics were computed (or whose
+    group had no values) get ``default``.
+    """
+
+    def __init__(self, statistic: str, by: List[str], values: pd.Series, default):
+        self.statistic = statistic
+        self.by = list(by)
+        self.values = values
+        self.default = default
+
+    def lookup(self, df: pd.DataFrame) -> pd.Series:
+        """Fill value for every row of ``df`` from its group"""
+        keys = pd.MultiIndex.from_frame(df[self.by]) if len(self.by) > 1 else pd.Index(df[self.by[0]])
+        positions = self.values.index.get_indexer(keys)
+        values = np.append(self.values.to_numpy(dtype=object), self.default)[positions]
+        # A group whose statistic is missing (all its values were missing) falls back too
+        values[pd.isna(values)] = self.default
+        values = pd.Series(values, index=df.index)
+        return values.astype('float64') if self.statistic == 'median' else values
+
+    def __repr__(self):
+        return f"{self.statistic} by {self.by} ({len(self.values)} groups, default {self.default})"
+
+
+class Imputer:
+    """Missing-value engine shared by the preprocessors.
+
+    Missing masks are built once per column (empty strings count as missing
+    in text columns). ``fit`` takes every global median in one ``median()``
+    call and every mode from one ``value_counts()``; group-conditional
+    columns (``group_by``) get one grouped aggregation per set of group
+    columns, kept as a lookup table. ``transform`` fills all columns and
+    assigns them to the frame in one go. The fill values are plain data, so
+    they can be stored and handed to a later batch to fill it the same way.
+    """
+
+    def __init__(self, group_by: Dict[str, List[str]] = None, exclude: List[str] = ()):
+        self.group_by = group_by or {}
+        self.exclude = set(exclude)
+
+    def missing_masks(self, df: pd.DataFrame) -> Dict[str, pd.Series]:
+        """Boolean missing mask of every column that has a missing value"""
+        columns = [col for col in df.columns if col not in self.exclude]
+        missing = df[columns].isna()
+        masks = {}
+        for col in columns:
+            mask = missing[col]
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                mask = mask | (df[col] == '')
+            if mask.any():
+                masks[col] = mask
+        return masks
+
+    def fit(self, df: pd.DataFrame, masks: Dict[str, pd.Series] = None,
+            columns: List[str] = None) -> Dict[str, object]:
+        """Median (numeric) / mode (text) fill value of each column with missing values"""
+        masks = self.missing_masks(df) if masks is None else masks
+        columns = list(masks) if columns is None else [col for col in columns if col in masks]
+        numeric = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])]
+        fill_values = df[numeric].median().to_dict() if numeric else {}
+        for col in columns:
+            if col not in fill_values:
+                counts = df[col][~masks[col]].value_counts()
+                fill_values[col] = mode_from_counts(counts) if len(counts) else DEFAULT_TEXT_FILL
+
+        grouped = {}
+        for col in columns:
+            by = [key for key in self.group_by.get(col, []) if key in df.columns and key != col]
+            if by:
+                grouped.setdefault(tuple(by), []).append(col)
+        for by, group_columns in grouped.items():
+            by = list(by)
+            numeric_columns = [col for col in group_columns if col in numeric]
+            if numeric_columns:
+                medians = df.groupby(by, observed=True, dropna=False)[numeric_columns].median()
+                for col in numeric_columns:
+                    fill_values[col] = GroupFill('median', by, medians[col], fill_values[col])
+            for col in group_columns:
+                if col not in numeric_columns:
+                    fill_values[col] = GroupFill('mode', by, self._group_modes(df[~masks[col]], by, col),
+                                                 fill_values[col])
+        return fill_values
+
+    @staticmethod
+    def _group_modes(df: pd.DataFrame, by: List[str], col: str) -> pd.Series:
+        """Most frequent ``col`` value of every group, smallest on ties"""
+        counts = df.groupby(by + [col], observed=True, dropna=False).size().rename('count').reset_index()
+        counts = counts.sort_values(['count', col], ascending=[False, True], kind='stable')
+        return counts.drop_duplicates(by).set_index(by)[col]
+
+    def transform(self, df: pd.DataFrame, fill_values: Dict[str, object],
+                  masks: Dict[str, pd.Series] = None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+        """Frame with the missing values filled, and the count filled per column"""
+        masks = self.missing_masks(df) if masks is None else masks
+        filled = {}
+        counts = {}
+        for col, fill in fill_values.items():
+            if col not in masks:
+                continue
+            values = fill.lookup(df) if isinstance(fill, GroupFill) else fill
+            filled[col] = df[col].mask(masks[col], values)
+            counts[col] = int(masks[col].sum())
+        return (df.assign(**filled) if filled else df), counts
+
+
+def save_fill_values(fill_values: Dict[str, object], path: str):
+    """Store fill values for a later batch (see load_fill_values)"""
+    with open(path, 'wb') as f:
+        pickle.dump(fill_values, f)
+
+
+def load_fill_values(path: str) -> Dict[str, object]:
+    """Fill values stored by save_fill_values, for ``handle_missing_values(fill_values=...)``
+
+    Group fills come back as GroupFill lookups. Raises FileNotFoundError if
+    no run has saved any yet.
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,120 @@
+# src/instrumentation.py
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+STAGE_METRICS_FILE = 'stage_metrics.json'
+
+
+def configure_logging(level=logging.INFO):
+    """Send pipeline progress messages to stdout at ``level``
+
+    INFO shows the step-by-step progress, DEBUG adds sample values and
+    distributions (computed only at that level), WARNING is quiet mode.
+    """
+    logging.basicConfig(level=level, format='%(message)s', stream=sys.stdout, force=True)
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (None if unavailable)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class StageMetrics:
+    """Per-stage wall time, CPU time, RSS delta, rows in/out and columns touched.
+
+    Each ``stage()`` block appends one record; callers fill in ``rows_out``
+    and ``columns`` on the yielded record before the block ends.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': rows_in, 'columns': []}
+        rss_start = current_rss()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 6)
+            rss_end = current_rss()
+            record['rss_delta_mb'] = (round((rss_end - rss_start) / 2**20, 2)
+                                      if rss_start is not None and rss_end is not None else None)
+            record['calls'] = 1
+            self.records.append(record)
+            logger.debug(f"   ⏱️ {name}: {record['wall_seconds']:.3f}s wall, {record['cpu_seconds']:.3f}s CPU, "
+                         f"rows {record['rows_in']} → {record['rows_out']}")
+
+    def extend(self, records: List[Dict]):
+        """Add records collected elsewhere (chunks, worker processes)"""
+        self.records.extend(records)
+
+    def aggregate(self) -> List[Dict]:
+        """Records summed per stage name, in first-seen order"""
+        return aggregate_stage_metrics(self.records)
+
+
+def aggregate_stage_metrics(records: List[Dict]) -> List[Dict]:
+    """Sum records with the same stage name (e.g. one per chunk or partition)"""
+    totals = {}
+    for record in records:
+        total = totals.get(record['stage'])
+        if total is None:
+            totals[record['stage']] = dict(record, columns=list(record['columns']))
+            continue
+        for key in ['wall_seconds', 'cpu_seconds', 'rss_delta_mb', 'rows_in', 'rows_out', 'calls']:
+            if total.get(key) is not None and record.get(key) is not None:
+                total[key] = round(total[key] + record[key], 6)
+        total['columns'] += [col for col in record['columns'] if col not in total['columns']]
+    return list(totals.values())
+
+
+def instrumented_stage(method):
+    """Record a LoanDataPreprocessor step in ``self.stage_metrics``
+
+    Rows are taken from ``self.df`` before and after the step. Touched columns
+    are the ones added, removed or retyped, plus any the step marked with
+    ``self._touch()``.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        dtypes_before = self.df.dtypes.to_dict()
+        self._touched = []
+        with self.stage_metrics.stage(method.__name__, rows_in=len(self.df)) as record:
+            result = method(self, *args, **kwargs)
+            dtypes_after = self.df.dtypes.to_dict()
+            # dtype != None is False for float64 (None coerces to it), so test membership first
+            changed = [col for col, dtype in dtypes_after.items()
+                       if col not in dtypes_before or dtypes_before[col] != dtype]
+            removed = [col for col in dtypes_before if col not in dtypes_after]
+            record['rows_out'] = len(self.df)
+            record['columns'] = list(dict.fromkeys(self._touched + changed + removed))
+        return result
+    return wrapper
+
+
+def write_stage_metrics(records: List[Dict], directory: str) -> str:
+    """Write stage records to ``stage_metrics.json`` in ``directory``"""
+    path = os.path.join(directory, STAGE_METRICS_FILE)
+    with open(path, 'w') as f:
+        json.dump(records, f, indent=2)
+    return path
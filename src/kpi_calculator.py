@@ -1,8 +1,53 @@
 # src/kpi_calculator.py
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+from .data_export import OUTPUT_FORMATS, output_path, publish_frame, read_frame
+from .kpi_index import LoanKPIIndex
+
+# Grouping sets of the KPI cube, one per roll-up family of the dashboard
+# exports (each table is also split by PARTITION_KEYS when the data has them)
+GROUPING_SETS = {
+    'monthly': ['issue_month_name'],
+    'state': ['address_state'],
+    'grade': ['grade', 'sub_grade'],
+    'employment': ['emp_length'],
+    'purpose': ['purpose'],
+    'home_ownership': ['home_ownership', 'loan_category'],
+    'term': ['term']
+}
+# Additive measures: each is stored as a sum and a non-null count
+CUBE_MEASURES = ['loan_amount', 'total_payment', 'int_rate', 'dti', 'annual_income']
+# Monthly partitions of the cube (the unit a restated batch replaces)
+PARTITION_KEYS = ['issue_year', 'issue_month']
+
+
+def _ratio(numerator, denominator) -> float:
+    """Average of a sum over a count (NaN when nothing was counted)"""
+    return numerator / denominator if denominator else np.nan
+
+
+def _percentage(part, total) -> float:
+    """Share of ``total`` in percent (0 for an empty selection)"""
+    return (part / total) * 100 if total else 0.0
+
+
+def _dimension_codes(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Codes 0..n-1 of a cube key column and its labels; missing values get code n"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, labels = pd.factorize(values, sort=True)
+    codes = codes.astype(np.int64)
+    codes[codes < 0] = len(labels)
+    return codes, pd.Index(labels)
+
+
+def _dimension_labels(labels: pd.Index, codes: np.ndarray) -> np.ndarray:
+    """Inverse of _dimension_codes (code n -> missing)"""
+    return np.asarray(pd.Categorical.from_codes(np.where(codes < len(labels), codes, -1), categories=labels))
 
 class LoanKPICalculator:
     def __init__(self, df: pd.DataFrame):
@@ -21,20 +66,392 @@ class LoanKPICalculator:
     
     def calculate_good_bad_loans(self) -> Dict[str, Dict]:
         """Calculate Good vs Bad loan metrics"""
-        good_loans = self.df[self.df['loan_category'] == 'Good Loan']
-        bad_loans = self.df[self.df['loan_category'] == 'Bad Loan']
+        # One grouped pass instead of two filtered copies of the frame
+        grouped = self.df.groupby('loan_category', observed=True).agg(
+            applications=('loan_amount', 'size'),
+            funded_amount=('loan_amount', 'sum'),
+            received_amount=('total_payment', 'sum')
+        )
         
-        return {
-            'good_loans': {
-                'percentage': (len(good_loans) / len(self.df)) * 100,
-                'applications': len(good_loans),
-                'funded_amount': good_loans['loan_amount'].sum(),
-                'received_amount': good_loans['total_payment'].sum()
-            },
-            'bad_loans': {
-                'percentage': (len(bad_loans) / len(self.df)) * 100,
-                'applications': len(bad_loans),
-                'funded_amount': bad_loans['loan_amount'].sum(),
-                'received_amount': bad_loans['total_payment'].sum()
+        result = {}
+        for key, category in [('good_loans', 'Good Loan'), ('bad_loans', 'Bad Loan')]:
+            row = grouped.loc[category] if category in grouped.index else None
+            applications = int(row['applications']) if row is not None else 0
+            result[key] = {
+                'percentage': _percentage(applications, len(self.df)),
+                'applications': applications,
+                'funded_amount': row['funded_amount'] if row is not None else 0,
+                'received_amount': row['received_amount'] if row is not None else 0
             }
+        return result
+    
+    def build_cube(self) -> 'LoanKPICube':
+        """Aggregate the base measures once for every dashboard export"""
+        return LoanKPICube.from_frame(self.df)
+    
+    def build_index(self) -> LoanKPIIndex:
+        """Index the dimensions once for fast filtered KPI queries"""
+        return LoanKPIIndex(self.df)
+    
+    def update_state(self, state_dir: str, replace_partitions: bool = False, fmt: str = 'csv') -> 'LoanKPICube':
+        """Fold this calculator's rows (a new loan batch) into a persisted cube
+
+        The batch is aggregated on its own and merged into the saved counts
+        and sums of the issue months it covers (see KPIStateStore). With
+        ``replace_partitions`` those months are replaced instead (a restated
+        month replaces the old one).
+        """
+        return KPIStateStore(state_dir, fmt).update(self.build_cube(), replace_partitions)
+
+
+class LoanKPICube:
+    """Additive KPI cube: counts and sums per grouping set.
+
+    Each dashboard export rolls up one of a few small grouping sets
+    (GROUPING_SETS). Each set is built with one groupby over the loan
+    records and is also split by issue month, so monthly batches can be
+    merged in or restated. Every average is a sum divided by a count. The
+    cube therefore stays a true aggregate: a few thousand rows whatever the
+    number of loans.
+    """
+    
+    def __init__(self, tables: Dict[str, pd.DataFrame]):
+        self.tables = tables
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, grouping_sets: List[str] = None) -> 'LoanKPICube':
+        """Build the ``grouping_sets`` tables (all by default) from integer codes
+
+        Every key column is factorized once, even when several sets use it.
+        A set's key codes are combined into one code per row, and all its
+        counts and sums come from ``np.bincount`` over that code.
+        """
+        measures = [col for col in CUBE_MEASURES if col in df.columns]
+        partition_keys = [col for col in PARTITION_KEYS if col in df.columns]
+        values = {col: df[col].to_numpy(dtype='float64', na_value=np.nan) for col in measures}
+        codes = {}
+        tables = {}
+        for name in (GROUPING_SETS if grouping_sets is None else grouping_sets):
+            if not all(col in df.columns for col in GROUPING_SETS[name]):
+                continue
+            keys = partition_keys + GROUPING_SETS[name]
+            for col in keys:
+                if col not in codes:
+                    codes[col] = _dimension_codes(df[col])
+            # Mixed-radix code of the key combination (one slot per possible group)
+            shape = [len(codes[col][1]) + 1 for col in keys]
+            group = np.zeros(len(df), dtype=np.int64)
+            for col, size in zip(keys, shape):
+                group = group * size + codes[col][0]
+            slots = int(np.prod(shape))
+            applications = np.bincount(group, minlength=slots)
+            present = np.flatnonzero(applications)
+            table = {col: _dimension_labels(codes[col][1], slot_codes)
+                     for col, slot_codes in zip(keys, np.unravel_index(present, shape))}
+            table['applications'] = applications[present]
+            for col in measures:
+                valid = ~np.isnan(values[col])
+                weights = np.where(valid, values[col], 0.0)
+                table[f'{col}_sum'] = np.bincount(group, weights=weights, minlength=slots)[present]
+                table[f'{col}_n'] = (np.bincount(group[valid], minlength=slots)[present]
+                                     if not valid.all() else table['applications'])
+            tables[name] = pd.DataFrame(table)
+        return cls(tables)
+    
+    @staticmethod
+    def measure_columns(table: pd.DataFrame) -> List[str]:
+        return [col for col in table.columns if col == 'applications' or col.endswith(('_sum', '_n'))]
+    
+    def keys(self, name: str) -> List[str]:
+        """Dimension columns of one grouping set table"""
+        measures = set(self.measure_columns(self.tables[name]))
+        return [col for col in self.tables[name].columns if col not in measures]
+    
+    def _table_for(self, dimensions: List[str]) -> pd.DataFrame:
+        """Smallest grouping set table holding every column of ``dimensions``"""
+        tables = [table for table in self.tables.values() if all(col in table.columns for col in dimensions)]
+        if not tables:
+            raise KeyError(f"No grouping set of the cube covers {dimensions}; sets: {list(self.tables)}")
+        return min(tables, key=len)
+    
+    def partitions(self) -> pd.MultiIndex:
+        """Issue months present in the cube"""
+        table = self._table_for(PARTITION_KEYS)
+        return pd.MultiIndex.from_frame(table[PARTITION_KEYS].drop_duplicates())
+    
+    @staticmethod
+    def _partition_mask(table: pd.DataFrame, partitions: pd.MultiIndex) -> np.ndarray:
+        return pd.MultiIndex.from_frame(table[PARTITION_KEYS]).isin(partitions)
+    
+    def merge(self, other: 'LoanKPICube') -> 'LoanKPICube':
+        """Add another cube's counts and sums (e.g. a new monthly batch)
+
+        Only rows in the partitions the other cube touches are
+        re-aggregated; the rest of each table is carried over as is.
+        """
+        if set(other.tables) != set(self.tables):
+            raise ValueError(f"Cube grouping sets differ: {list(self.tables)} vs {list(other.tables)}")
+        partitions = other.partitions()
+        tables = {}
+        for name, table in self.tables.items():
+            keys = self.keys(name)
+            touched = self._partition_mask(table, partitions)
+            combined = pd.concat([table[touched], other.tables[name][table.columns]], ignore_index=True)
+            combined = (combined.groupby(keys, observed=True, dropna=False, sort=False)[self.measure_columns(table)]
+                        .sum()
+                        .reset_index())
+            tables[name] = pd.concat([table[~touched], combined], ignore_index=True)
+        return LoanKPICube(tables)
+    
+    def drop_partitions(self, partitions: pd.MultiIndex) -> 'LoanKPICube':
+        """Retract whole issue months, e.g. before loading a restated batch"""
+        return LoanKPICube({name: table[~self._partition_mask(table, partitions)].reset_index(drop=True)
+                            for name, table in self.tables.items()})
+    
+    def drop_partition(self, year: int, month: int) -> 'LoanKPICube':
+        """Retract one issue month"""
+        return self.drop_partitions(pd.MultiIndex.from_tuples([(year, month)], names=PARTITION_KEYS))
+    
+    def partition(self, year: int, month: int) -> 'LoanKPICube':
+        """Only the rows of one issue month"""
+        partitions = pd.MultiIndex.from_tuples([(year, month)], names=PARTITION_KEYS)
+        return LoanKPICube({name: table[self._partition_mask(table, partitions)].reset_index(drop=True)
+                            for name, table in self.tables.items()})
+    
+    def to_frame(self) -> pd.DataFrame:
+        """All grouping set tables stacked in one frame, tagged by ``grouping_set``"""
+        return pd.concat([table.assign(grouping_set=name) for name, table in self.tables.items()],
+                         ignore_index=True)
+    
+    @classmethod
+    def from_stacked(cls, stacked: pd.DataFrame) -> 'LoanKPICube':
+        """Inverse of to_frame"""
+        partition_keys = [col for col in PARTITION_KEYS if col in stacked.columns]
+        measures = cls.measure_columns(stacked)
+        tables = {}
+        for name, table in stacked.groupby('grouping_set', sort=False):
+            if name in GROUPING_SETS:
+                tables[name] = table[partition_keys + GROUPING_SETS[name] + measures].reset_index(drop=True)
+        return cls(tables)
+    
+    def save(self, path: str):
+        """Persist the aggregate state (format from the file extension)"""
+        publish_frame(self.to_frame(), [path])
+    
+    @classmethod
+    def load(cls, path: str) -> 'LoanKPICube':
+        """Reload a saved aggregate state"""
+        return cls.from_stacked(read_frame(path))
+    
+    def rollup(self, dimensions: List[str] = None) -> pd.DataFrame:
+        """Counts and sums rolled up to ``dimensions`` (grand total if empty)"""
+        table = self._table_for(dimensions or [])
+        measure_cols = self.measure_columns(table)
+        if not dimensions:
+            return table[measure_cols].sum().to_frame().T
+        return (table.groupby(dimensions, observed=True)[measure_cols]
+                .sum()
+                .reset_index())
+    
+    @staticmethod
+    def _mean(table: pd.DataFrame, measure: str) -> pd.Series:
+        return table[f'{measure}_sum'] / table[f'{measure}_n']
+    
+    def primary_kpis(self) -> Dict[str, Any]:
+        """Same KPIs as LoanKPICalculator.calculate_primary_kpis"""
+        total = self.rollup().iloc[0]
+        return {
+            'total_loan_applications': int(total['applications']),
+            'total_funded_amount': total['loan_amount_sum'],
+            'total_amount_received': total['total_payment_sum'],
+            'average_interest_rate': _ratio(total['int_rate_sum'], total['int_rate_n']),
+            'average_dti': _ratio(total['dti_sum'], total['dti_n'])
         }
+    
+    def kpi_summary_cards(self) -> pd.DataFrame:
+        """KPI values for the Power BI cards"""
+        kpis = self.primary_kpis()
+        total = kpis['total_loan_applications']
+        categories = self.rollup(['loan_category']).set_index('loan_category')
+        
+        def category_value(category, column):
+            return categories.at[category, column] if category in categories.index else 0
+        
+        good_apps = category_value('Good Loan', 'applications')
+        bad_apps = category_value('Bad Loan', 'applications')
+        kpi_cards = [
+            {'KPI_Category': 'Volume', 'KPI_Name': 'Total Loan Applications', 'KPI_Value': total, 'KPI_Format': 'Number'},
+            {'KPI_Category': 'Amount', 'KPI_Name': 'Total Funded Amount', 'KPI_Value': kpis['total_funded_amount'], 'KPI_Format': 'Currency'},
+            {'KPI_Category': 'Amount', 'KPI_Name': 'Total Amount Received', 'KPI_Value': kpis['total_amount_received'], 'KPI_Format': 'Currency'},
+            {'KPI_Category': 'Rate', 'KPI_Name': 'Average Interest Rate', 'KPI_Value': kpis['average_interest_rate'], 'KPI_Format': 'Percentage'},
+            {'KPI_Category': 'Risk', 'KPI_Name': 'Average DTI', 'KPI_Value': kpis['average_dti'], 'KPI_Format': 'Percentage'},
+            {'KPI_Category': 'Quality', 'KPI_Name': 'Good Loan Percentage', 'KPI_Value': _percentage(good_apps, total), 'KPI_Format': 'Percentage'},
+            {'KPI_Category': 'Quality', 'KPI_Name': 'Good Loan Applications', 'KPI_Value': good_apps, 'KPI_Format': 'Number'},
+            {'KPI_Category': 'Quality', 'KPI_Name': 'Good Loan Funded Amount', 'KPI_Value': category_value('Good Loan', 'loan_amount_sum'), 'KPI_Format': 'Currency'},
+            {'KPI_Category': 'Quality', 'KPI_Name': 'Bad Loan Percentage', 'KPI_Value': _percentage(bad_apps, total), 'KPI_Format': 'Percentage'},
+            {'KPI_Category': 'Quality', 'KPI_Name': 'Bad Loan Applications', 'KPI_Value': bad_apps, 'KPI_Format': 'Number'},
+            {'KPI_Category': 'Quality', 'KPI_Name': 'Bad Loan Funded Amount', 'KPI_Value': category_value('Bad Loan', 'loan_amount_sum'), 'KPI_Format': 'Currency'}
+        ]
+        kpi_summary = pd.DataFrame(kpi_cards)
+        kpi_summary['KPI_Value'] = kpi_summary['KPI_Value'].astype('float64')
+        return kpi_summary
+    
+    def monthly_trends_detailed(self) -> pd.DataFrame:
+        """Monthly time series with running totals"""
+        monthly = self.rollup(['issue_year', 'issue_month', 'issue_month_name'])
+        monthly_trends = pd.DataFrame({
+            'Year': monthly['issue_year'],
+            'Month_Number': monthly['issue_month'],
+            'Month_Name': monthly['issue_month_name'],
+            'Total_Applications': monthly['applications'],
+            'Total_Funded': monthly['loan_amount_sum'],
+            'Total_Received': monthly['total_payment_sum'],
+            'Avg_Interest_Rate': self._mean(monthly, 'int_rate'),
+            'Avg_DTI': self._mean(monthly, 'dti')
+        })
+        monthly_trends['Date'] = pd.to_datetime(pd.DataFrame({
+            'year': monthly_trends['Year'], 'month': monthly_trends['Month_Number'], 'day': 1
+        }))
+        monthly_trends = monthly_trends.sort_values('Date')
+        monthly_trends['Cumulative_Applications'] = monthly_trends['Total_Applications'].cumsum()
+        monthly_trends['Cumulative_Funded'] = monthly_trends['Total_Funded'].cumsum()
+        monthly_trends['Cumulative_Received'] = monthly_trends['Total_Received'].cumsum()
+        return monthly_trends
+    
+    def state_dimension(self) -> pd.DataFrame:
+        """State-level aggregated metrics"""
+        state = self.rollup(['address_state'])
+        return pd.DataFrame({
+            'address_state': state['address_state'],
+            'Total_Apps': state['applications'],
+            'Total_Funded': state['loan_amount_sum'],
+            'Avg_Loan_Amount': self._mean(state, 'loan_amount'),
+            'Total_Received': state['total_payment_sum'],
+            'Avg_Received': self._mean(state, 'total_payment'),
+            'Avg_Interest_Rate': self._mean(state, 'int_rate')
+        }).round(2)
+    
+    def grade_dimension(self) -> pd.DataFrame:
+        """Grade/Sub-grade aggregated metrics"""
+        grade = self.rollup(['grade', 'sub_grade'])
+        return pd.DataFrame({
+            'grade': grade['grade'],
+            'sub_grade': grade['sub_grade'],
+            'Total_Apps': grade['applications'],
+            'Total_Funded': grade['loan_amount_sum'],
+            'Avg_Loan_Amount': self._mean(grade, 'loan_amount'),
+            'Avg_Interest_Rate': self._mean(grade, 'int_rate'),
+            'Avg_DTI': self._mean(grade, 'dti')
+        }).round(2)
+    
+    def employment_dimension(self) -> pd.DataFrame:
+        """Employment length aggregated metrics"""
+        emp = self.rollup(['emp_length'])
+        return pd.DataFrame({
+            'emp_length': emp['emp_length'],
+            'Total_Apps': emp['applications'],
+            'Total_Funded': emp['loan_amount_sum'],
+            'Avg_Loan_Amount': self._mean(emp, 'loan_amount'),
+            'Avg_Annual_Income': self._mean(emp, 'annual_income'),
+            'Avg_DTI': self._mean(emp, 'dti'),
+            'Avg_Interest_Rate': self._mean(emp, 'int_rate')
+        }).round(2)
+    
+    def purpose_analysis(self) -> pd.DataFrame:
+        """Loan metrics by purpose"""
+        purpose = self.rollup(['purpose'])
+        return pd.DataFrame({
+            'Purpose': purpose['purpose'],
+            'Applications': purpose['applications'],
+            'Funded_Amount': purpose['loan_amount_sum'],
+            'Received_Amount': purpose['total_payment_sum'],
+            'Avg_Interest_Rate': self._mean(purpose, 'int_rate')
+        })
+    
+    def home_ownership_analysis(self) -> pd.DataFrame:
+        """Loan metrics by home ownership and loan category"""
+        home = self.rollup(['home_ownership', 'loan_category'])
+        return pd.DataFrame({
+            'Home_Ownership': home['home_ownership'],
+            'Loan_Category': home['loan_category'],
+            'Applications': home['applications'],
+            'Funded_Amount': home['loan_amount_sum'],
+            'Received_Amount': home['total_payment_sum']
+        })
+    
+    def term_analysis(self) -> pd.DataFrame:
+        """Loan metrics by term"""
+        term = self.rollup(['term'])
+        return pd.DataFrame({
+            'term': term['term'],
+            'id': term['applications'],
+            'loan_amount': term['loan_amount_sum'],
+            'total_payment': term['total_payment_sum']
+        })
+    
+    def export_tables(self) -> Dict[str, pd.DataFrame]:
+        """Every dashboard export table, keyed by file name (without extension)"""
+        exports = {
+            'kpi_summary_cards': (self.kpi_summary_cards, ['loan_category']),
+            'monthly_trends_detailed': (self.monthly_trends_detailed, ['issue_year', 'issue_month', 'issue_month_name']),
+            'state_dimension': (self.state_dimension, ['address_state']),
+            'grade_dimension': (self.grade_dimension, ['grade', 'sub_grade']),
+            'employment_dimension': (self.employment_dimension, ['emp_length']),
+            'purpose_analysis': (self.purpose_analysis, ['purpose']),
+            'home_ownership_analysis': (self.home_ownership_analysis, ['home_ownership', 'loan_category']),
+            'term_analysis': (self.term_analysis, ['term'])
+        }
+        return {name: build() for name, (build, needed) in exports.items()
+                if any(all(col in table.columns for col in needed) for table in self.tables.values())}
+    
+    def write_exports(self, directory: str, fmt: str = 'csv') -> List[str]:
+        """Write every export table into ``directory``"""
+        paths = []
+        for name, table in self.export_tables().items():
+            path = output_path(os.path.join(directory, name), fmt)
+            publish_frame(table, [path], fmt=fmt)
+            paths.append(path)
+        return paths
+
+
+class KPIStateStore:
+    """Persisted KPI cube, one small file per issue month (``2021-03.csv`` ...)
+
+    A refresh reads and rewrites only the months its batch covers, so its
+    cost grows with the batch, not with the history. Each file holds a few
+    hundred aggregate rows and is replaced atomically. Reading the whole
+    state back (for the exports) touches every month's file, but not the
+    loan records.
+    """
+
+    def __init__(self, directory: str, fmt: str = 'csv'):
+        if os.path.isfile(directory):
+            raise ValueError(f"{directory} is a file; the KPI state is a directory with one file per issue month")
+        self.directory = directory
+        self.fmt = fmt
+        self.extension = OUTPUT_FORMATS[fmt]
+
+    def path(self, year: int, month: int) -> str:
+        return os.path.join(self.directory, f'{int(year):04d}-{int(month):02d}{self.extension}')
+
+    def paths(self) -> List[str]:
+        """Saved month files, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))
+                if name.endswith(self.extension) and not name.startswith('.')]
+
+    def update(self, batch: LoanKPICube, replace_partitions: bool = False) -> LoanKPICube:
+        """Merge (or with ``replace_partitions`` replace) the batch's months, then load the state"""
+        os.makedirs(self.directory, exist_ok=True)
+        for year, month in batch.partitions():
+            part = batch.partition(year, month)
+            path = self.path(year, month)
+            if os.path.exists(path) and not replace_partitions:
+                part = LoanKPICube.load(path).merge(part)
+            part.save(path)
+        return self.load()
+
+    def load(self) -> LoanKPICube:
+        """Every saved month as one cube"""
+        return LoanKPICube.from_stacked(pd.concat([read_frame(path) for path in self.paths()], ignore_index=True))
@@ -0,0 +1,141 @@
+# src/kpi_index.py
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, List
+
+# Dimensions dashboard users slice by
+INDEX_DIMENSIONS = [
+    'address_state', 'grade', 'purpose', 'term', 'home_ownership', 'emp_length',
+    'issue_year', 'issue_month', 'loan_category'
+]
+INDEX_MEASURES = ['loan_amount', 'total_payment', 'int_rate', 'dti']
+
+
+class LoanKPIIndex:
+    """Inverted index over the categorical dimensions of the clean loan data.
+
+    Built once: every dimension is factorized into integer codes and its
+    rows are sorted by code, giving one sorted row-id list per category value
+    (CSR layout: ``row_ids`` plus ``offsets``). A query starts from the
+    shortest list among the filtered dimensions and checks the remaining
+    filters by gathering their codes at just those rows, so its cost grows
+    with the number of matching rows instead of the size of the frame. The
+    measures are then summed over the gathered rows.
+    """
+
+    def __init__(self, df: pd.DataFrame, dimensions: List[str] = None, measures: List[str] = None):
+        dimensions = INDEX_DIMENSIONS if dimensions is None else dimensions
+        measures = INDEX_MEASURES if measures is None else measures
+        self.n_rows = len(df)
+        self.dimensions = [col for col in dimensions if col in df.columns]
+        self.codes = {}
+        self.categories = {}
+        self.row_ids = {}
+        self.offsets = {}
+        id_dtype = np.int32 if self.n_rows < np.iinfo(np.int32).max else np.int64
+        for col in self.dimensions:
+            codes, categories = self._factorize(df[col])
+            self.codes[col] = codes
+            self.categories[col] = categories
+            # Counting sort by code: rows of each value end up contiguous and ascending
+            self.row_ids[col] = np.argsort(codes, kind='stable').astype(id_dtype)
+            counts = np.bincount(codes.astype(np.int64) + 1, minlength=len(categories) + 1)
+            self.offsets[col] = np.concatenate([[0], np.cumsum(counts)])
+        self.measures = {col: df[col].to_numpy() for col in measures if col in df.columns}
+
+    @staticmethod
+    def _factorize(values: pd.Series):
+        """Integer codes (-1 for missing) and the category labels"""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, categories = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, categories = pd.factorize(values, sort=True)
+        dtype = np.int8 if len(categories) < 127 else (np.int16 if len(categories) < 32767 else np.int32)
+        return codes.astype(dtype), pd.Index(categories)
+
+    def _value_codes(self, col: str, values) -> np.ndarray:
+        """Codes of the requested labels (unknown labels are dropped)"""
+        if col not in self.codes:
+            raise KeyError(f"{col} is not an indexed dimension; indexed: {self.dimensions}")
+        if np.ndim(values) == 0:
+            values = [values]
+        codes = self.categories[col].get_indexer(pd.Index(values))
+        return np.unique(codes[codes >= 0])
+
+    def _posting_list(self, col: str, codes: np.ndarray) -> np.ndarray:
+        """Sorted row ids having any of ``codes`` in ``col``"""
+        offsets = self.offsets[col]
+        # offsets[code + 1] starts the rows of ``code`` (slot 0 holds missing values)
+        parts = [self.row_ids[col][offsets[code + 1]:offsets[code + 2]] for code in codes]
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=self.row_ids[col].dtype)
+
+    def filter(self, **filters) -> np.ndarray:
+        """Row positions matching every filter, e.g. ``filter(grade=['A', 'B'], issue_month=3)``
+
+        A filter value is one label or a list of labels (any of them matches).
+        """
+        if not filters:
+            return np.arange(self.n_rows)
+        selected = {col: self._value_codes(col, values) for col, values in filters.items()}
+        sizes = {col: sum(self.offsets[col][code + 2] - self.offsets[col][code + 1] for code in codes)
+                 for col, codes in selected.items()}
+        start = min(sizes, key=sizes.get)
+        rows = self._posting_list(start, selected[start])
+        for col, codes in selected.items():
+            if col == start or not len(rows):
+                continue
+            allowed = np.zeros(len(self.categories[col]) + 1, dtype=bool)
+            allowed[codes + 1] = True
+            rows = rows[allowed[self.codes[col][rows].astype(np.int64) + 1]]
+        return rows
+
+    def _gather(self, col: str, rows: np.ndarray) -> np.ndarray:
+        """Measure values at ``rows`` (no copy when every row matches)"""
+        values = self.measures[col]
+        return values if len(rows) == self.n_rows else values[rows]
+
+    def _sum(self, col: str, rows: np.ndarray):
+        values = self._gather(col, rows)
+        if np.issubdtype(values.dtype, np.integer):
+            return values.sum(dtype=np.int64)
+        return np.nansum(values)
+
+    def _mean(self, col: str, rows: np.ndarray) -> float:
+        values = self._gather(col, rows)
+        if np.issubdtype(values.dtype, np.integer):
+            return values.mean() if len(values) else np.nan
+        valid = ~np.isnan(values)
+        return values[valid].mean() if valid.any() else np.nan
+
+    def primary_kpis(self, **filters) -> Dict[str, Any]:
+        """calculate_primary_kpis() over the rows matching ``filters``"""
+        rows = self.filter(**filters)
+        return {
+            'total_loan_applications': len(rows),
+            'total_funded_amount': self._sum('loan_amount', rows),
+            'total_amount_received': self._sum('total_payment', rows),
+            'average_interest_rate': self._mean('int_rate', rows),
+            'average_dti': self._mean('dti', rows)
+        }
+
+    def good_bad_loans(self, **filters) -> Dict[str, Dict]:
+        """calculate_good_bad_loans() over the rows matching ``filters``"""
+        rows = self.filter(**filters)
+        categories = self.codes['loan_category'][rows]
+        result = {}
+        for key, category in [('good_loans', 'Good Loan'), ('bad_loans', 'Bad Loan')]:
+            category_rows = rows[np.isin(categories, self._value_codes('loan_category', category))]
+            result[key] = {
+                'percentage': (len(category_rows) / len(rows)) * 100 if len(rows) else 0.0,
+                'applications': len(category_rows),
+                'funded_amount': self._sum('loan_amount', category_rows),
+                'received_amount': self._sum('total_payment', category_rows)
+            }
+        return result
+
+    def memory_bytes(self) -> int:
+        """Size of the index arrays (codes, row ids, offsets; measures excluded)"""
+        return int(sum(self.codes[col].nbytes + self.row_ids[col].nbytes + self.offsets[col].nbytes
+                       for col in self.dimensions))
@@ -0,0 +1,336 @@
+# src/kpi_service.py
+"""Local HTTP service for the loan KPIs.
+
+Loads the processed dataset once, answers KPI and dimension-table queries as
+JSON and reloads the data when a new processed file is published:
+
+    python -m src.kpi_service --data data/processed/loan_data_clean.parquet --port 8050
+
+    GET /kpis/primary?address_state=CA&grade=A,B
+    GET /kpis/good-bad?issue_month=3
+    GET /tables/state_dimension?term=36 months
+    GET /metrics
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import pandas as pd
+import numpy as np
+from .data_export import read_frame
+from .kpi_calculator import LoanKPICalculator, LoanKPICube
+from .kpi_index import LoanKPIIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8050
+DEFAULT_CACHE_ENTRIES = 1024
+LATENCY_WINDOW = 10_000
+RELOAD_POLL_SECONDS = 2.0
+
+
+class ResultCache:
+    """LRU cache of encoded responses
+
+    ``misses`` count computations; requests that joined an identical
+    computation already running count as ``coalesced``.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        return None
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.misses + self.coalesced
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'coalesced': self.coalesced, 'hit_rate': self.hits / requests if requests else 0.0}
+
+
+class DatasetState:
+    """One loaded version of the processed data with its calculator, index and cube"""
+
+    def __init__(self, path: str):
+        self.version = dataset_version(path)
+        self.df = read_frame(path)
+        self.calculator = LoanKPICalculator(self.df)
+        self.index = self.calculator.build_index()
+        self.cube = self.calculator.build_cube()
+        # Unfiltered dashboard tables, built once per dataset version
+        self.tables = self.cube.export_tables()
+
+
+def dataset_version(path: str) -> Tuple[int, int, int]:
+    """Changes whenever the file is replaced or rewritten"""
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _jsonable(value):
+    """Plain JSON types for KPI results (numpy scalars, NaN -> null, frames -> records)"""
+    if isinstance(value, pd.DataFrame):
+        return [_jsonable(record) for record in value.to_dict(orient='records')]
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def _server_error(error: Exception) -> Tuple[HTTPStatus, bytes]:
+    """JSON 500 for a query that raised (logged with its traceback)"""
+    logger.exception(f"❌ Query failed: {error}")
+    return HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({'error': f"{type(error).__name__}: {error}"}).encode()
+
+
+def _filter_values(index: LoanKPIIndex, col: str, raw: str) -> list:
+    """Comma-separated query value -> labels of the index's dimension type"""
+    values = [value.strip() for value in raw.split(',')]
+    if pd.api.types.is_numeric_dtype(index.categories[col]):
+        return [int(float(value)) for value in values]
+    # Labels such as ' 36 months' carry padding in the raw data
+    labels = {str(label).strip(): label for label in index.categories[col]}
+    return [labels.get(value, value) for value in values]
+
+
+class KPIService:
+    """asyncio HTTP server answering KPI queries from one in-memory dataset.
+
+    Results are cached (LRU) per path, filters and dataset version. Cache
+    misses are computed in a thread pool so the event loop keeps accepting
+    requests; threads share the single loaded copy of the data, and the
+    numpy gathers and pandas aggregations release the GIL for most of their
+    work. Concurrent identical misses wait on one computation. A background
+    task reloads the data and clears the cache when the file changes.
+    """
+
+    def __init__(self, data_file: str, cache_entries: int = DEFAULT_CACHE_ENTRIES,
+                 workers: int = None, poll_seconds: float = RELOAD_POLL_SECONDS):
+        self.data_file = data_file
+        self.cache = ResultCache(cache_entries)
+        self.executor = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1))
+        self.poll_seconds = poll_seconds
+        self.state = None
+        self.reloads = 0
+        self.failed_version = None
+        self.in_flight = {}
+        self.latencies = {}
+        self.routes = {
+            '/kpis/primary': self._primary_kpis,
+            '/kpis/good-bad': self._good_bad_loans,
+            '/metrics': self._metrics,
+            '/health': lambda state, filters: {'status': 'ok', 'rows': len(state.df)}
+        }
+
+    async def load(self):
+        """(Re)load the dataset off the event loop, then swap it in"""
+        loop = asyncio.get_running_loop()
+        state = await loop.run_in_executor(self.executor, DatasetState, self.data_file)
+        self.state = state
+        self.cache.clear()
+        self.reloads += 1
+        logger.info(f"📂 Loaded {len(state.df)} records from {self.data_file}")
+
+    async def watch(self):
+        """Reload when a new processed dataset is published
+
+        A file that can't be loaded (corrupt, truncated, wrong columns) is
+        logged and skipped: the last good dataset keeps being served and the
+        next version of the file is tried again.
+        """
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                version = dataset_version(self.data_file)
+            except OSError:
+                # File is being replaced; try again on the next poll
+                continue
+            if version in (self.state.version, self.failed_version):
+                continue
+            try:
+                await self.load()
+            except Exception as e:
+                self.failed_version = version
+                logger.error(f"❌ Could not reload {self.data_file} ({type(e).__name__}: {e}); "
+                             f"still serving the previous version")
+
+    # Query handlers (run in the worker pool)
+
+    def _primary_kpis(self, state: DatasetState, filters: Dict) -> Dict:
+        return state.index.primary_kpis(**filters)
+
+    def _good_bad_loans(self, state: DatasetState, filters: Dict) -> Dict:
+        return state.index.good_bad_loans(**filters)
+
+    def _table(self, name: str):
+        def handler(state: DatasetState, filters: Dict):
+            if not filters:
+                return state.tables[name]
+            rows = state.index.filter(**filters)
+            if len(rows) == 0:
+                return state.tables[name].iloc[0:0]
+            return getattr(LoanKPICube.from_frame(state.df.iloc[rows]), name)()
+        return handler
+
+    def _metrics(self, state: DatasetState, filters: Dict) -> Dict:
+        latency = {}
+        for path, samples in self.latencies.items():
+            values = np.fromiter(samples, dtype='float64') * 1000
+            latency[path] = {'count': len(values),
+                             **{f'p{q}_ms': float(np.percentile(values, q)) for q in (50, 90, 99)}}
+        return {'cache': self.cache.stats(), 'latency': latency, 'reloads': self.reloads,
+                'rows': len(state.df), 'version': list(state.version)}
+
+    async def handle_query(self, target: str) -> Tuple[HTTPStatus, bytes]:
+        """Route one request target to a cached or freshly computed JSON body"""
+        url = urlsplit(target)
+        state = self.state
+        if url.path.startswith('/tables/') and url.path[len('/tables/'):] in state.tables:
+            handler = self._table(url.path[len('/tables/'):])
+        elif url.path in self.routes:
+            handler = self.routes[url.path]
+        else:
+            return HTTPStatus.NOT_FOUND, json.dumps({'error': f"unknown path {url.path}",
+                                                     'paths': list(self.routes) + [f'/tables/{name}' for name in state.tables]}).encode()
+        try:
+            filters = self._parse_filters(state, url.query)
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, json.dumps({'error': str(e)}).encode()
+
+        if url.path in ('/metrics', '/health'):
+            try:
+                return HTTPStatus.OK, json.dumps(_jsonable(handler(state, filters))).encode()
+            except Exception as e:
+                return _server_error(e)
+
+        key = (url.path, tuple(sorted((col, tuple(values)) for col, values in filters.items())), state.version)
+        body = self.cache.get(key)
+        if body is not None:
+            return HTTPStatus.OK, body
+        if key in self.in_flight:
+            self.cache.coalesced += 1
+        else:
+            self.cache.misses += 1
+            loop = asyncio.get_running_loop()
+            self.in_flight[key] = loop.run_in_executor(
+                self.executor, lambda: json.dumps(_jsonable(handler(state, filters))).encode())
+        try:
+            body = await asyncio.shield(self.in_flight[key])
+        except Exception as e:
+            # Not cached: the next identical request computes it again
+            return _server_error(e)
+        finally:
+            self.in_flight.pop(key, None)
+        self.cache.put(key, body)
+        return HTTPStatus.OK, body
+
+    @staticmethod
+    def _parse_filters(state: DatasetState, query: str) -> Dict[str, list]:
+        """``?grade=A,B&issue_month=3`` -> ``{'grade': ['A', 'B'], 'issue_month': [3]}``"""
+        filters = {}
+        for col, raw in parse_qsl(query):
+            if col not in state.index.dimensions:
+                raise ValueError(f"{col} is not a filterable dimension; use one of {state.index.dimensions}")
+            filters[col] = _filter_values(state.index, col, raw)
+        return filters
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1: GET requests, keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                start = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    status, body, version = HTTPStatus.BAD_REQUEST, b'{"error": "malformed request"}', 'HTTP/1.0'
+                else:
+                    if method != 'GET':
+                        status, body = HTTPStatus.METHOD_NOT_ALLOWED, b'{"error": "only GET is supported"}'
+                    else:
+                        status, body = await self.handle_query(target)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(body)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+                await writer.drain()
+                if status == HTTPStatus.OK:
+                    path = urlsplit(target).path
+                    self.latencies.setdefault(path, deque(maxlen=LATENCY_WINDOW)).append(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+        """Load the data and serve until cancelled"""
+        await self.load()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        watcher = asyncio.create_task(self.watch())
+        logger.info(f"🚀 Serving KPIs on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            self.executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve loan KPIs over HTTP from the processed dataset")
+    parser.add_argument('--data', required=True, help="Processed dataset (csv, parquet or feather)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-entries', type=int, default=DEFAULT_CACHE_ENTRIES)
+    parser.add_argument('--workers', type=int, default=None, help="Threads computing uncached queries")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    service = KPIService(args.data, cache_entries=args.cache_entries, workers=args.workers)
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# src/outliers.py
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+
+IQR_MULTIPLIER = 1.5
+
+
+class OutlierDetector:
+    """IQR outlier engine shared by DataValidator and LoanDataPreprocessor.
+
+    Bounds for all columns come from one vectorized quantile call and the
+    per-column checks are combined into a single boolean mask, so the caller
+    filters the frame once. ``sequential=True`` reproduces column-by-column
+    filtering (each column's bounds computed on the rows kept by the previous
+    columns); ``sequential=False`` takes every bound from the original data,
+    which makes the result independent of column order.
+    """
+
+    def __init__(self, columns: List[str], multiplier: float = IQR_MULTIPLIER):
+        self.columns = columns
+        self.multiplier = multiplier
+
+    def _bounds_from_quartiles(self, q1: float, q3: float) -> Tuple[float, float]:
+        iqr = q3 - q1
+        return q1 - self.multiplier * iqr, q3 + self.multiplier * iqr
+
+    def compute_bounds(self, df: pd.DataFrame) -> Dict[str, Tuple[float, float]]:
+        """Bounds for every numeric column in one quantile call"""
+        columns = [col for col in self.columns
+                   if col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
+        if not columns:
+            return {}
+        quartiles = df[columns].quantile([0.25, 0.75])
+        return {col: self._bounds_from_quartiles(quartiles.at[0.25, col], quartiles.at[0.75, col])
+                for col in columns}
+
+    def detect(self, df: pd.DataFrame, bounds: Dict[str, Tuple[float, float]] = None,
+               sequential: bool = False) -> Tuple[np.ndarray, Dict[str, Dict]]:
+        """Return (rows to keep, per-column report)
+
+        Precomputed ``bounds`` are used as given. Rows with a missing value in
+        a checked column are dropped, as the original filter did.
+        """
+        bounds = dict(bounds or {})
+        if not sequential:
+            missing = [col for col in self.columns if col not in bounds]
+            bounds.update(OutlierDetector(missing, self.multiplier).compute_bounds(df))
+
+        keep = np.ones(len(df), dtype=bool)
+        report = {}
+        for col in self.columns:
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy()
+            if col not in bounds:
+                if not pd.api.types.is_numeric_dtype(df[col]):
+                    continue
+                quartiles = df[col][keep].quantile([0.25, 0.75])
+                bounds[col] = self._bounds_from_quartiles(quartiles.iloc[0], quartiles.iloc[1])
+            lower_bound, upper_bound = bounds[col]
+
+            outlier_mask = (values < lower_bound) | (values > upper_bound)
+            # Sequential counts only rows still kept, like filtering one by one
+            scope = keep if sequential else np.ones(len(df), dtype=bool)
+            count = int((outlier_mask & scope).sum())
+            report[col] = {
+                'count': count,
+                'percentage': (count / scope.sum()) * 100 if scope.any() else 0.0,
+                'lower_bound': lower_bound,
+                'upper_bound': upper_bound
+            }
+            keep &= (values >= lower_bound) & (values <= upper_bound)
+        return keep, report
+
+
+def bounds_from_report(report: Dict[str, Dict]) -> Dict[str, Tuple[float, float]]:
+    """Extract ``{col: (lower, upper)}`` from an outlier report"""
+    return {col: (stats['lower_bound'], stats['upper_bound']) for col, stats in report.items()}
@@ -0,0 +1,210 @@
+# src/powerbi_export.py
+import os
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+from .data_preprocessing import DATE_COLUMNS
+from .data_export import output_path, publish_frame
+from .kpi_calculator import LoanKPICube
+
+FACT_TABLE = 'dashboard_main'
+SCHEMA_FILE = 'powerbi_schema.csv'
+DATE_DIMENSION = 'dim_date'
+
+# Dimension table -> natural key columns it replaces in the fact table
+STAR_DIMENSIONS = {
+    'dim_state': ['address_state'],
+    'dim_grade': ['grade', 'sub_grade'],
+    'dim_purpose': ['purpose'],
+    'dim_employment': ['emp_length'],
+    # Low-cardinality loan flags combined into one small "junk" dimension
+    'dim_loan_profile': ['term', 'home_ownership', 'verification_status', 'application_type',
+                         'loan_status', 'loan_category', 'income_bracket', 'dti_category']
+}
+# Covered by dim_date through issue_date_key
+DATE_PART_COLUMNS = ['issue_year', 'issue_month', 'issue_month_name']
+# Summary table -> (dimension, {summary column: dimension column}) it joins to
+SUMMARY_KEYS = {
+    'state_dimension': ('dim_state', {'address_state': 'address_state'}),
+    'grade_dimension': ('dim_grade', {'grade': 'grade', 'sub_grade': 'sub_grade'}),
+    'employment_dimension': ('dim_employment', {'emp_length': 'emp_length'}),
+    'purpose_analysis': ('dim_purpose', {'Purpose': 'purpose'})
+}
+SUMMARY_PURPOSES = {
+    'kpi_summary_cards': ('KPI_Name', 'KPI values for dashboard cards', 'Standalone for KPI cards'),
+    'monthly_trends_detailed': ('Date', 'Time series data for trend analysis', 'Filter by date range; date_key -> dim_date'),
+    'state_dimension': ('address_state', 'State-level aggregated metrics', 'Join on address_state / state_key'),
+    'grade_dimension': ('grade, sub_grade', 'Grade/Sub-grade aggregated metrics', 'Join on grade/sub_grade / grade_key'),
+    'employment_dimension': ('emp_length', 'Employment length aggregated metrics', 'Join on emp_length / employment_key'),
+    'purpose_analysis': ('Purpose', 'Purpose-level aggregated metrics', 'Join on purpose_key'),
+    'home_ownership_analysis': ('Home_Ownership, Loan_Category', 'Home ownership by loan category metrics', 'Standalone'),
+    'term_analysis': ('term', 'Term-level aggregated metrics', 'Standalone')
+}
+
+
+def key_name(dimension: str) -> str:
+    """Surrogate key column of a dimension table (dim_state -> state_key)"""
+    return f"{dimension[len('dim_'):]}_key"
+
+
+def _smallest_int(n: int):
+    return np.int16 if n < np.iinfo(np.int16).max else np.int32
+
+
+def date_key(dates: pd.Series) -> pd.Series:
+    """yyyymmdd integer key of each date (missing dates stay missing)"""
+    return (dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day).astype('Int32')
+
+
+class StarSchemaExporter:
+    """Power BI star schema from the clean loan data.
+
+    The fact table ``dashboard_main`` keeps one row per loan with its
+    measures and small integer keys; the repeated text (state, grade,
+    purpose, employment length, loan flags) moves to ``dim_*`` tables with
+    one row per distinct value, and every date column becomes a yyyymmdd key
+    into a contiguous ``dim_date`` calendar. Keys come from one grouped
+    ``ngroup()`` per dimension, so encoding is vectorized. The aggregated
+    dashboard tables from the KPI cube are exported alongside, carrying the
+    surrogate key of the dimension they summarize, and ``powerbi_schema.csv``
+    is rewritten to describe exactly the tables written.
+    """
+
+    def __init__(self, df: pd.DataFrame, cube: LoanKPICube = None):
+        self.df = df
+        self.cube = cube if cube is not None else LoanKPICube.from_frame(df)
+        self.dimensions = {}
+        self.fact = None
+
+    def _encode(self, name: str, columns: List[str]) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Dimension table and per-row surrogate keys (1..n) for ``columns``"""
+        grouped = self.df.groupby(columns, observed=True, dropna=False, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        dimension = grouped.size().reset_index()[columns]
+        key_dtype = _smallest_int(len(dimension) + 1)
+        dimension.insert(0, key_name(name), np.arange(1, len(dimension) + 1, dtype=key_dtype))
+        return dimension, (codes + 1).astype(key_dtype)
+
+    def _date_dimension(self, date_columns: List[str]) -> pd.DataFrame:
+        """Contiguous calendar covering every date in the data"""
+        firsts = [self.df[col].min() for col in date_columns]
+        lasts = [self.df[col].max() for col in date_columns]
+        dates = pd.date_range(min(firsts), max(lasts), freq='D')
+        return pd.DataFrame({
+            'date_key': date_key(pd.Series(dates)),
+            'Date': dates,
+            'Year': dates.year,
+            'Quarter': dates.quarter,
+            'Month_Number': dates.month,
+            'Month_Name': dates.month_name(),
+            'Day': dates.day
+        })
+
+    def build_fact(self) -> pd.DataFrame:
+        """Fact table with surrogate keys in place of the dimension columns"""
+        fact = {'id': self.df['id']} if 'id' in self.df.columns else {}
+        replaced = set(DATE_PART_COLUMNS)
+        for name, columns in STAR_DIMENSIONS.items():
+            columns = [col for col in columns if col in self.df.columns]
+            if not columns:
+                continue
+            self.dimensions[name], fact[key_name(name)] = self._encode(name, columns)
+            replaced.update(columns)
+
+        date_columns = [col for col in DATE_COLUMNS if col in self.df.columns
+                        and pd.api.types.is_datetime64_any_dtype(self.df[col])]
+        if date_columns:
+            self.dimensions[DATE_DIMENSION] = self._date_dimension(date_columns)
+            for col in date_columns:
+                fact[f'{col}_key'] = date_key(self.df[col])
+            replaced.update(date_columns)
+
+        for col in self.df.columns:
+            if col not in replaced and col not in fact:
+                fact[col] = self.df[col]
+        self.fact = pd.DataFrame(fact, index=self.df.index).reset_index(drop=True)
+        return self.fact
+
+    def _add_summary_key(self, table: pd.DataFrame, dimension_name: str, on: Dict[str, str]) -> pd.DataFrame:
+        """Attach the dimension key to a summary table
+
+        The summary may cover more than this batch (incremental KPI state),
+        so values missing from the dimension are appended with new keys.
+        Summary tables are small, so they are matched on the label text.
+        """
+        dimension = self.dimensions[dimension_name]
+        key = key_name(dimension_name)
+        columns = list(on.values())
+        lookup = {tuple(str(value) for value in values): row_key
+                  for row_key, *values in dimension[[key] + columns].itertuples(index=False, name=None)}
+        next_key = int(dimension[key].max()) + 1 if len(dimension) else 1
+        keys, new_rows = [], []
+        for values in table[list(on)].itertuples(index=False, name=None):
+            labels = tuple(str(value) for value in values)
+            if labels not in lookup:
+                lookup[labels] = next_key
+                new_rows.append((next_key, *values))
+                next_key += 1
+            keys.append(lookup[labels])
+        if new_rows:
+            self.dimensions[dimension_name] = pd.concat(
+                [dimension, pd.DataFrame(new_rows, columns=[key] + columns)], ignore_index=True)
+        result = table.copy()
+        result.insert(0, key, np.asarray(keys, dtype=_smallest_int(next_key)))
+        return result
+
+    def build_summaries(self) -> Dict[str, pd.DataFrame]:
+        """Cube export tables with the keys of the dimensions they aggregate"""
+        summaries = self.cube.export_tables()
+        for name, (dimension_name, on) in SUMMARY_KEYS.items():
+            if name in summaries and dimension_name in self.dimensions:
+                summaries[name] = self._add_summary_key(summaries[name], dimension_name, on)
+        if 'monthly_trends_detailed' in summaries and DATE_DIMENSION in self.dimensions:
+            monthly = summaries['monthly_trends_detailed']
+            monthly.insert(0, 'date_key', date_key(monthly['Date']))
+        return summaries
+
+    def build(self) -> Dict[str, pd.DataFrame]:
+        """Every table of the model, keyed by export file name"""
+        fact = self.build_fact()
+        summaries = self.build_summaries()
+        return {FACT_TABLE: fact, **self.dimensions, **summaries}
+
+    def schema(self, tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """powerbi_schema.csv rows describing ``tables``"""
+        fact_keys = [col for col in tables[FACT_TABLE].columns if col.endswith('_key')]
+        rows = [{
+            'Table_Name': FACT_TABLE,
+            'Primary_Key': 'id',
+            'Purpose': 'Main fact table with all loan records (integer keys to the dim_* tables)',
+            'Relationships': 'Central fact table; ' + ', '.join(fact_keys)
+        }]
+        for name in self.dimensions:
+            key = 'date_key' if name == DATE_DIMENSION else key_name(name)
+            columns = [col for col in tables[name].columns if col != key]
+            rows.append({
+                'Table_Name': name,
+                'Primary_Key': key,
+                'Purpose': f"Dimension: {', '.join(columns)}",
+                'Relationships': (f"1-to-many to {FACT_TABLE} on issue_date_key (other *_date_key inactive)"
+                                  if name == DATE_DIMENSION else f"1-to-many to {FACT_TABLE} on {key}")
+            })
+        for name in tables:
+            if name in SUMMARY_PURPOSES:
+                primary_key, purpose, relationships = SUMMARY_PURPOSES[name]
+                rows.append({'Table_Name': name, 'Primary_Key': primary_key,
+                             'Purpose': purpose, 'Relationships': relationships})
+        return pd.DataFrame(rows)
+
+    def write(self, directory: str, fmt: str = 'csv') -> List[str]:
+        """Write every table and the schema file into ``directory``"""
+        tables = self.build()
+        paths = []
+        for name, table in tables.items():
+            path = output_path(os.path.join(directory, name), fmt)
+            publish_frame(table, [path], fmt=fmt)
+            paths.append(path)
+        schema_path = os.path.join(directory, SCHEMA_FILE)
+        self.schema(tables).to_csv(schema_path, index=False)
+        paths.append(schema_path)
+        return paths
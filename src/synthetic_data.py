@@ -0,0 +1,129 @@
+# src/synthetic_data.py
+import os
+import pandas as pd
+import numpy as np
+from typing import Dict
+from .config import DATE_FORMAT
+from .data_preprocessing import OUTLIER_COLUMNS
+
+# Default distributions, taken from the 2021 portfolio exports
+DEFAULT_STATE_WEIGHTS = {
+    'CA': 6367, 'NY': 3395, 'FL': 2593, 'TX': 2413, 'NJ': 1649, 'PA': 1415, 'IL': 1384, 'VA': 1278,
+    'GA': 1259, 'MA': 1208, 'OH': 1129, 'MD': 956, 'AZ': 779, 'WA': 758, 'CO': 725, 'NC': 702,
+    'CT': 657, 'MI': 645, 'MO': 628, 'MN': 562, 'NV': 446, 'SC': 437, 'OR': 423, 'WI': 420,
+    'AL': 402, 'LA': 391, 'KY': 301, 'OK': 283, 'KS': 244, 'UT': 237, 'AR': 226, 'DC': 191,
+    'RI': 188, 'NM': 172, 'HI': 161, 'WV': 156, 'NH': 149, 'DE': 104, 'WY': 78, 'MT': 74,
+    'AK': 67, 'SD': 62, 'VT': 53, 'MS': 19, 'TN': 17, 'IN': 9, 'ID': 6, 'IA': 5, 'NE': 5, 'ME': 3
+}
+DEFAULT_GRADE_WEIGHTS = {'A': 9145, 'B': 10777, 'C': 7322, 'D': 4729, 'E': 2279, 'F': 795, 'G': 227}
+DEFAULT_PURPOSE_WEIGHTS = {
+    'Debt consolidation': 16948, 'car': 1453, 'credit card': 4670, 'educational': 304,
+    'home improvement': 2482, 'house': 321, 'major purchase': 1996, 'medical': 624, 'moving': 533,
+    'other': 3617, 'renewable_energy': 86, 'small business': 1566, 'vacation': 342, 'wedding': 889
+}
+EMP_LENGTH_WEIGHTS = {
+    '< 1 year': 4347, '1 year': 3070, '2 years': 4141, '3 years': 3843, '4 years': 3232,
+    '5 years': 3052, '6 years': 2088, '7 years': 1664, '8 years': 1343, '9 years': 1164,
+    '10+ years': 7887
+}
+HOME_OWNERSHIP_WEIGHTS = {'MORTGAGE': 15307, 'NONE': 3, 'OTHER': 93, 'OWN': 2671, 'RENT': 17757}
+LOAN_STATUS_WEIGHTS = {'Fully Paid': 0.833, 'Current': 0.029, 'Charged Off': 0.138}
+EMP_TITLES = ['Teacher', 'Manager', 'Registered Nurse', 'US Army', 'Engineer', 'Sales', 'Driver',
+              'Supervisor', 'Project Manager', 'Bank of America', 'Walmart', 'Self-employed']
+# Interest rate of sub-grade 1 per grade; each sub-grade step adds ~0.4 points
+BASE_GRADE_RATES = {'A': 0.06, 'B': 0.10, 'C': 0.13, 'D': 0.15, 'E': 0.17, 'F': 0.19, 'G': 0.21}
+
+# Columns that get blanks at ``missing_rate`` (values of OUTLIER_COLUMNS are pushed out at ``outlier_rate``)
+NULLABLE_COLUMNS = ['emp_length', 'emp_title', 'annual_income', 'last_credit_pull_date',
+                    'last_payment_date', 'next_payment_date']
+
+
+def _choice(rng: np.random.Generator, weights: Dict[str, float], size: int) -> np.ndarray:
+    labels = np.array(list(weights), dtype=object)
+    probabilities = np.array(list(weights.values()), dtype='float64')
+    return labels[rng.choice(len(labels), size=size, p=probabilities / probabilities.sum())]
+
+
+def _dates_2021(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Random 2021 dates as DATE_FORMAT strings (365 labels formatted once)"""
+    labels = pd.date_range('2021-01-01', periods=365).strftime(DATE_FORMAT).to_numpy(dtype=object)
+    return labels[rng.integers(0, 365, size=size)]
+
+
+def generate_loan_data(n_rows: int, seed: int = 0, missing_rate: float = 0.01,
+                       outlier_rate: float = 0.005, state_weights: Dict[str, float] = None,
+                       grade_weights: Dict[str, float] = None, purpose_weights: Dict[str, float] = None,
+                       start_id: int = 1) -> pd.DataFrame:
+    """Synthetic loans shaped like financial_loan.csv
+
+    Covers every REQUIRED_COLUMNS column plus the other raw columns, with
+    dates as DATE_FORMAT strings, blanks in NULLABLE_COLUMNS at
+    ``missing_rate`` and extreme annual_income/loan_amount/dti values at
+    ``outlier_rate``.
+    """
+    rng = np.random.default_rng(seed)
+
+    grade = _choice(rng, grade_weights or DEFAULT_GRADE_WEIGHTS, n_rows)
+    sub_level = rng.integers(1, 6, size=n_rows)
+    base_rate = pd.Series(grade).map(BASE_GRADE_RATES).to_numpy(dtype='float64')
+    int_rate = np.round(base_rate + (sub_level - 1) * 0.004 + rng.normal(0, 0.003, n_rows), 4)
+    term_months = np.where(rng.random(n_rows) < 0.75, 36, 60)
+    loan_amount = rng.integers(20, 1400, size=n_rows) * 25.0
+    monthly_rate = int_rate / 12
+    installment = np.round(loan_amount * monthly_rate / (1 - (1 + monthly_rate) ** -term_months), 2)
+    loan_status = _choice(rng, LOAN_STATUS_WEIGHTS, n_rows)
+    # Good loans repay roughly the full schedule, charged-off loans a part of it
+    repaid_share = np.where(loan_status == 'Charged Off', rng.uniform(0.2, 0.8, n_rows), rng.uniform(0.95, 1.05, n_rows))
+    total_payment = np.round(installment * term_months * repaid_share)
+
+    df = pd.DataFrame({
+        'id': np.arange(start_id, start_id + n_rows),
+        'address_state': _choice(rng, state_weights or DEFAULT_STATE_WEIGHTS, n_rows),
+        'application_type': np.where(rng.random(n_rows) < 0.999, 'INDIVIDUAL', 'JOINT'),
+        'emp_length': _choice(rng, EMP_LENGTH_WEIGHTS, n_rows),
+        'emp_title': np.array(EMP_TITLES, dtype=object)[rng.integers(0, len(EMP_TITLES), n_rows)],
+        'grade': grade,
+        'home_ownership': _choice(rng, HOME_OWNERSHIP_WEIGHTS, n_rows),
+        'issue_date': _dates_2021(rng, n_rows),
+        'last_credit_pull_date': _dates_2021(rng, n_rows),
+        'last_payment_date': _dates_2021(rng, n_rows),
+        'loan_status': loan_status,
+        'next_payment_date': _dates_2021(rng, n_rows),
+        'member_id': np.arange(start_id, start_id + n_rows) + 1_000_000,
+        'purpose': _choice(rng, purpose_weights or DEFAULT_PURPOSE_WEIGHTS, n_rows),
+        'sub_grade': grade.astype(object) + sub_level.astype(str).astype(object),
+        'term': np.where(term_months == 36, ' 36 months', ' 60 months'),
+        'verification_status': _choice(rng, {'Not Verified': 0.43, 'Verified': 0.32, 'Source Verified': 0.25}, n_rows),
+        'annual_income': np.round(rng.lognormal(11.0, 0.5, n_rows), -2),
+        'dti': np.round(rng.uniform(0, 0.3, n_rows), 4),
+        'installment': installment,
+        'int_rate': int_rate,
+        'loan_amount': loan_amount,
+        'total_acc': rng.integers(2, 60, size=n_rows),
+        'total_payment': total_payment
+    })
+
+    if outlier_rate > 0:
+        for col in OUTLIER_COLUMNS:
+            outliers = rng.random(n_rows) < outlier_rate
+            df.loc[outliers, col] = df.loc[outliers, col] * rng.uniform(5, 20, outliers.sum())
+    if missing_rate > 0:
+        for col in NULLABLE_COLUMNS:
+            df.loc[rng.random(n_rows) < missing_rate, col] = np.nan
+    return df
+
+
+def write_loan_csv(path: str, n_rows: int, seed: int = 0, chunksize: int = 1_000_000, **kwargs) -> str:
+    """Write ``n_rows`` synthetic loans to CSV chunk by chunk (memory bounded by ``chunksize``)
+
+    Chunk seeds are spawned from ``seed``, so the file is reproducible.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    seeds = np.random.SeedSequence(seed).spawn((n_rows + chunksize - 1) // chunksize)
+    written = 0
+    for chunk_seed in seeds:
+        rows = min(chunksize, n_rows - written)
+        chunk = generate_loan_data(rows, seed=chunk_seed, start_id=written + 1, **kwargs)
+        chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += rows
+    return path
@@ -0,0 +1,37 @@
+# tests/conftest.py
+import pandas as pd
+import pytest
+from src.data_preprocessing import LoanDataPreprocessor
+from src.synthetic_data import write_loan_csv
+
+# Small synthetic book with enough blanks and outliers to exercise every step
+N_ROWS = 3000
+SEED = 7
+# The in-memory pipeline main.py runs, in order
+PIPELINE_STEPS = ['clean_column_names', 'handle_missing_values', 'convert_data_types', 'create_derived_features',
+                  'add_payment_metrics', 'remove_outliers', 'optimize_dtypes']
+
+
+def run_pipeline(preprocessor: LoanDataPreprocessor, steps=PIPELINE_STEPS) -> LoanDataPreprocessor:
+    """Call ``steps`` with their defaults on ``preprocessor`` (queued only in lazy mode)"""
+    for step in steps:
+        getattr(preprocessor, step)()
+    return preprocessor
+
+
+@pytest.fixture(scope='session')
+def loan_csv(tmp_path_factory) -> str:
+    """financial_loan.csv-shaped file from the synthetic generator"""
+    path = tmp_path_factory.mktemp('raw') / 'financial_loan.csv'
+    return write_loan_csv(str(path), N_ROWS, seed=SEED, missing_rate=0.05, outlier_rate=0.01)
+
+
+@pytest.fixture
+def raw_df(loan_csv) -> pd.DataFrame:
+    return pd.read_csv(loan_csv)
+
+
+@pytest.fixture(scope='session')
+def clean_df(loan_csv) -> pd.DataFrame:
+    """Output of the whole pipeline on ``loan_csv`` (shared: don't modify it)"""
+    return run_pipeline(LoanDataPreprocessor(pd.read_csv(loan_csv), random_state=0)).get_clean_data()
@@ -0,0 +1,96 @@
+# tests/test_amortization.py
+import numpy as np
+import pandas as pd
+import pytest
+from src.amortization import amortization_schedules, payment_performance, term_months
+
+
+def _installment(principal: float, rate: float, months: int) -> float:
+    monthly_rate = rate / 12
+    if monthly_rate == 0:
+        return round(principal / months, 2)
+    return round(principal * monthly_rate / (1 - (1 + monthly_rate) ** -months), 2)
+
+
+@pytest.fixture
+def loans() -> pd.DataFrame:
+    """36- and 60-month loans, one at 0% and one without a term"""
+    df = pd.DataFrame({
+        'id': [1, 2, 3, 4],
+        'loan_amount': [10000.0, 25000.0, 6000.0, 5000.0],
+        'int_rate': [0.12, 0.09, 0.0, 0.10],
+        'term': [' 36 months', ' 60 months', ' 36 months', None],
+        'issue_date': pd.to_datetime(['2021-01-15', '2021-03-01', '2021-02-10', '2021-01-01']),
+        'last_payment_date': pd.to_datetime(['2021-12-15', '2021-12-01', '2021-12-10', '2021-06-01']),
+        'loan_status': ['Current', 'Current', 'Fully Paid', 'Charged Off'],
+        'total_payment': [3500.0, 4000.0, 6000.0, 900.0]
+    })
+    df['installment'] = [_installment(amount, rate, months)
+                         for amount, rate, months in zip(df['loan_amount'], df['int_rate'], [36, 60, 36, 36])]
+    return df
+
+
+def test_term_months_parses_labels_and_keeps_missing():
+    months = term_months(pd.Series([' 36 months', ' 60 months', None, ' 36 months']))
+    np.testing.assert_array_equal(months, [36, 60, np.nan, 36])
+
+
+def test_payment_performance(loans):
+    result = payment_performance(loans, as_of='2021-12-15')
+    assert result['term_months'].tolist()[:3] == [36, 60, 36]
+    # 11 whole months since 2021-01-15, 9 since 2021-03-01 (day 15 < day 1 is false), 10 since 2021-02-10
+    assert result['payments_due'].tolist()[:3] == [11, 9, 10]
+    np.testing.assert_allclose(result['scheduled_paid'], loans['installment'] * result['payments_due'], atol=0.01)
+    np.testing.assert_allclose(result['payment_shortfall'], result['scheduled_paid'] - loans['total_payment'],
+                               atol=0.01)
+    np.testing.assert_allclose(result['recovery_rate'], loans['total_payment'] / loans['loan_amount'])
+    # 0% loan: the balance drops by a level share of the principal every month
+    assert result.loc[2, 'expected_balance'] == pytest.approx(6000 - 10 * loans.loc[2, 'installment'], abs=0.01)
+    # A fully repaid 0% loan earned nothing
+    assert result.loc[2, 'realized_yield'] == pytest.approx(0.0)
+    # Without a term nothing can be scheduled
+    assert result.loc[3, ['term_months', 'payments_due', 'realized_yield']].isna().all()
+
+
+def test_payment_performance_caps_payments_due_at_term(loans):
+    result = payment_performance(loans, as_of='2030-01-01')
+    assert result['payments_due'].tolist()[:3] == [36, 60, 36]
+    assert result['expected_balance'].iloc[:3].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_expected_balance_matches_schedule(loans):
+    performance = payment_performance(loans, as_of='2021-12-15')
+    schedule = pd.concat(amortization_schedules(loans))
+    for row in performance.index[:3]:
+        loan = schedule[schedule['id'] == loans.loc[row, 'id']]
+        due = int(performance.loc[row, 'payments_due'])
+        assert loan.loc[loan['payment_number'] == due, 'balance'].item() == pytest.approx(
+            performance.loc[row, 'expected_balance'], abs=0.01)
+
+
+def test_schedules_close_at_zero_and_repay_principal(loans):
+    schedule = pd.concat(amortization_schedules(loans))
+    per_loan = schedule.groupby('id').agg(payments=('payment_number', 'size'), principal=('principal', 'sum'),
+                                          closing=('balance', 'last'))
+    # The loan without a term has no schedule
+    assert per_loan.index.tolist() == [1, 2, 3]
+    assert per_loan['payments'].tolist() == [36, 60, 36]
+    assert (per_loan['closing'] == 0).all()
+    # Each row is rounded to the cent, so the total may drift by half a cent per payment
+    for loan_id, row in per_loan.iterrows():
+        amount = loans.set_index('id').loc[loan_id, 'loan_amount']
+        assert abs(row['principal'] - amount) <= 0.005 * row['payments']
+    np.testing.assert_allclose(schedule['payment'], schedule['interest'] + schedule['principal'], atol=0.011)
+    # 0% loan: no interest, level principal
+    assert (schedule.loc[schedule['id'] == 3, 'interest'] == 0).all()
+
+
+@pytest.mark.parametrize('max_rows', [1, 36, 50, 96, 1000])
+def test_schedule_chunks_stay_bounded(loans, max_rows):
+    chunks = list(amortization_schedules(loans, max_rows=max_rows))
+    # A loan longer than max_rows gets a chunk of its own, never more than its term
+    assert all(len(chunk) <= max(max_rows, 60) for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == 36 + 60 + 36
+    ids = pd.concat(chunks)['id']
+    # Every loan's schedule lives in a single chunk
+    assert sum(chunk['id'].nunique() for chunk in chunks) == ids.nunique()
@@ -0,0 +1,20 @@
+# tests/test_checkpoint.py
+import pandas as pd
+from src.checkpoint import CheckpointCache
+from src.data_preprocessing import LoanDataPreprocessor
+from tests.conftest import run_pipeline
+
+
+def _run(path, checkpoints=None) -> pd.DataFrame:
+    return run_pipeline(LoanDataPreprocessor.from_csv(path, checkpoints=checkpoints, random_state=5)).get_clean_data()
+
+
+def test_cached_matches_uncached(loan_csv, tmp_path):
+    expected = _run(loan_csv)
+    cache = CheckpointCache(str(tmp_path / 'checkpoints'))
+    pd.testing.assert_frame_equal(_run(loan_csv, cache), expected)
+    assert cache.hits == 0
+
+    misses = cache.misses
+    pd.testing.assert_frame_equal(_run(loan_csv, cache), expected)
+    assert cache.misses == misses and cache.hits > 0
@@ -0,0 +1,43 @@
+# tests/test_chunked_preprocessing.py
+import pandas as pd
+import pytest
+from src.chunked_preprocessing import ChunkedLoanDataPreprocessor
+from src.data_preprocessing import LoanDataPreprocessor
+from src.data_export import output_path, publish_frame, read_frame
+from src.kpi_calculator import LoanKPICube
+from tests.conftest import run_pipeline
+
+
+def in_memory_clean(raw_df: pd.DataFrame, seed: int) -> pd.DataFrame:
+    """Same steps as the streaming run, on the whole frame"""
+    return run_pipeline(LoanDataPreprocessor(raw_df, random_state=seed)).get_clean_data()
+
+
+@pytest.mark.parametrize('chunksize', [500, 1234])
+def test_chunked_matches_in_memory(loan_csv, raw_df, tmp_path, chunksize):
+    expected = in_memory_clean(raw_df, seed=3)
+    chunked = ChunkedLoanDataPreprocessor(loan_csv, chunksize=chunksize, random_state=3)
+    chunked.run([str(tmp_path / 'chunked.csv')])
+    # Written and read back the same way
+    publish_frame(expected, [str(tmp_path / 'in_memory.csv')])
+    pd.testing.assert_frame_equal(read_frame(str(tmp_path / 'chunked.csv')),
+                                  read_frame(str(tmp_path / 'in_memory.csv')))
+
+    tables, expected_tables = chunked.cube.export_tables(), LoanKPICube.from_frame(expected).export_tables()
+    for name in expected_tables:
+        pd.testing.assert_frame_equal(tables[name], expected_tables[name], check_categorical=False)
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'feather'])
+def test_chunked_keeps_the_in_memory_schema(loan_csv, raw_df, tmp_path, fmt):
+    path = output_path(str(tmp_path / 'chunked'), fmt)
+    ChunkedLoanDataPreprocessor(loan_csv, chunksize=700, random_state=3).run([path], fmt=fmt)
+    pd.testing.assert_frame_equal(read_frame(path), in_memory_clean(raw_df, seed=3).reset_index(drop=True))
+
+
+def test_chunked_writes_every_output(loan_csv, tmp_path):
+    outputs = [str(tmp_path / 'clean.csv'), str(tmp_path / 'powerbi.csv')]
+    summary = ChunkedLoanDataPreprocessor(loan_csv, chunksize=1000, random_state=0).run(outputs).get_preprocessing_summary()
+    first, second = (read_frame(path) for path in outputs)
+    pd.testing.assert_frame_equal(first, second)
+    assert summary['total_records'] == len(first)
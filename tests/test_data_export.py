@@ -0,0 +1,29 @@
+# tests/test_data_export.py
+import os
+import pandas as pd
+import pytest
+from src.data_export import FrameWriter, publish_frame, read_frame
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'feather'])
+def test_publish_round_trip(tmp_path, fmt):
+    df = pd.DataFrame({'id': [1, 2, 3], 'grade': pd.Categorical(['A', 'B', 'A']), 'loan_amount': [100.0, 250.5, 75.0]})
+    paths = [str(tmp_path / f'clean.{fmt}'), str(tmp_path / f'powerbi.{fmt}')]
+    publish_frame(df, paths)
+    for path in paths:
+        reloaded = read_frame(path)
+        pd.testing.assert_frame_equal(reloaded, df, check_dtype=False, check_categorical=False)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in paths)
+
+
+def test_failed_write_keeps_the_published_file(tmp_path):
+    path = str(tmp_path / 'clean.csv')
+    publish_frame(pd.DataFrame({'id': [1, 2]}), [path])
+    with pytest.raises(RuntimeError):
+        with FrameWriter(path) as writer:
+            writer.write(pd.DataFrame({'id': [3, 4, 5]}))
+            # Nothing of the new file is visible until the writer closes
+            assert read_frame(path)['id'].tolist() == [1, 2]
+            raise RuntimeError("interrupted")
+    assert read_frame(path)['id'].tolist() == [1, 2]
+    assert os.listdir(tmp_path) == ['clean.csv']
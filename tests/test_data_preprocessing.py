@@ -0,0 +1,25 @@
+# tests/test_data_preprocessing.py
+import numpy as np
+import pandas as pd
+from src.data_preprocessing import LoanDataPreprocessor, CATEGORICAL_COLUMNS, INTEGER_DTYPES
+from src.synthetic_data import generate_loan_data
+from tests.conftest import run_pipeline
+
+
+def optimized(raw: pd.DataFrame) -> pd.DataFrame:
+    return run_pipeline(LoanDataPreprocessor(raw, random_state=0)).get_clean_data()
+
+
+def test_dtype_plan_is_the_same_for_every_batch():
+    whole = generate_loan_data(500, seed=1)
+    cents = generate_loan_data(800, seed=2)
+    # A batch whose money columns are not all whole amounts
+    cents['total_payment'] += 0.25
+    cents['loan_amount'] += 0.5
+    first, second = optimized(whole), optimized(cents)
+    pd.testing.assert_series_equal(first.dtypes.astype(str), second.dtypes.astype(str))
+    assert first['total_payment'].dtype == np.float64
+    for col, dtype in INTEGER_DTYPES.items():
+        assert first[col].dtype == dtype
+    for col in CATEGORICAL_COLUMNS:
+        assert isinstance(first[col].dtype, pd.CategoricalDtype)
@@ -0,0 +1,35 @@
+# tests/test_data_validator.py
+import pytest
+from src.data_validator import DataValidationError, DataValidator, VALIDATION_MODES, sample_size, validate_csv
+from tests.conftest import N_ROWS
+
+
+@pytest.mark.parametrize('mode', VALIDATION_MODES)
+def test_synthetic_data_passes_with_dti_warning(loan_csv, mode):
+    report = validate_csv(loan_csv, mode=mode, chunksize=700, random_state=0)
+    assert report['passed']
+    assert report['rows_total'] == N_ROWS
+    assert report['warnings'] == ['dti_range']
+    assert report['rules']['dti_range']['severity'] == 'warning'
+
+
+def test_sample_mode_size(loan_csv):
+    report = validate_csv(loan_csv, mode='sample', chunksize=700, margin=0.05, random_state=0)
+    assert report['rows_checked'] == sample_size(N_ROWS, margin=0.05) < N_ROWS
+
+
+def test_fail_fast_reports_rows_total(raw_df, tmp_path):
+    raw_df['int_rate'] = raw_df['int_rate'].astype(object)
+    raw_df.loc[1000, 'int_rate'] = 'abc'
+    path = tmp_path / 'bad.csv'
+    raw_df.to_csv(path, index=False)
+    with pytest.raises(DataValidationError):
+        validate_csv(str(path), chunksize=700)
+    report = validate_csv(str(path), chunksize=700, raise_on_error=False)
+    assert not report['passed']
+    assert (report['rows_checked'], report['rows_total'], report['stopped_at_row']) == (1400, N_ROWS, 700)
+    assert report['rules']['int_rate_range']['examples'] == ['abc']
+
+
+def test_frame_rules_match_csv(raw_df, loan_csv):
+    assert DataValidator(raw_df).check_rules()['warnings'] == validate_csv(loan_csv, mode='full')['warnings']
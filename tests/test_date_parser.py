@@ -0,0 +1,71 @@
+# tests/test_date_parser.py
+import json
+import pandas as pd
+from src.date_parser import DateParser, AUTO_FORMAT
+
+DAY_FIRST = ['15-01-2021', '28-02-2021', '03-11-2021', None, '15-01-2021']
+MONTH_FIRST = ['01/15/2021', '02/28/2021', '11/03/2021', None, '01/15/2021']
+EXPECTED = pd.to_datetime(['2021-01-15', '2021-02-28', '2021-11-03', None, '2021-01-15'])
+
+
+def _dates(values) -> list:
+    return pd.Series(pd.DatetimeIndex(values)).tolist()
+
+
+def test_first_value_in_another_format_does_not_blank_the_column():
+    # Regression: inferring the format from the first value coerced every other row to NaT
+    values = pd.Series(['2021-01-05'] + DAY_FIRST)
+    parsed, fmt = DateParser().parse(values, 'issue_date')
+    assert fmt == '%d-%m-%Y'
+    assert _dates(parsed.iloc[1:]) == _dates(EXPECTED)
+    # Only the odd value is lost
+    assert parsed.isna().sum() == 2
+
+
+def test_detects_day_first_and_month_first():
+    parser = DateParser()
+    day_first, day_format = parser.parse(pd.Series(DAY_FIRST), 'issue_date')
+    month_first, month_format = parser.parse(pd.Series(MONTH_FIRST), 'last_payment_date')
+    assert (day_format, month_format) == ('%d-%m-%Y', '%m/%d/%Y')
+    assert _dates(day_first) == _dates(EXPECTED) == _dates(month_first)
+    assert parser.column_formats == {'issue_date': '%d-%m-%Y', 'last_payment_date': '%m/%d/%Y'}
+    assert parser.format_hits == {'%d-%m-%Y': 4, '%m/%d/%Y': 4}
+
+
+def test_cached_format_is_reused(tmp_path):
+    cache_file = str(tmp_path / 'date_formats.json')
+    # Ambiguous values: detection would pick the first candidate that parses all of them
+    ambiguous = pd.Series(['01/02/2021', '03/04/2021'])
+    formats = ['%d/%m/%Y', '%m/%d/%Y']
+    assert DateParser(formats)._count_parsed(ambiguous.to_numpy(dtype=object), '%d/%m/%Y') == 2
+
+    DateParser(formats, cache_file=cache_file, column_formats={'issue_date': '%m/%d/%Y'}).save_cache()
+    parsed, fmt = DateParser(formats, cache_file=cache_file).parse(ambiguous, 'issue_date')
+    assert fmt == '%m/%d/%Y'
+    assert _dates(parsed) == _dates(['2021-01-02', '2021-03-04'])
+
+
+def test_redetects_when_cached_format_stops_parsing(tmp_path):
+    cache_file = str(tmp_path / 'date_formats.json')
+    with open(cache_file, 'w') as f:
+        json.dump({'issue_date': '%m/%d/%Y'}, f)
+    parser = DateParser(cache_file=cache_file)
+    parsed, fmt = parser.parse(pd.Series(DAY_FIRST), 'issue_date')
+    assert fmt == '%d-%m-%Y'
+    assert _dates(parsed) == _dates(EXPECTED)
+    # The new format replaces the stale one, in memory and on disk
+    with open(cache_file) as f:
+        assert json.load(f) == {'issue_date': '%d-%m-%Y'}
+
+
+def test_without_detection_the_known_format_is_used():
+    parser = DateParser(column_formats={'issue_date': '%m/%d/%Y'}, detect=False)
+    parsed, fmt = parser.parse(pd.Series(DAY_FIRST), 'issue_date')
+    assert fmt == '%m/%d/%Y'
+    assert parsed.isna().all()
+
+
+def test_falls_back_to_inference_when_no_candidate_parses():
+    parsed, fmt = DateParser().parse(pd.Series(['January 5, 2021', 'March 1, 2021']), 'issue_date')
+    assert fmt == AUTO_FORMAT
+    assert _dates(parsed) == _dates(['2021-01-05', '2021-03-01'])
@@ -0,0 +1,38 @@
+# tests/test_execution_plan.py
+import pandas as pd
+import pytest
+from src.data_preprocessing import LoanDataPreprocessor
+from tests.conftest import run_pipeline
+
+
+def _run(raw_df: pd.DataFrame, lazy: bool) -> LoanDataPreprocessor:
+    return run_pipeline(LoanDataPreprocessor(raw_df, random_state=4, lazy=lazy)).collect()
+
+
+def test_lazy_matches_eager(raw_df):
+    eager, lazy = _run(raw_df, lazy=False), _run(raw_df, lazy=True)
+    pd.testing.assert_frame_equal(lazy.df, eager.df)
+    assert lazy.memory_report['dtype_plan'] == eager.memory_report['dtype_plan']
+    for key in ['before_bytes', 'after_bytes']:
+        assert lazy.memory_report[key] == pytest.approx(eager.memory_report[key], rel=1e-3)
+    assert any('fused' in step for step in lazy.preprocessing_log)
+
+
+def test_eager_is_the_default(raw_df):
+    preprocessor = LoanDataPreprocessor(raw_df).clean_column_names()
+    assert preprocessor._plan is None
+    assert list(preprocessor.df.columns) == [col.strip().lower() for col in raw_df.columns]
+
+
+def test_select_prunes_unused_steps(raw_df):
+    preprocessor = LoanDataPreprocessor(raw_df, random_state=4, lazy=True)
+    (preprocessor
+     .clean_column_names()
+     .handle_missing_values()
+     .convert_data_types()
+     .create_derived_features()
+     .add_payment_metrics()
+     .select(['id', 'loan_category']))
+    plan = preprocessor.explain()
+    assert 'dropped add_payment_metrics' in plan
+    assert list(preprocessor.get_clean_data().columns) == ['id', 'loan_category']
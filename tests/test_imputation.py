@@ -0,0 +1,30 @@
+# tests/test_imputation.py
+import pandas as pd
+import pytest
+from src.data_preprocessing import DATE_COLUMNS, LoanDataPreprocessor
+from src.imputation import GROUP_FILLS, GroupFill, load_fill_values, save_fill_values
+
+
+def _fill(raw_df: pd.DataFrame, **kwargs) -> LoanDataPreprocessor:
+    return LoanDataPreprocessor(raw_df, random_state=0).clean_column_names().handle_missing_values(**kwargs)
+
+
+def test_saved_fill_values_fill_a_new_batch_the_same_way(raw_df, tmp_path):
+    first = _fill(raw_df, group_by=GROUP_FILLS)
+    path = str(tmp_path / 'fill_values.pkl')
+    save_fill_values(first.fill_values, path)
+    fill_values = load_fill_values(path)
+    assert isinstance(fill_values['annual_income'], GroupFill)
+
+    # The batch's own statistics differ from the first run's, the reused values don't
+    # (missing dates are random draws, not fill values)
+    batch = raw_df.iloc[:500]
+    reused = _fill(batch, fill_values=fill_values)
+    columns = [col for col in first.df.columns if col not in DATE_COLUMNS]
+    pd.testing.assert_frame_equal(reused.df[columns], first.df[columns].iloc[:500])
+    assert not _fill(batch).df[columns].equals(reused.df[columns])
+
+
+def test_load_fill_values_without_a_saved_run(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_fill_values(str(tmp_path / 'fill_values.pkl'))
@@ -0,0 +1,86 @@
+# tests/test_kpi_calculator.py
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.kpi_calculator import KPIStateStore, LoanKPICalculator, LoanKPICube
+
+
+def test_cube_matches_direct_groupbys(clean_df):
+    cube = LoanKPICube.from_frame(clean_df)
+    tables = cube.export_tables()
+
+    state = clean_df.groupby('address_state', observed=True).agg(
+        Total_Apps=('loan_amount', 'size'), Total_Funded=('loan_amount', 'sum'),
+        Avg_Interest_Rate=('int_rate', 'mean')).round(2).reset_index()
+    pd.testing.assert_frame_equal(tables['state_dimension'][list(state.columns)], state,
+                                  check_dtype=False, check_categorical=False)
+
+    monthly = clean_df.groupby(['issue_year', 'issue_month'], observed=True).agg(
+        Total_Applications=('loan_amount', 'size'), Total_Received=('total_payment', 'sum'),
+        Avg_DTI=('dti', 'mean')).reset_index(drop=True)
+    pd.testing.assert_frame_equal(tables['monthly_trends_detailed'][list(monthly.columns)].reset_index(drop=True),
+                                  monthly, check_dtype=False)
+
+    calculator = LoanKPICalculator(clean_df)
+    expected = calculator.calculate_primary_kpis()
+    for name, value in cube.primary_kpis().items():
+        assert value == pytest.approx(expected[name])
+    good = calculator.calculate_good_bad_loans()['good_loans']['percentage']
+    cards = tables['kpi_summary_cards'].set_index('KPI_Name')['KPI_Value']
+    assert cards['Good Loan Percentage'] == pytest.approx(good)
+
+
+def test_cube_is_an_aggregate(clean_df):
+    cube = LoanKPICube.from_frame(clean_df)
+    assert sum(len(table) for table in cube.tables.values()) < len(clean_df) / 2
+
+
+def test_empty_selection(clean_df):
+    empty = clean_df.iloc[:0]
+    cards = LoanKPICube.from_frame(empty).kpi_summary_cards().set_index('KPI_Name')['KPI_Value']
+    assert cards['Total Loan Applications'] == 0
+    assert cards['Good Loan Percentage'] == 0
+    assert np.isnan(cards['Average Interest Rate'])
+    assert LoanKPICalculator(empty).calculate_good_bad_loans()['bad_loans']['percentage'] == 0
+
+
+
+def _assert_same_exports(cube, expected):
+    tables, expected = cube.export_tables(), expected.export_tables()
+    for name in expected:
+        pd.testing.assert_frame_equal(tables[name].reset_index(drop=True), expected[name].reset_index(drop=True),
+                                      check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_incremental_state_matches_full_cube(clean_df, tmp_path, fmt):
+    state_dir = str(tmp_path / 'state')
+    halves = [clean_df.iloc[::2], clean_df.iloc[1::2]]
+    for batch in halves:
+        cube = LoanKPICalculator(batch).update_state(state_dir, fmt=fmt)
+    _assert_same_exports(cube, LoanKPICube.from_frame(clean_df))
+    assert len(KPIStateStore(state_dir, fmt).paths()) == len(clean_df[['issue_year', 'issue_month']].drop_duplicates())
+
+
+def test_refresh_rewrites_only_its_months(clean_df, tmp_path):
+    state_dir = str(tmp_path / 'state')
+    LoanKPICalculator(clean_df).update_state(state_dir)
+    store = KPIStateStore(state_dir)
+    stamps = {path: os.stat(path).st_mtime_ns for path in store.paths()}
+    march = clean_df[(clean_df['issue_year'] == 2021) & (clean_df['issue_month'] == 3)]
+    for path in store.paths():
+        os.utime(path, ns=(0, 0))
+
+    # Restating March with the same rows leaves the state as it was
+    cube = LoanKPICalculator(march).update_state(state_dir, replace_partitions=True)
+    _assert_same_exports(cube, LoanKPICube.from_frame(clean_df))
+    touched = [path for path in stamps if os.stat(path).st_mtime_ns != 0]
+    assert touched == [store.path(2021, 3)]
+
+
+def test_state_path_must_be_a_directory(tmp_path):
+    path = tmp_path / 'kpi_state.csv'
+    path.write_text('')
+    with pytest.raises(ValueError, match='directory'):
+        KPIStateStore(str(path))
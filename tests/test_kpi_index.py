@@ -0,0 +1,90 @@
+# tests/test_kpi_index.py
+import numpy as np
+import pandas as pd
+import pytest
+from src.kpi_index import LoanKPIIndex
+
+FILTERS = [
+    {},
+    {'grade': 'A'},
+    {'grade': ['A', 'B'], 'address_state': 'CA'},
+    {'address_state': ['CA', 'NY', 'TX'], 'term': ' 60 months', 'loan_category': 'Bad Loan'},
+    {'issue_year': 2021, 'issue_month': [3, 4]},
+    {'issue_month': 12, 'purpose': ['car', 'Debt consolidation'], 'home_ownership': 'RENT'},
+    # Unknown labels match nothing; mixed with known ones they are ignored
+    {'purpose': 'space travel'},
+    {'address_state': ['CA', 'ZZ']},
+    {'issue_year': 1999},
+]
+
+
+@pytest.fixture(scope='module')
+def index(clean_df) -> LoanKPIIndex:
+    return LoanKPIIndex(clean_df)
+
+
+def _mask(df: pd.DataFrame, filters: dict) -> np.ndarray:
+    """The same filters as a pandas boolean mask"""
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in filters.items():
+        values = values if isinstance(values, list) else [values]
+        mask &= df[col].isin(values).to_numpy()
+    return mask
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_filter_matches_boolean_mask(clean_df, index, filters):
+    np.testing.assert_array_equal(index.filter(**filters), np.flatnonzero(_mask(clean_df, filters)))
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_primary_kpis_match_pandas(clean_df, index, filters):
+    rows = clean_df[_mask(clean_df, filters)]
+    kpis = index.primary_kpis(**filters)
+    assert kpis['total_loan_applications'] == len(rows)
+    assert kpis['total_funded_amount'] == pytest.approx(rows['loan_amount'].sum())
+    assert kpis['total_amount_received'] == pytest.approx(rows['total_payment'].sum())
+    if len(rows):
+        assert kpis['average_interest_rate'] == pytest.approx(rows['int_rate'].mean())
+        assert kpis['average_dti'] == pytest.approx(rows['dti'].mean())
+    else:
+        assert np.isnan(kpis['average_interest_rate'])
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_good_bad_loans_match_pandas(clean_df, index, filters):
+    rows = clean_df[_mask(clean_df, filters)]
+    result = index.good_bad_loans(**filters)
+    for key, category in [('good_loans', 'Good Loan'), ('bad_loans', 'Bad Loan')]:
+        loans = rows[rows['loan_category'] == category]
+        assert result[key]['applications'] == len(loans)
+        assert result[key]['percentage'] == pytest.approx(len(loans) / len(rows) * 100 if len(rows) else 0.0)
+        assert result[key]['funded_amount'] == pytest.approx(loans['loan_amount'].sum())
+        assert result[key]['received_amount'] == pytest.approx(loans['total_payment'].sum())
+
+
+def test_plain_columns_and_missing_values():
+    # Object and numeric dimensions (not categoricals); a missing value never matches
+    df = pd.DataFrame({
+        'grade': ['B', 'A', None, 'B', 'C', 'A'],
+        'issue_month': [1, 2, 2, 3, 1, 2],
+        'loan_amount': [100, 200, 300, 400, 500, 600],
+        'total_payment': [10.0, np.nan, 30.0, 40.0, 50.0, 60.0],
+        'int_rate': [0.1, 0.12, 0.14, 0.1, 0.2, np.nan],
+        'dti': [0.2, 0.1, 0.3, 0.2, 0.1, 0.2]
+    })
+    index = LoanKPIIndex(df)
+    assert index.dimensions == ['grade', 'issue_month']
+    for filters in [{'grade': ['A', 'B']}, {'grade': 'A', 'issue_month': 2}, {'issue_month': [1, 3]},
+                    {'grade': 'D'}]:
+        np.testing.assert_array_equal(index.filter(**filters), np.flatnonzero(_mask(df, filters)))
+    kpis = index.primary_kpis(issue_month=2)
+    assert kpis['total_funded_amount'] == 1100
+    # Missing payments are skipped, as pandas sum() does
+    assert kpis['total_amount_received'] == pytest.approx(90.0)
+    assert kpis['average_interest_rate'] == pytest.approx(0.13)
+
+
+def test_unindexed_dimension_raises(index):
+    with pytest.raises(KeyError, match='not an indexed dimension'):
+        index.filter(sub_grade='A1')
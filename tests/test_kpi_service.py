@@ -0,0 +1,75 @@
+# tests/test_kpi_service.py
+import asyncio
+import json
+import os
+from http import HTTPStatus
+import pytest
+from src.data_export import publish_frame
+from src.kpi_service import KPIService
+
+
+@pytest.fixture
+def data_file(clean_df, tmp_path) -> str:
+    path = str(tmp_path / 'loan_data_clean.parquet')
+    publish_frame(clean_df, [path], fmt='parquet')
+    return path
+
+
+async def _query(service: KPIService, target: str):
+    status, body = await service.handle_query(target)
+    return status, json.loads(body)
+
+
+def test_filter_matching_no_rows_returns_empty_table(data_file):
+    async def run():
+        service = KPIService(data_file, workers=1)
+        await service.load()
+        for name in ['kpi_summary_cards', 'state_dimension']:
+            assert await _query(service, f'/tables/{name}?address_state=ZZ') == (HTTPStatus.OK, [])
+        status, kpis = await _query(service, '/kpis/primary?address_state=ZZ')
+        assert status == HTTPStatus.OK and kpis['total_loan_applications'] == 0
+    asyncio.run(run())
+
+
+def test_failing_query_returns_500_and_is_not_cached(data_file):
+    async def run():
+        service = KPIService(data_file, workers=1)
+        await service.load()
+        primary = service.routes['/kpis/primary']
+        service.routes['/kpis/primary'] = lambda state, filters: 1 / 0
+        status, body = await _query(service, '/kpis/primary?grade=A')
+        assert status == HTTPStatus.INTERNAL_SERVER_ERROR and 'ZeroDivisionError' in body['error']
+        service.routes['/kpis/primary'] = primary
+        status, _ = await _query(service, '/kpis/primary?grade=A')
+        assert status == HTTPStatus.OK
+    asyncio.run(run())
+
+
+def test_watch_skips_corrupt_file_and_loads_the_next_one(data_file, clean_df):
+    async def wait_for(condition, timeout=10.0):
+        for _ in range(int(timeout / 0.01)):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError('timed out')
+
+    async def run():
+        service = KPIService(data_file, workers=1, poll_seconds=0.01)
+        await service.load()
+        watcher = asyncio.create_task(service.watch())
+        try:
+            corrupt = data_file + '.tmp'
+            with open(corrupt, 'wb') as f:
+                f.write(b'PAR1 truncated')
+            os.replace(corrupt, data_file)
+            await wait_for(lambda: service.failed_version is not None)
+            assert not watcher.done()
+            assert len(service.state.df) == len(clean_df)
+            assert (await service.handle_query('/health'))[0] == HTTPStatus.OK
+
+            publish_frame(clean_df.iloc[:100], [data_file], fmt='parquet')
+            await wait_for(lambda: len(service.state.df) == 100)
+            assert service.reloads == 2
+        finally:
+            watcher.cancel()
+    asyncio.run(run())
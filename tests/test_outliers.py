@@ -0,0 +1,36 @@
+# tests/test_outliers.py
+import numpy as np
+from src.data_preprocessing import OUTLIER_COLUMNS
+from src.data_validator import DataValidator
+from src.outliers import OutlierDetector, bounds_from_report
+
+
+def _bounds(df, columns, sequential):
+    keep, report = OutlierDetector(columns).detect(df, sequential=sequential)
+    return keep, bounds_from_report(report)
+
+
+def test_sequential_and_independent_bounds_differ(raw_df):
+    _, sequential = _bounds(raw_df, OUTLIER_COLUMNS, sequential=True)
+    _, independent = _bounds(raw_df, OUTLIER_COLUMNS, sequential=False)
+    # The first column sees the same rows either way; later ones see fewer sequentially
+    assert sequential[OUTLIER_COLUMNS[0]] == independent[OUTLIER_COLUMNS[0]]
+    assert any(sequential[col] != independent[col] for col in OUTLIER_COLUMNS[1:])
+    assert independent == OutlierDetector(OUTLIER_COLUMNS).compute_bounds(raw_df)
+
+
+def test_independent_bounds_do_not_depend_on_column_order(raw_df):
+    keep, bounds = _bounds(raw_df, OUTLIER_COLUMNS, sequential=False)
+    reversed_keep, reversed_bounds = _bounds(raw_df, OUTLIER_COLUMNS[::-1], sequential=False)
+    assert bounds == reversed_bounds
+    np.testing.assert_array_equal(keep, reversed_keep)
+    # Sequential bounds move with the order of the columns
+    _, sequential = _bounds(raw_df, OUTLIER_COLUMNS, sequential=True)
+    _, reversed_sequential = _bounds(raw_df, OUTLIER_COLUMNS[::-1], sequential=True)
+    assert sequential != reversed_sequential
+
+
+def test_validator_reuses_independent_bounds(raw_df):
+    expected = DataValidator(raw_df).check_outliers(OUTLIER_COLUMNS)
+    bounds = OutlierDetector(OUTLIER_COLUMNS).compute_bounds(raw_df)
+    assert DataValidator(raw_df).check_outliers(OUTLIER_COLUMNS, bounds=bounds) == expected
@@ -0,0 +1,19 @@
+# tests/test_parallel_preprocessing.py
+import pandas as pd
+import pytest
+from src.data_preprocessing import LoanDataPreprocessor
+from src.parallel_preprocessing import ParallelLoanDataPreprocessor
+from tests.conftest import PIPELINE_STEPS, run_pipeline
+
+
+@pytest.mark.parametrize('n_partitions', [2, 5])
+def test_parallel_matches_serial(raw_df, n_partitions):
+    serial = run_pipeline(LoanDataPreprocessor(raw_df, random_state=3))
+
+    parallel = ParallelLoanDataPreprocessor(raw_df, n_workers=2, n_partitions=n_partitions, random_state=3)
+    # run_row_local_steps replaces the steps up to create_derived_features
+    parallel.clean_column_names().run_row_local_steps()
+    run_pipeline(parallel, PIPELINE_STEPS[PIPELINE_STEPS.index('create_derived_features') + 1:])
+
+    pd.testing.assert_frame_equal(parallel.get_clean_data(), serial.get_clean_data())
+    assert parallel.fill_values.keys() == serial.fill_values.keys()
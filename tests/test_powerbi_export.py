@@ -0,0 +1,92 @@
+# tests/test_powerbi_export.py
+import os
+import pandas as pd
+import pytest
+from src.data_export import output_path, read_frame
+from src.powerbi_export import (StarSchemaExporter, STAR_DIMENSIONS, DATE_DIMENSION, FACT_TABLE,
+                                date_key, key_name)
+
+
+@pytest.fixture(scope='module')
+def tables(clean_df):
+    return StarSchemaExporter(clean_df).build()
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """Labels compared as text, missing values as None (categorical/str/object alike)"""
+    return series.astype(object).map(lambda value: None if pd.isna(value) else str(value))
+
+
+def test_every_fact_key_resolves_to_one_dimension_row(tables):
+    fact = tables[FACT_TABLE]
+    for name in STAR_DIMENSIONS:
+        key = key_name(name)
+        dimension = tables[name]
+        assert dimension[key].is_unique, name
+        assert fact[key].notna().all(), name
+        assert fact[key].isin(dimension[key]).all(), name
+        # Every dimension row is used by at least one loan
+        assert set(dimension[key]) == set(fact[key]), name
+    dim_date = tables[DATE_DIMENSION]
+    assert dim_date['date_key'].is_unique
+    for col in [col for col in fact.columns if col.endswith('_date_key')]:
+        keys = fact[col].dropna()
+        assert keys.isin(dim_date['date_key']).all(), col
+
+
+def test_fact_joined_to_dimensions_reproduces_clean_frame(clean_df, tables):
+    fact = tables[FACT_TABLE]
+    joined = fact
+    for name in STAR_DIMENSIONS:
+        joined = joined.merge(tables[name], on=key_name(name), how='left', validate='many_to_one')
+    calendar = tables[DATE_DIMENSION].set_index('date_key')
+    for col in [col for col in fact.columns if col.endswith('_date_key')]:
+        joined[col[:-len('_key')]] = joined[col].map(calendar['Date'])
+    joined['issue_year'] = joined['issue_date_key'].map(calendar['Year'])
+    joined['issue_month'] = joined['issue_date_key'].map(calendar['Month_Number'])
+    joined['issue_month_name'] = joined['issue_date_key'].map(calendar['Month_Name'])
+    assert len(joined) == len(clean_df)
+
+    expected = clean_df.reset_index(drop=True)
+    assert set(expected.columns) <= set(joined.columns)
+    for col in expected.columns:
+        if pd.api.types.is_datetime64_any_dtype(expected[col]):
+            pd.testing.assert_series_equal(joined[col], expected[col], check_dtype=False, check_names=False,
+                                           obj=col)
+        elif pd.api.types.is_numeric_dtype(expected[col]):
+            pd.testing.assert_series_equal(joined[col].astype('float64'), expected[col].astype('float64'),
+                                           check_names=False, obj=col)
+        else:
+            assert _as_text(joined[col]).tolist() == _as_text(expected[col]).tolist(), col
+
+
+def test_date_dimension_covers_every_issue_date(clean_df, tables):
+    dim_date = tables[DATE_DIMENSION]
+    issue_keys = set(date_key(clean_df['issue_date']).dropna())
+    assert issue_keys
+    assert issue_keys <= set(dim_date['date_key'])
+    # A contiguous calendar: one row per day between the first and last date
+    assert dim_date['Date'].diff().dropna().eq(pd.Timedelta(days=1)).all()
+
+
+def test_keys_are_stable_across_csv_and_parquet(tmp_path, clean_df):
+    reloaded = {}
+    for fmt in ['csv', 'parquet']:
+        directory = str(tmp_path / fmt)
+        os.makedirs(directory)
+        StarSchemaExporter(clean_df).write(directory, fmt=fmt)
+        reloaded[fmt] = {name: read_frame(output_path(os.path.join(directory, name), fmt))
+                         for name in [FACT_TABLE, DATE_DIMENSION, *STAR_DIMENSIONS]}
+
+    csv, parquet = reloaded['csv'], reloaded['parquet']
+    key_columns = [col for col in parquet[FACT_TABLE].columns if col.endswith('_key')]
+    assert key_columns == [col for col in csv[FACT_TABLE].columns if col.endswith('_key')]
+    for col in ['id', *key_columns]:
+        assert csv[FACT_TABLE][col].astype('Int64').tolist() == parquet[FACT_TABLE][col].astype('Int64').tolist(), col
+    # The same key points at the same labels in both formats
+    for name, columns in STAR_DIMENSIONS.items():
+        key = key_name(name)
+        assert csv[name][key].tolist() == parquet[name][key].tolist(), name
+        for col in columns:
+            assert _as_text(csv[name][col]).tolist() == _as_text(parquet[name][col]).tolist(), (name, col)
+    assert csv[DATE_DIMENSION]['date_key'].tolist() == parquet[DATE_DIMENSION]['date_key'].tolist()